@@ -0,0 +1,273 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from dev_brain import brain_cli, codec, composer, graph_manager, guardian, layout, pipeline, vault_backend, vault_cache
+from dev_brain.models import FileSummary, FrameSnapshot, Graph, RuleStatesForFile
+from dev_brain.prompt_cache import prompt_cache
+
+from .vault_generator import generate_vault, source_path_for
+
+# Times the run-cycle hot path and the CLI against a synthetic vault and prints
+# (or writes) a JSON report with p50/p95/p99 latencies and tracemalloc peaks.
+# With --baseline, each benchmark's p50 is compared to a stored report and the
+# run exits with status 1 if any of them regressed by more than --threshold.
+# The codec.* benchmarks decode and encode a sample of the vault's artifacts in each
+# vault format, next to the pre-codec path (json.loads plus model kwargs, indented
+# dumps), and the report lists each format's speedup over it.
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of samples (pct in 0..100)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+def measure(
+    fn: Callable[[int], None],
+    iterations: int,
+    warmup: int = 1,
+    setup: Optional[Callable[[], None]] = None,
+    teardown: Optional[Callable[[], None]] = None,
+) -> Dict[str, float]:
+    """
+    Runs fn(i) `iterations` times (after `warmup` untimed runs). setup/teardown run
+    around every call, outside the timed region. Memory is the tracemalloc peak of
+    one extra traced call, so tracing does not skew the timings.
+    """
+    def call(i):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn(i)
+        elapsed = time.perf_counter() - start
+        if teardown:
+            teardown()
+        return elapsed
+
+    for i in range(warmup):
+        call(i)
+    samples = [call(warmup + i) for i in range(iterations)]
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        fn(warmup + iterations)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    if teardown:
+        teardown()
+
+    return {
+        "iterations": iterations,
+        "mean_ms": sum(samples) / len(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000,
+        "peak_memory_kb": peak / 1024,
+    }
+
+def _quiet(fn: Callable[[], None]) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+
+def _cli(argv: List[str]) -> Callable[[int], None]:
+    def run(_):
+        with _argv(["brain_cli"] + argv):
+            _quiet(brain_cli.main)
+    return run
+
+@contextlib.contextmanager
+def _argv(argv):
+    saved = sys.argv
+    sys.argv = argv
+    try:
+        yield
+    finally:
+        sys.argv = saved
+
+def _remove_sqlite(vault_root: Path) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        path = vault_root / (vault_backend.SQLITE_FILENAME + suffix)
+        if path.exists():
+            path.unlink()
+
+def run_benchmarks(project_root: Path, files: int, iterations: int, cold: bool = False) -> Dict[str, Dict[str, float]]:
+    """Runs every benchmark against the vault in project_root. Mutating benchmarks append frames to it."""
+    os.chdir(project_root)
+    vault_root = project_root / ".dev_brain"
+
+    def reset_caches():
+        if cold:
+            vault_cache.clear_all()
+            prompt_cache.clear()
+
+    def target(i):
+        return source_path_for((i * 7919) % files)
+
+    requests = ["Add logging to the handler", "Run a raw query against the database", "Refactor the service layer"]
+
+    benches = {
+        "guardian.process_change_event": lambda i: guardian.process_change_event(requests[i % 3], [target(i)]),
+        "composer.generate_prompt": lambda i: composer.generate_prompt(requests[i % 3], target(i)),
+        "composer.generate_prompt.repeat": lambda i: composer.generate_prompt(requests[i % 3], target(0)),
+        "pipeline.run_cycle": lambda i: pipeline.run_cycle(requests[i % 3], target(i)),
+        "graph_manager.load_graph": lambda i: graph_manager.load_graph(),
+        "graph_manager.save_graph": lambda i: graph_manager.save_graph(graph_manager.load_indexed_graph()),
+        "brain_cli.status": _cli(["status"]),
+        "brain_cli.rules": _cli(["rules"]),
+        "brain_cli.file": lambda i: _cli(["file", target(i)])(i),
+        "brain_cli.frames": _cli(["frames", "--last", "20"]),
+    }
+
+    results = {}
+    for name, fn in benches.items():
+        results[name] = measure(fn, iterations, setup=reset_caches)
+
+    # migrate writes vault.sqlite3, which switches the backend; drop it after every run
+    results["brain_cli.migrate"] = measure(
+        _cli(["migrate"]), max(1, min(iterations, 3)), warmup=0,
+        setup=lambda: _remove_sqlite(vault_root), teardown=lambda: _remove_sqlite(vault_root),
+    )
+    results.update(run_codec_benchmarks(project_root, iterations))
+    return results
+
+def _legacy_decode(data: bytes, model):
+    return model(**json.loads(data))
+
+def _legacy_encode(obj) -> bytes:
+    return obj.model_dump_json(indent=2).encode("utf-8")
+
+def run_codec_benchmarks(project_root: Path, iterations: int, sample: int = 200) -> Dict[str, Dict[str, float]]:
+    """Load (decode) and save (encode) timings of up to `sample` artifacts per kind, per format."""
+    vault_root = project_root / ".dev_brain"
+    artifacts = []
+    for kind, model in (("summaries", FileSummary), ("rule_states", RuleStatesForFile)):
+        for path in layout.artifact_paths(vault_root, kind)[:sample]:
+            artifacts.append((path.read_bytes(), model))
+    for path in sorted((vault_root / "frames").glob("*.json"))[:sample]:
+        artifacts.append((path.read_bytes(), FrameSnapshot))
+    if (vault_root / "graph.json").exists():
+        artifacts.append(((vault_root / "graph.json").read_bytes(), Graph))
+    objects = [codec.decode(data, model) for data, model in artifacts]
+
+    results = {
+        "codec.load[legacy]": measure(lambda i: [_legacy_decode(d, m) for d, m in artifacts], iterations),
+        "codec.save[legacy]": measure(lambda i: [_legacy_encode(o) for o in objects], iterations),
+    }
+    for fmt in codec.FORMATS:
+        if fmt == "msgpack" and codec.msgpack is None:
+            continue
+        encoded = [(codec.encode(o, fmt), type(o)) for o in objects]
+        results[f"codec.load[{fmt}]"] = measure(lambda i: [codec.decode(d, m) for d, m in encoded], iterations)
+        results[f"codec.save[{fmt}]"] = measure(lambda i: [codec.encode(o, fmt) for o in objects], iterations)
+    return results
+
+def codec_speedups(results: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """p50 speedup of each codec benchmark over its legacy counterpart."""
+    speedups = {}
+    for name, stats in results.items():
+        if not name.startswith("codec.") or name.endswith("[legacy]") or not stats["p50_ms"]:
+            continue
+        legacy = results.get(name.split("[")[0] + "[legacy]")
+        if legacy:
+            speedups[name] = legacy["p50_ms"] / stats["p50_ms"]
+    return speedups
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> Dict[str, Dict[str, float]]:
+    """Returns p50 ratios against the baseline, flagging benchmarks slower than threshold x."""
+    comparison = {}
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("p50_ms"):
+            continue
+        ratio = stats["p50_ms"] / base["p50_ms"]
+        comparison[name] = {
+            "baseline_p50_ms": base["p50_ms"],
+            "p50_ms": stats["p50_ms"],
+            "ratio": ratio,
+            "regressed": ratio > threshold,
+        }
+    return comparison
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Dev Brain hot path against a synthetic vault")
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--decisions", type=int, default=500)
+    parser.add_argument("--frames", type=int, default=50000)
+    parser.add_argument("--rules-per-file", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--vault", help="Reuse (or create) the synthetic project in this directory instead of a temp dir")
+    parser.add_argument("--cold", action="store_true", help="Clear the in-process caches before every call")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="Compare against a previous JSON report")
+    parser.add_argument("--threshold", type=float, default=1.2, help="p50 ratio above which a benchmark counts as a regression")
+    args = parser.parse_args()
+
+    scale = {"files": args.files, "decisions": args.decisions, "frames": args.frames, "rules_per_file": args.rules_per_file}
+    original_cwd = os.getcwd()
+    temp_dir = None
+    if args.vault:
+        project_root = Path(args.vault).resolve()
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="dev_brain_bench_")
+        project_root = Path(temp_dir)
+
+    try:
+        start = time.perf_counter()
+        if not (project_root / ".dev_brain").exists():
+            generate_vault(project_root, seed=args.seed, **scale)
+        generate_seconds = time.perf_counter() - start
+
+        results = run_benchmarks(project_root, args.files, args.iterations, cold=args.cold)
+    finally:
+        os.chdir(original_cwd)
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    report = {
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "cold": args.cold,
+        "generate_seconds": generate_seconds,
+        "results": results,
+        "codec_speedups": codec_speedups(results),
+    }
+
+    regressed = False
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["comparison"] = compare(results, baseline.get("results", {}), args.threshold)
+        regressed = any(c["regressed"] for c in report["comparison"].values())
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    sys.exit(1 if regressed else 0)
+
+if __name__ == "__main__":
+    main()
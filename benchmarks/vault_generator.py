@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from dev_brain import vault_io
+from dev_brain.graph_index import IndexedGraph
+from dev_brain.graph_manager import save_graph
+from dev_brain.models import (
+    Decision, FileSummary, Lenses, InterfaceView, LogicView, DataView,
+    RuleStatesForFile, RuleStateEntry, StateBelief, FrameSnapshot, GraphEdge,
+)
+from dev_brain.codex_brain import hash_source
+
+# Builds a synthetic .dev_brain vault (plus the source files it describes) at a
+# configurable scale, using the vault_io layer so the layout matches a real vault.
+
+WORDS = [
+    "raw", "query", "service", "repository", "cache", "session", "global", "state",
+    "direct", "database", "logging", "secret", "token", "thread", "blocking", "socket",
+    "handler", "controller", "model", "schema", "migration", "retry", "timeout", "config",
+]
+TOPICS = ["Data Access", "Security", "Logging", "Concurrency", "Configuration", "Error Handling"]
+LAYERS = ["architecture", "service", "infrastructure", "domain"]
+START_TIME = datetime(2025, 1, 1)
+
+def source_path_for(i: int) -> str:
+    return f"src/pkg_{i // 100:03d}/mod_{i:05d}.py"
+
+def make_decisions(count: int, rng: random.Random) -> List[Decision]:
+    decisions = []
+    for i in range(count):
+        decisions.append(Decision(
+            id=f"DEC-{i:04d}",
+            topic=TOPICS[i % len(TOPICS)],
+            rule=f"Rule {i}: avoid {' '.join(rng.sample(WORDS, 2))}",
+            allowed_pattern=f"Use {rng.choice(WORDS)} {rng.choice(WORDS)}",
+            forbidden_pattern=" ".join(rng.sample(WORDS, rng.randint(2, 5))),
+            status=rng.choice(["strict", "advisory"]),
+            scope_layer=rng.choice(LAYERS),
+            amplitude=round(rng.uniform(0.3, 1.0), 2),
+        ))
+    return decisions
+
+def make_source(i: int, rng: random.Random) -> str:
+    name = f"Mod{i:05d}"
+    methods = "\n".join(
+        f"    def {w}_{j}(self, value):\n        return value\n"
+        for j, w in enumerate(rng.sample(WORDS, 4))
+    )
+    return f'"""Synthetic module {i}."""\n\nclass {name}:\n{methods}'
+
+def make_summary(file_path: str, source: str, i: int, files: int, rng: random.Random) -> FileSummary:
+    deps = [f"Mod{rng.randrange(files):05d}" for _ in range(rng.randint(0, 4))]
+    return FileSummary(
+        file=file_path,
+        hash=hash_source(source),
+        lenses=Lenses(
+            interface_view=InterfaceView(classes=[f"Mod{i:05d}"], public_methods=rng.sample(WORDS, 4), dependencies=deps),
+            logic_view=LogicView(flow=["validate", "process", "persist"], critical_branches=[]),
+            data_view=DataView(reads_from=[], writes_to=[], side_effects=[]),
+        ),
+        governance_tags=rng.sample(WORDS, 2),
+    )
+
+def make_rule_states(file_path: str, decisions: List[Decision], rules_per_file: int, rng: random.Random) -> RuleStatesForFile:
+    entries = []
+    for decision in rng.sample(decisions, min(rules_per_file, len(decisions))):
+        violating = round(rng.uniform(0.0, 0.6), 2)
+        at_risk = round(rng.uniform(0.0, 1.0 - violating), 2)
+        entries.append(RuleStateEntry(
+            rule_id=decision.id,
+            state_belief=StateBelief(compliant=round(1.0 - violating - at_risk, 2), at_risk=at_risk, violating=violating),
+            entangled_with=[],
+            last_updated_frame="frame_001",
+        ))
+    return RuleStatesForFile(file=file_path, rule_states=entries)
+
+def generate_vault(
+    root: Path,
+    files: int = 10000,
+    decisions: int = 500,
+    frames: int = 50000,
+    rules_per_file: int = 10,
+    frame_files: bool = True,
+    seed: int = 0,
+) -> Dict[str, int]:
+    """
+    Writes a synthetic project into root: source files under src/ and a JSON vault
+    under root/.dev_brain. Returns the generated counts.
+    """
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    original_cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        vault_root = root / ".dev_brain"
+        for sub in ("summaries", "rule_states", "frames"):
+            (vault_root / sub).mkdir(parents=True, exist_ok=True)
+
+        # 1. Decisions
+        decision_list = make_decisions(decisions, rng)
+        with open(vault_root / "decisions.json", "w", encoding="utf-8") as f:
+            json.dump([d.model_dump() for d in decision_list], f, indent=4)
+
+        # 2. Source files, summaries and rule states
+        file_paths = []
+        for i in range(files):
+            file_path = source_path_for(i)
+            source = make_source(i, rng)
+            Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+            Path(file_path).write_text(source, encoding="utf-8")
+            vault_io.save_file_summary(make_summary(file_path, source, i, files, rng))
+            if decision_list:
+                vault_io.save_rule_states(make_rule_states(file_path, decision_list, rules_per_file, rng))
+            file_paths.append(file_path)
+
+        # 3. Frames, chained by sequence edges, written as one checkpoint
+        graph = IndexedGraph()
+        for n in range(1, frames + 1):
+            frame = FrameSnapshot(
+                frame_id=f"frame_{n:03d}",
+                timestamp=(START_TIME + timedelta(seconds=n)).isoformat() + "Z",
+                user_goal=f"Synthetic change {n}: {' '.join(rng.sample(WORDS, 3))}",
+                changed_files=rng.sample(file_paths, min(3, len(file_paths))),
+                relevant_decisions=[d.id for d in rng.sample(decision_list, min(3, len(decision_list)))],
+                suspected_violations=[],
+                predicted_risks=[],
+                next_steps=[],
+            )
+            graph.add_frame(frame)
+            if n > 1:
+                graph.add_graph_edge(GraphEdge(from_frame_id=f"frame_{n - 1:03d}", to_frame_id=frame.frame_id, type="sequence", weight=1.0))
+            if frame_files:
+                vault_io.save_frame(frame)
+        save_graph(graph)
+    finally:
+        os.chdir(original_cwd)
+
+    return {"files": files, "decisions": decisions, "frames": frames, "rules_per_file": rules_per_file}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Dev Brain vault")
+    parser.add_argument("root", help="Directory to create the project and vault in")
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--decisions", type=int, default=500)
+    parser.add_argument("--frames", type=int, default=50000)
+    parser.add_argument("--rules-per-file", type=int, default=10)
+    parser.add_argument("--no-frame-files", action="store_true", help="Only write frames to graph.json")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    counts = generate_vault(
+        Path(args.root).resolve(),
+        files=args.files,
+        decisions=args.decisions,
+        frames=args.frames,
+        rules_per_file=args.rules_per_file,
+        frame_files=not args.no_frame_files,
+        seed=args.seed,
+    )
+    print(json.dumps(counts))
+
+if __name__ == "__main__":
+    main()
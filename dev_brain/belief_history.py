@@ -0,0 +1,233 @@
+import bisect
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from .models import RuleStateEntry, StateBelief
+from .paths import history_path_for
+from .vault_backend import write_atomic
+from .locking import rule_state_lock
+from .retention import frame_number
+
+# Event-sourced history of rule-state beliefs, so past states can be queried after
+# the rule-state files have been overwritten.
+#
+# Each file has an append-only log (.dev_brain/history/<file>.jsonl) of belief
+# changes, one JSON record per line:
+#   {"n": 42, "frame": "frame_042", "rule": "DEC-005", "b": [compliant, at_risk, violating]}
+# Every QDB_HISTORY_CHECKPOINT_EVERY events (default 256) a checkpoint record with
+# the latest belief of every rule is appended:
+#   {"n": <highest frame number so far>, "checkpoint": {rule: [n, frame, c, r, v]}}
+# A sidecar index (<file>.jsonl.idx) lists the checkpoints' frame numbers and byte
+# offsets. A lookup bisects the index, seeks to the nearest checkpoint at or before
+# the requested frame and replays only the tail after it, so its cost does not grow
+# with the length of the history.
+#
+# Events are appended under the file's rule-state lock. The index records the log
+# size it describes and is rebuilt from the log when it does not match (after a
+# crash between the two writes, or a manual edit).
+
+DEFAULT_CHECKPOINT_EVERY = 256
+
+FrameRef = Union[str, int]
+
+
+def _checkpoint_every() -> int:
+    try:
+        return max(1, int(os.environ.get("QDB_HISTORY_CHECKPOINT_EVERY", DEFAULT_CHECKPOINT_EVERY)))
+    except ValueError:
+        return DEFAULT_CHECKPOINT_EVERY
+
+
+class BeliefAt(NamedTuple):
+    rule_id: str
+    state_belief: StateBelief
+    # Frame that set this belief
+    frame_id: str
+    frame_number: int
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+def _to_number(frame: FrameRef) -> int:
+    if isinstance(frame, int):
+        return frame
+    number = frame_number(frame)
+    if number is None:
+        raise ValueError(f"not a frame reference: {frame!r}")
+    return number
+
+
+def _belief(values) -> StateBelief:
+    return StateBelief(compliant=values[0], at_risk=values[1], violating=values[2])
+
+
+def _read_records(f, offset: int) -> Iterator[dict]:
+    f.seek(offset)
+    for line in f:
+        if not line.endswith(b"\n"):
+            break  # torn final record of an interrupted append
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+
+def _apply(state: Dict[str, BeliefAt], record: dict, target: Optional[int]) -> None:
+    """Folds one record into state, keeping the highest-numbered belief per rule up to target."""
+    if "checkpoint" in record:
+        items = [(rule, n, frame, values) for rule, (n, frame, *values) in record["checkpoint"].items()]
+    else:
+        items = [(record["rule"], record["n"], record["frame"], record["b"])]
+    for rule, n, frame, values in items:
+        if target is not None and n > target:
+            continue
+        current = state.get(rule)
+        if current is None or current.frame_number <= n:
+            state[rule] = BeliefAt(rule, _belief(values), frame, n)
+
+
+def _build_index(path: Path) -> dict:
+    index = {"size": 0, "max_n": 0, "pending": 0, "checkpoints": []}
+    if not path.exists():
+        return index
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                offset += len(line)
+                continue
+            index["max_n"] = max(index["max_n"], record["n"])
+            if "checkpoint" in record:
+                index["checkpoints"].append([record["n"], offset])
+                index["pending"] = 0
+            else:
+                index["pending"] += 1
+            offset += len(line)
+    index["size"] = offset
+    return index
+
+
+def _load_index(path: Path) -> dict:
+    size = path.stat().st_size if path.exists() else 0
+    try:
+        with open(_index_path(path), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("size") == size:
+            return index
+    except (FileNotFoundError, json.JSONDecodeError, ValueError):
+        pass
+    return _build_index(path)
+
+
+def _state_from(path: Path, index: dict, target: Optional[int]) -> Dict[str, BeliefAt]:
+    checkpoints = index["checkpoints"]
+    if target is None:
+        pos = len(checkpoints) - 1
+    else:
+        pos = bisect.bisect_right([c[0] for c in checkpoints], target) - 1
+    offset = checkpoints[pos][1] if pos >= 0 else 0
+
+    state: Dict[str, BeliefAt] = {}
+    with open(path, "rb") as f:
+        for i, record in enumerate(_read_records(f, offset)):
+            if i > 0 and "checkpoint" in record and target is not None and record["n"] > target:
+                break  # later events are summarized from here on
+            _apply(state, record, target)
+    return state
+
+
+def record_events(file_path: str, entries: Iterable[RuleStateEntry]) -> int:
+    """
+    Appends belief changes (each entry as set by its last_updated_frame) to the file's
+    history, adding a checkpoint when due. Entries whose frame ID has no sequence
+    number cannot be placed in time and are skipped. Returns the number recorded.
+    """
+    records = []
+    for entry in entries:
+        n = frame_number(entry.last_updated_frame)
+        if n is None:
+            continue
+        b = entry.state_belief
+        records.append({"n": n, "frame": entry.last_updated_frame, "rule": entry.rule_id,
+                        "b": [b.compliant, b.at_risk, b.violating]})
+    if not records:
+        return 0
+
+    path = history_path_for(file_path)
+    with rule_state_lock(file_path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        index = _load_index(path)
+        if path.exists() and path.stat().st_size != index["size"]:
+            # Drop a torn final record so the next append starts on a fresh line
+            with open(path, "rb+") as f:
+                f.truncate(index["size"])
+        payload = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        with open(path, "a", encoding="utf-8", newline="\n") as f:
+            f.write(payload)
+        index["size"] += len(payload.encode("utf-8"))
+        index["max_n"] = max([index["max_n"]] + [r["n"] for r in records])
+        index["pending"] += len(records)
+
+        if index["pending"] >= _checkpoint_every():
+            state = _state_from(path, index, None)
+            checkpoint = {"n": index["max_n"], "checkpoint": {
+                rule: [b.frame_number, b.frame_id, b.state_belief.compliant, b.state_belief.at_risk, b.state_belief.violating]
+                for rule, b in sorted(state.items())
+            }}
+            line = json.dumps(checkpoint, separators=(",", ":")) + "\n"
+            with open(path, "a", encoding="utf-8", newline="\n") as f:
+                f.write(line)
+            index["checkpoints"].append([index["max_n"], index["size"]])
+            index["size"] += len(line.encode("utf-8"))
+            index["pending"] = 0
+
+        try:
+            write_atomic(_index_path(path), json.dumps(index).encode("utf-8"))
+        except IOError as e:
+            print(f"Error saving history index for {file_path}: {e}")
+    return len(records)
+
+
+def state_at(file_path: str, frame: Optional[FrameRef] = None) -> Dict[str, BeliefAt]:
+    """Every rule's belief for the file as of frame (default: the latest), by rule id."""
+    path = history_path_for(file_path)
+    if not path.exists():
+        return {}
+    target = None if frame is None else _to_number(frame)
+    return _state_from(path, _load_index(path), target)
+
+
+def belief_at(file_path: str, rule_id: str, frame: Optional[FrameRef] = None) -> Optional[BeliefAt]:
+    """One rule's belief for the file as of frame, None if it had none yet."""
+    return state_at(file_path, frame).get(rule_id)
+
+
+def rule_history(
+    file_path: str,
+    rule_id: str,
+    start: Optional[FrameRef] = None,
+    end: Optional[FrameRef] = None,
+) -> List[BeliefAt]:
+    """Every recorded change of one rule's belief, in frame order (a full scan of the log)."""
+    path = history_path_for(file_path)
+    if not path.exists():
+        return []
+    lo = None if start is None else _to_number(start)
+    hi = None if end is None else _to_number(end)
+    changes = {}
+    with open(path, "rb") as f:
+        for record in _read_records(f, 0):
+            if "checkpoint" in record or record["rule"] != rule_id:
+                continue
+            n = record["n"]
+            if (lo is None or n >= lo) and (hi is None or n <= hi):
+                changes[n] = BeliefAt(rule_id, _belief(record["b"]), record["frame"], n)
+    return [changes[n] for n in sorted(changes)]
@@ -0,0 +1,228 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .models import RuleStatesForFile, RuleStateEntry, StateBelief
+from .metrics import initial_state_belief
+
+# In-memory belief state for many files and rules at once. Beliefs live in a dense
+# (files, rules, 3) float array in (compliant, at_risk, violating) order, with index
+# maps from file path and rule id to rows and columns. Cells that have no rule-state
+# entry yet are tracked by a mask. The pydantic models are only used at the vault
+# boundary (from_rule_states / to_rule_states).
+#
+# update and merge reproduce metrics.apply_suspicion and metrics.merge_state_beliefs
+# bit for bit, including Python's round(x, 2).
+
+COMPLIANT, AT_RISK, VIOLATING = 0, 1, 2
+
+def _initial_vector() -> np.ndarray:
+    belief = initial_state_belief()
+    return np.array([belief.compliant, belief.at_risk, belief.violating])
+
+def round2(values: np.ndarray) -> np.ndarray:
+    """Vectorized round(x, 2) with the same results as Python's float rounding."""
+    scaled = values * 100.0
+    rounded = np.rint(scaled) / 100.0
+    # Away from .5 ties np.rint picks the same integer as Python; near a tie the
+    # product above may have drifted, so defer to Python's correctly rounded round()
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        idx = np.nonzero(near_tie)
+        rounded[idx] = [round(float(v), 2) for v in values[idx]]
+    return rounded
+
+class BeliefStore:
+    """Dense belief array for files x rules, with vectorized updates."""
+
+    def __init__(self, files: Iterable[str] = (), rules: Iterable[str] = ()):
+        self.file_index: Dict[str, int] = {}
+        self.rule_index: Dict[str, int] = {}
+        self.beliefs = np.zeros((0, 0, 3))
+        self.present = np.zeros((0, 0), dtype=bool)
+        self.last_updated = np.empty((0, 0), dtype=object)
+        self.entangled = np.empty((0, 0), dtype=object)
+        self.add_files(files)
+        self.add_rules(rules)
+
+    @property
+    def shape(self):
+        return len(self.file_index), len(self.rule_index)
+
+    # --- Index maps -------------------------------------------------------
+
+    def _grow(self, files: int, rules: int) -> None:
+        n_files, n_rules = self.beliefs.shape[:2]
+        if files <= n_files and rules <= n_rules:
+            return
+        # Grow capacity geometrically so repeated additions stay amortized O(1)
+        new_files = max(files, n_files * 2 if files > n_files else n_files)
+        new_rules = max(rules, n_rules * 2 if rules > n_rules else n_rules)
+
+        beliefs = np.zeros((new_files, new_rules, 3))
+        beliefs[:n_files, :n_rules] = self.beliefs
+        present = np.zeros((new_files, new_rules), dtype=bool)
+        present[:n_files, :n_rules] = self.present
+        last_updated = np.empty((new_files, new_rules), dtype=object)
+        last_updated[:n_files, :n_rules] = self.last_updated
+        entangled = np.empty((new_files, new_rules), dtype=object)
+        entangled[:n_files, :n_rules] = self.entangled
+        self.beliefs, self.present, self.last_updated, self.entangled = beliefs, present, last_updated, entangled
+
+    def add_files(self, files: Iterable[str]) -> np.ndarray:
+        """Ensures rows exist for files and returns their row indexes."""
+        rows = [self.file_index.setdefault(f, len(self.file_index)) for f in files]
+        self._grow(len(self.file_index), len(self.rule_index))
+        return np.array(rows, dtype=np.intp)
+
+    def add_rules(self, rules: Iterable[str]) -> np.ndarray:
+        """Ensures columns exist for rules and returns their column indexes."""
+        cols = [self.rule_index.setdefault(r, len(self.rule_index)) for r in rules]
+        self._grow(len(self.file_index), len(self.rule_index))
+        return np.array(cols, dtype=np.intp)
+
+    # --- Vault boundary ---------------------------------------------------
+
+    @classmethod
+    def from_rule_states(cls, rule_states: Iterable[RuleStatesForFile]) -> "BeliefStore":
+        store = cls()
+        for rs_obj in rule_states:
+            store.load(rs_obj)
+        return store
+
+    def load(self, rs_obj: RuleStatesForFile, file_path: Optional[str] = None) -> None:
+        """Replaces a file's row (rs_obj.file unless file_path is given) with the entries of a RuleStatesForFile."""
+        row = self.add_files([file_path or rs_obj.file])[0]
+        cols = self.add_rules(entry.rule_id for entry in rs_obj.rule_states)
+        self.present[row] = False
+        for col, entry in zip(cols, rs_obj.rule_states):
+            belief = entry.state_belief
+            self.beliefs[row, col] = (belief.compliant, belief.at_risk, belief.violating)
+            self.present[row, col] = True
+            self.last_updated[row, col] = entry.last_updated_frame
+            self.entangled[row, col] = list(entry.entangled_with)
+
+    def to_rule_states(self, file_path: str, rule_ids: Optional[Sequence[str]] = None) -> RuleStatesForFile:
+        """
+        Exports one file's row. Entries follow rule_ids when given (skipping rules the
+        file has no entry for), otherwise column order.
+        """
+        row = self.file_index[file_path]
+        if rule_ids is None:
+            cols = [c for c in range(len(self.rule_index)) if self.present[row, c]]
+            ids = list(self.rule_index)
+            rule_ids = [ids[c] for c in cols]
+        else:
+            cols = [self.rule_index.get(r) for r in rule_ids]
+
+        values = self.beliefs[row].tolist()
+        entries = []
+        for rule_id, col in zip(rule_ids, cols):
+            if col is None or not self.present[row, col]:
+                continue
+            compliant, at_risk, violating = values[col]
+            entries.append(RuleStateEntry(
+                rule_id=rule_id,
+                state_belief=StateBelief(compliant=compliant, at_risk=at_risk, violating=violating),
+                entangled_with=list(self.entangled[row, col] or []),
+                last_updated_frame=self.last_updated[row, col],
+            ))
+        return RuleStatesForFile(file=file_path, rule_states=entries)
+
+    # --- Vectorized operations -------------------------------------------
+
+    def update(
+        self,
+        files: Sequence[str],
+        rule_ids: Sequence[str],
+        suspicion: Sequence[float],
+        frame_id: str,
+    ) -> None:
+        """
+        Applies one suspicion score per rule to every given file, like
+        metrics.apply_suspicion. Missing entries start from the initial belief.
+        files and rule_ids must not contain duplicates.
+        """
+        rows = self.add_files(files)
+        cols = self.add_rules(rule_ids)
+        if len(rows) == 0 or len(cols) == 0:
+            return
+        grid = np.ix_(rows, cols)
+
+        missing = ~self.present[grid]
+        if missing.any():
+            block = self.beliefs[grid]
+            block[missing] = _initial_vector()
+            self.beliefs[grid] = block
+            self.present[grid] = True
+            entangled = self.entangled[grid]
+            for idx in zip(*np.nonzero(missing)):
+                entangled[idx] = []
+            self.entangled[grid] = entangled
+        self.last_updated[grid] = frame_id
+
+        scores = np.asarray(suspicion, dtype=float)
+        active = scores != 0
+        if not active.any():
+            return
+        grid = np.ix_(rows, cols[active])
+        self.beliefs[grid] = shift_beliefs(self.beliefs[grid], scores[active])
+
+    def merge(self, other: "BeliefStore", alpha: float = 0.5) -> None:
+        """
+        Weighted average with another store's beliefs, like metrics.merge_state_beliefs.
+        Entries only the other store has are copied over.
+        """
+        rows = self.add_files(other.file_index)
+        cols = self.add_rules(other.rule_index)
+        n_files, n_rules = other.shape
+        grid = np.ix_(rows, cols)
+        theirs = other.present[:n_files, :n_rules]
+        ours = self.present[grid]
+
+        merged = round2(self.beliefs[grid] * (1 - alpha) + other.beliefs[:n_files, :n_rules] * alpha)
+        block = self.beliefs[grid]
+        block[ours & theirs] = merged[ours & theirs]
+        copied = theirs & ~ours
+        block[copied] = other.beliefs[:n_files, :n_rules][copied]
+        self.beliefs[grid] = block
+
+        if copied.any():
+            for name in ("last_updated", "entangled"):
+                target = getattr(self, name)[grid]
+                target[copied] = getattr(other, name)[:n_files, :n_rules][copied]
+                getattr(self, name)[grid] = target
+            self.present[grid] = ours | theirs
+
+    def normalize(self) -> None:
+        """Rescales every belief triple to sum to 1."""
+        totals = self.beliefs.sum(axis=2, keepdims=True)
+        np.divide(self.beliefs, totals, out=self.beliefs, where=totals > 0)
+
+    def decay(self, factor: float) -> None:
+        """Moves every belief towards the initial belief, keeping `factor` of its distance (0..1)."""
+        prior = _initial_vector()
+        decayed = prior + (self.beliefs - prior) * factor
+        self.beliefs = np.where(self.present[..., None], decayed, self.beliefs)
+
+def shift_beliefs(beliefs: np.ndarray, suspicion: np.ndarray) -> np.ndarray:
+    """Vectorized metrics.apply_suspicion over (..., rules, 3) beliefs and a suspicion per rule."""
+    compliant = beliefs[..., COMPLIANT]
+    at_risk = beliefs[..., AT_RISK]
+    violating = beliefs[..., VIOLATING]
+
+    delta = suspicion * 0.6
+    new_compliant = np.maximum(0.0, compliant - delta)
+    mass_moved = compliant - new_compliant
+    new_violating = violating + mass_moved * 0.7
+    new_at_risk = at_risk + mass_moved * 0.3
+
+    # Same summation order as the scalar version so results match exactly
+    total = new_compliant + new_at_risk + new_violating
+    positive = total > 0
+    safe_total = np.where(positive, total, 1.0)
+    new_compliant = np.where(positive, new_compliant / safe_total, new_compliant)
+    new_at_risk = np.where(positive, new_at_risk / safe_total, new_at_risk)
+    new_violating = np.where(positive, new_violating / safe_total, new_violating)
+
+    return round2(np.stack([new_compliant, new_at_risk, new_violating], axis=-1))
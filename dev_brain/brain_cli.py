@@ -3,11 +3,19 @@ import sys
 from pathlib import Path
 from typing import List, Dict, Any
 import json
+import itertools
 
 from . import paths
 from . import vault_io
+from . import vault_backend
 from .models import Decision, FileSummary, RuleStatesForFile, FrameSnapshot
 from . import graph_manager
+from . import rule_index
+from . import retention
+from . import belief_history
+from . import graph_query
+from . import codec
+from . import layout
 
 def cmd_status(args):
     vault_root = paths.get_vault_root()
@@ -17,50 +25,35 @@ def cmd_status(args):
     print(f"")
     print(f"Project root: {project_root}")
     print(f"Vault root:   {vault_root}")
+    print(f"Backend:      {vault_backend.get_backend().name}")
     print(f"")
     
     # Load decisions
     decisions = vault_io.load_decisions()
     print(f"Decisions (rules): {len(decisions)}")
     
-    # Count rule states
-    rule_states_dir = vault_root / "rule_states"
-    rule_state_files = list(rule_states_dir.glob("*.json")) if rule_states_dir.exists() else []
-    print(f"Files with rule_states: {len(rule_state_files)}")
+    # Count rule states (from the materialized rule index)
+    index = vault_io.load_rule_index()
+    rule_state_count = index.rule_state_files
+    print(f"Files with rule_states: {rule_state_count}")
     
     # Count frames
-    frames_dir = vault_root / "frames"
-    frames_files = list(frames_dir.glob("*.json")) if frames_dir.exists() else []
-    print(f"Frames: {len(frames_files)}")
+    print(f"Frames: {vault_io.count_frames()}")
     print(f"")
 
     # Top rules analysis
-    if decisions and rule_state_files:
+    if decisions and rule_state_count:
         print("Top rules by number of associated files:")
-        rule_counts = {}
-        for rs_file in rule_state_files:
-            try:
-                rs_data = vault_io.load_rule_states_from_path(rs_file)
-                # vault_io.load_rule_states expects a file path relative to something? No, it takes absolute path if we look at implementation?
-                # Actually vault_io.load_rule_states takes a Path object.
-                # But wait, vault_io.load_rule_states logic:
-                # def load_rule_states(file_path: Path) -> Optional[RuleStatesForFile]:
-                #     return RuleStatesForFile.model_validate_json(file_path.read_text())
-                if rs_data:
-                    for rs in rs_data.rule_states:
-                        rule_counts[rs.rule_id] = rule_counts.get(rs.rule_id, 0) + 1
-            except Exception:
-                continue
 
         # Sort by count desc
-        sorted_rules = sorted(rule_counts.items(), key=lambda x: x[1], reverse=True)
+        sorted_rules = sorted(index.rules.values(), key=lambda a: a.file_count, reverse=True)
         
         # Create map for rule descriptions
         rule_desc_map = {d.id: d.rule for d in decisions}
         
-        for rule_id, count in sorted_rules[:5]:
-            desc = rule_desc_map.get(rule_id, "Unknown Rule")
-            print(f"- {rule_id} ({desc}) – {count} files")
+        for agg in sorted_rules[:5]:
+            desc = rule_desc_map.get(agg.rule_id, "Unknown Rule")
+            print(f"- {agg.rule_id} ({desc}) – {agg.file_count} files")
 
 def cmd_rules(args):
     decisions = vault_io.load_decisions()
@@ -71,38 +64,23 @@ def cmd_rules(args):
     print(f">>> Dev Brain – Rules <<<")
     print(f"")
     
-    # Aggregate stats
-    vault_root = paths.get_vault_root()
-    rule_states_dir = vault_root / "rule_states"
-    rule_stats = {} # rule_id -> {compliant: [], at_risk: [], violating: []}
-    
-    if rule_states_dir.exists():
-        for rs_file in rule_states_dir.glob("*.json"):
-            try:
-                rs_data = vault_io.load_rule_states_from_path(rs_file)
-                if rs_data:
-                    for rs in rs_data.rule_states:
-                        if rs.rule_id not in rule_stats:
-                            rule_stats[rs.rule_id] = {"compliant": [], "at_risk": [], "violating": []}
-                        
-                        rule_stats[rs.rule_id]["compliant"].append(rs.state_belief.compliant)
-                        rule_stats[rs.rule_id]["at_risk"].append(rs.state_belief.at_risk)
-                        rule_stats[rs.rule_id]["violating"].append(rs.state_belief.violating)
-            except Exception:
-                continue
+    # Aggregate stats (materialized rule index; --rebuild recomputes it from scratch)
+    index = vault_io.load_rule_index(rebuild=getattr(args, "rebuild", False) is True)
 
     for d in decisions:
         print(f"- {d.id} – {d.rule}")
-        stats = rule_stats.get(d.id)
-        if stats:
-            count = len(stats["compliant"])
-            print(f"  Files: {count}")
-            if count > 0:
-                avg_c = sum(stats["compliant"]) / count
-                avg_r = sum(stats["at_risk"]) / count
-                avg_v = sum(stats["violating"]) / count
+        agg = index.rules.get(d.id)
+        if agg:
+            print(f"  Files: {agg.file_count}")
+            if agg.file_count > 0:
+                avg = agg.means()
                 print(f"  Avg state (compliant / at_risk / violating):")
-                print(f"    {avg_c:.2f} / {avg_r:.2f} / {avg_v:.2f}")
+                print(f"    {avg.compliant:.2f} / {avg.at_risk:.2f} / {avg.violating:.2f}")
+                top = rule_index.top_violating(agg)
+                if top:
+                    print(f"  Most violating files:")
+                    for file_path, violating in top:
+                        print(f"    {violating:.2f}  {file_path}")
         else:
             print(f"  Files: 0")
         print("")
@@ -115,18 +93,16 @@ def cmd_file(args):
     print(f"")
     
     # Summary
-    summary_path = paths.summary_path_for(target_file)
-    if summary_path.exists():
+    summary = vault_io.load_file_summary(target_file)
+    if summary:
         try:
-            summary = vault_io.load_file_summary(target_file)
-            if summary:
-                print("Summary:")
-                if summary.lenses.interface_view.classes:
-                    print(f"  - Classes: {', '.join(summary.lenses.interface_view.classes)}")
-                if summary.lenses.interface_view.public_methods:
-                    print(f"  - Public methods: {', '.join(summary.lenses.interface_view.public_methods)}")
-                if summary.governance_tags:
-                    print(f"  - Tags: {', '.join(summary.governance_tags)}")
+            print("Summary:")
+            if summary.lenses.interface_view.classes:
+                print(f"  - Classes: {', '.join(summary.lenses.interface_view.classes)}")
+            if summary.lenses.interface_view.public_methods:
+                print(f"  - Public methods: {', '.join(summary.lenses.interface_view.public_methods)}")
+            if summary.governance_tags:
+                print(f"  - Tags: {', '.join(summary.governance_tags)}")
         except Exception as e:
             print(f"Error loading summary: {e}")
     else:
@@ -135,14 +111,18 @@ def cmd_file(args):
     print(f"")
     
     # Governance State
-    rule_states_path = paths.rule_state_path_for(target_file)
     decisions = vault_io.load_decisions()
     decision_map = {d.id: d.rule for d in decisions}
     
-    if rule_states_path.exists():
+    # Beliefs as of the latest frame, after decay (see retention)
+    rs_data = retention.decay_rule_states(
+        vault_io.load_rule_states(target_file),
+        retention.half_lives(decisions),
+        graph_manager.current_frame_number(),
+    )
+    if rs_data is not None:
         try:
-            rs_data = vault_io.load_rule_states(target_file)
-            if rs_data and rs_data.rule_states:
+            if rs_data.rule_states:
                 print("Governance state (per rule):")
                 for rs in rs_data.rule_states:
                     rule_desc = decision_map.get(rs.rule_id, "Unknown Rule")
@@ -162,15 +142,15 @@ def cmd_frames(args):
     print(f">>> Dev Brain – Frames (last {limit}) <<<")
     print(f"")
     
-    graph = graph_manager.load_graph()
-    if not graph.frames:
+    graph = graph_manager.load_indexed_graph()
+    if not len(graph):
         print("No frames found.")
         return
         
-    # Sort frames by timestamp descending
-    sorted_frames = sorted(graph.frames, key=lambda f: f.timestamp, reverse=True)
+    # Frames by timestamp descending, straight from the time index
+    recent_frames = itertools.islice(graph.iter_by_time(reverse=True), limit)
     
-    for frame in sorted_frames[:limit]:
+    for frame in recent_frames:
         print(f"- {frame.frame_id}")
         print(f"  Time: {frame.timestamp}")
         # Truncate user request
@@ -188,6 +168,168 @@ def cmd_frames(args):
             print(f"  Rules touched: {', '.join(frame.relevant_decisions)}")
         print("")
 
+def _describe(graph, node_id: str) -> str:
+    frame = graph.get_frame(node_id)
+    if frame is not None:
+        goal = frame.user_goal if len(frame.user_goal) <= 60 else frame.user_goal[:57] + "..."
+        return f"{node_id}  {frame.timestamp}  \"{goal}\""
+    epoch = next((e for e in graph.epochs if e.epoch_id == node_id), None)
+    if epoch is not None:
+        return f"{node_id}  {epoch.first_frame_id} .. {epoch.last_frame_id} ({epoch.frame_count} frames)"
+    return f"{node_id}  (not in the graph)"
+
+def cmd_graph(args):
+    edge_types = getattr(args, "edge_type", None) or None
+    print(f">>> Dev Brain – Graph Query <<<")
+    print(f"")
+    with graph_manager.shared_graph() as graph:
+        if args.query == "path":
+            path = graph_query.shortest_path(graph, args.source, args.target, edge_types, args.max_depth)
+            if path is None:
+                print(f"No causal path from {args.source} to {args.target}.")
+                return
+            print(f"Path ({len(path) - 1} edges):")
+            for node_id, edge_type in path:
+                prefix = f"  --{edge_type}--> " if edge_type else "  "
+                print(f"{prefix}{_describe(graph, node_id)}")
+        elif args.query in ("ancestors", "descendants"):
+            walk = graph_query.ancestors if args.query == "ancestors" else graph_query.descendants
+            found = walk(graph, args.frame_id, args.depth or None, edge_types, args.limit or None)
+            print(f"{args.query.capitalize()} of {args.frame_id} (depth {args.depth or 'unbounded'}): {len(found)}")
+            for node_id in found:
+                print(f"  {_describe(graph, node_id)}")
+        elif args.query == "touching":
+            try:
+                start = graph_query.window_start(graph, args.window) if args.window else args.since
+            except ValueError as e:
+                print(f"Error: {e}")
+                return
+            found = graph_query.frames_touching(graph, args.file, args.rule, start, args.until)
+            what = " and ".join(filter(None, [args.file and f"file {args.file}", args.rule and f"rule {args.rule}"]))
+            print(f"Frames touching {what or 'anything'}: {len(found)}")
+            for node_id in found[-args.limit:] if args.limit else found:
+                print(f"  {_describe(graph, node_id)}")
+
+def _print_belief(label: str, belief) -> None:
+    print(f"{label}{belief.compliant:.2f} / {belief.at_risk:.2f} / {belief.violating:.2f}")
+
+def cmd_history(args):
+    target_file = args.file_path
+    print(f">>> Dev Brain – Belief History <<<")
+    print(f"")
+    print(f"File: {target_file}")
+    print(f"")
+
+    try:
+        if args.rule and args.at is None:
+            changes = belief_history.rule_history(target_file, args.rule)
+            if not changes:
+                print(f"No recorded beliefs for {args.rule}.")
+                return
+            print(f"Changes of {args.rule} (last {min(args.last, len(changes))} of {len(changes)}), compliant / at_risk / violating:")
+            for change in changes[-args.last:]:
+                _print_belief(f"  {change.frame_id}: ", change.state_belief)
+            return
+        state = belief_history.state_at(target_file, args.at)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    if args.rule:
+        state = {args.rule: state[args.rule]} if args.rule in state else {}
+    when = args.at or "the latest frame"
+    if not state:
+        print(f"No recorded beliefs as of {when}.")
+        return
+
+    rule_half_lives = retention.half_lives(vault_io.load_decisions())
+    at_number = retention.frame_number(args.at) if args.at else graph_manager.current_frame_number()
+    print(f"Beliefs as of {when} (compliant / at_risk / violating):")
+    for rule_id, belief in sorted(state.items()):
+        print(f"  - {rule_id} (set at {belief.frame_id}):")
+        _print_belief("      stored:  ", belief.state_belief)
+        half_life = rule_half_lives.get(rule_id)
+        if half_life and at_number is not None:
+            decayed = retention.decay_belief(
+                belief.state_belief, retention.decay_factor(half_life, at_number - belief.frame_number)
+            )
+            if decayed != belief.state_belief:
+                _print_belief("      decayed: ", decayed)
+
+def cmd_compact(args):
+    env_policy = retention.policy_from_env()
+    policy = retention.RetentionPolicy(
+        keep_frames=args.keep if args.keep is not None else env_policy.keep_frames,
+        epoch_size=args.epoch_size if args.epoch_size is not None else env_policy.epoch_size,
+    )
+    print(f">>> Dev Brain – Compact <<<")
+    print(f"")
+    if not policy.enabled:
+        print("No retention policy: pass --keep N (or set QDB_RETAIN_FRAMES) to retire old frames.")
+
+    if args.dry_run:
+        graph, epochs = retention.retire_frames(graph_manager.load_indexed_graph(), policy)
+    else:
+        epochs_before = len(graph_manager.load_graph().epochs)
+        graph = graph_manager.compact_graph(policy)
+        epochs = graph.epochs[epochs_before:]
+
+    verb = "Would retire" if args.dry_run else "Retired"
+    print(f"{verb} {sum(e.frame_count for e in epochs)} frame(s) into {len(epochs)} epoch(s)")
+    for epoch in epochs:
+        print(f"- {epoch.epoch_id}: {epoch.first_frame_id} .. {epoch.last_frame_id} "
+              f"({epoch.frame_count} frames, {sum(epoch.violation_counts.values())} suspected violations)")
+    print(f"Live frames: {len(graph)} | Epochs: {len(graph.epochs)}")
+
+def cmd_migrate(args):
+    vault_root = paths.get_vault_root()
+    print(f">>> Dev Brain – Migrate JSON vault to SQLite <<<")
+    print(f"")
+    print(f"Vault root: {vault_root}")
+    
+    counts = vault_backend.migrate_json_to_sqlite(vault_root)
+    print(f"Imported into {vault_root / vault_backend.SQLITE_FILENAME}:")
+    for kind, count in counts.items():
+        print(f"  - {kind}: {count}")
+    print(f"")
+    print("The SQLite backend is now used automatically (override with QDB_VAULT_BACKEND=json).")
+
+def cmd_layout(args):
+    vault_root = paths.get_vault_root()
+    if paths.is_sharded(vault_root):
+        print(f"Vault layout: sharded ({len(layout.load_manifest(vault_root))} path(s) in the manifest)")
+        return
+    if not args.migrate:
+        print("Vault layout: legacy (flattened file names)")
+        print("Run with --migrate to move to the sharded layout.")
+        return
+    if vault_backend.backend_name_for(vault_root) == "sqlite":
+        print("Note: the SQLite backend keys artifacts by path already; only the JSON-layout files are moved.")
+    counts = vault_backend.migrate_to_sharded_layout(vault_root, dry_run=args.dry_run)
+    verb = "Would move" if args.dry_run else "Moved"
+    print(f"{verb} {counts['summaries'] + counts['rule_states'] + counts['history']} artifact(s) to the sharded layout:")
+    for kind, count in counts.items():
+        print(f"  - {kind}: {count}")
+    if counts["unmatched"]:
+        print("Unmatched history logs (no summary or rule states for their file) were left in place.")
+
+def cmd_convert(args):
+    vault_root = paths.get_vault_root()
+    try:
+        codec.check_format(args.format)
+    except codec.CodecError as e:
+        print(f"Error: {e}")
+        return
+    if vault_backend.backend_name_for(vault_root) == "sqlite":
+        print("Note: the SQLite backend stores artifacts as compact JSON rows; only the JSON-layout files are converted.")
+    counts = vault_backend.convert_vault_format(args.format, vault_root, dry_run=args.dry_run)
+    verb = "Would convert" if args.dry_run else "Converted"
+    print(f"{verb} {sum(counts.values())} file(s) to {args.format}:")
+    for kind, count in counts.items():
+        print(f"  - {kind}: {count}")
+    if not args.dry_run and args.format != codec.vault_format():
+        print(f"Set QDB_VAULT_FORMAT={args.format} so new artifacts are written in the same format.")
+
 def main():
     parser = argparse.ArgumentParser(description="Dev Brain CLI")
     subparsers = parser.add_subparsers(dest="command", help="Subcommands")
@@ -196,7 +338,8 @@ def main():
     subparsers.add_parser("status", help="Show global vault status")
     
     # Rules
-    subparsers.add_parser("rules", help="Show governance rules and stats")
+    rules_parser = subparsers.add_parser("rules", help="Show governance rules and stats")
+    rules_parser.add_argument("--rebuild", action="store_true", help="Recompute the rule index from every rule-state file")
     
     # File
     file_parser = subparsers.add_parser("file", help="Show governance state for a specific file")
@@ -206,6 +349,55 @@ def main():
     frames_parser = subparsers.add_parser("frames", help="Show recent frames")
     frames_parser.add_argument("--last", type=int, default=10, help="Number of frames to show")
     
+    # History
+    history_parser = subparsers.add_parser("history", help="Show past rule-state beliefs for a file")
+    history_parser.add_argument("file_path", help="Workspace-relative path to the file")
+    history_parser.add_argument("--rule", default=None, help="Decision id to show (default: every rule)")
+    history_parser.add_argument("--at", default=None, help="Frame to reconstruct the beliefs at, e.g. frame_420 (default: latest)")
+    history_parser.add_argument("--last", type=int, default=20, help="With --rule and no --at: number of changes to list")
+
+    # Graph queries
+    graph_parser = subparsers.add_parser("graph", help="Query the causal graph")
+    graph_sub = graph_parser.add_subparsers(dest="query", required=True)
+    edge_help = "Edge type to follow (repeatable): sequence, same_file, same_rule, ... (default: all)"
+    path_parser = graph_sub.add_parser("path", help="Shortest causal path between two frames")
+    path_parser.add_argument("source")
+    path_parser.add_argument("target")
+    path_parser.add_argument("--edge-type", action="append", help=edge_help)
+    path_parser.add_argument("--max-depth", type=int, default=None, help="Give up beyond this many edges")
+    for name, help_text in (("ancestors", "Frames leading to a frame"), ("descendants", "Frames following from a frame")):
+        walk_parser = graph_sub.add_parser(name, help=help_text)
+        walk_parser.add_argument("frame_id")
+        walk_parser.add_argument("--depth", type=int, default=3, help="Maximum number of edges (default: 3, 0 for unbounded)")
+        walk_parser.add_argument("--edge-type", action="append", help=edge_help)
+        walk_parser.add_argument("--limit", type=int, default=100, help="Maximum number of frames (default: 100)")
+    touching_parser = graph_sub.add_parser("touching", help="Frames that touched a file and/or rule in a time window")
+    touching_parser.add_argument("--file", default=None, help="Changed file")
+    touching_parser.add_argument("--rule", default=None, help="Decision id among the frame's relevant decisions")
+    touching_parser.add_argument("--since", default=None, help="ISO-8601 start timestamp")
+    touching_parser.add_argument("--until", default=None, help="ISO-8601 end timestamp")
+    touching_parser.add_argument("--window", default=None, help="Window ending at the latest frame, e.g. 24h or 7d (overrides --since)")
+    touching_parser.add_argument("--limit", type=int, default=50, help="Show only the most recent N (default: 50, 0 for all)")
+
+    # Compact
+    compact_parser = subparsers.add_parser("compact", help="Compact the graph, retiring old frames into epoch nodes")
+    compact_parser.add_argument("--keep", type=int, default=None, help="Newest frames to keep (default: QDB_RETAIN_FRAMES)")
+    compact_parser.add_argument("--epoch-size", type=int, default=None, help="Frames per epoch node (default: QDB_EPOCH_FRAMES or 100)")
+    compact_parser.add_argument("--dry-run", action="store_true", help="Only report what would be retired")
+
+    # Migrate
+    subparsers.add_parser("migrate", help="Import the JSON vault into an SQLite vault")
+
+    # Layout
+    layout_parser = subparsers.add_parser("layout", help="Show the vault layout, or migrate to the sharded layout")
+    layout_parser.add_argument("--migrate", action="store_true", help="Move legacy artifacts into hash-sharded directories")
+    layout_parser.add_argument("--dry-run", action="store_true", help="With --migrate, only count what would move")
+
+    # Convert
+    convert_parser = subparsers.add_parser("convert", help="Re-encode the vault's artifacts in another format")
+    convert_parser.add_argument("format", help=f"Target format: {', '.join(codec.FORMATS)}")
+    convert_parser.add_argument("--dry-run", action="store_true", help="Only count the files that would change")
+    
     args = parser.parse_args()
     
     if args.command == "status":
@@ -216,6 +408,18 @@ def main():
         cmd_file(args)
     elif args.command == "frames":
         cmd_frames(args)
+    elif args.command == "history":
+        cmd_history(args)
+    elif args.command == "graph":
+        cmd_graph(args)
+    elif args.command == "compact":
+        cmd_compact(args)
+    elif args.command == "migrate":
+        cmd_migrate(args)
+    elif args.command == "convert":
+        cmd_convert(args)
+    elif args.command == "layout":
+        cmd_layout(args)
     else:
         parser.print_help()
 
@@ -0,0 +1,94 @@
+import os
+from typing import Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for the msgpack format
+    msgpack = None
+
+# Encodings of vault artifacts (summaries, rule states, frames, the graph
+# checkpoint and the derived indexes). QDB_VAULT_FORMAT picks the one used for
+# writes:
+# - "json" (default): indented JSON, for vaults people read and diff;
+# - "json-min": the same JSON without whitespace;
+# - "msgpack": MessagePack behind a short magic prefix (needs the msgpack package).
+# Reads detect the encoding from the content, so a vault can mix formats while it is
+# being converted and switching the setting never strands existing files. JSON is
+# validated straight from bytes with model_validate_json, skipping the json.loads
+# intermediate.
+#
+# decisions.json is edited by hand and always stays indented JSON.
+
+M = TypeVar("M", bound=BaseModel)
+
+FORMATS = ("json", "json-min", "msgpack")
+DEFAULT_FORMAT = "json"
+
+# 0xc1 is never used by MessagePack and cannot start a JSON (or UTF-8) document
+MSGPACK_MAGIC = b"\xc1QDB"
+
+
+class CodecError(ValueError):
+    """An artifact that cannot be decoded, or a format that cannot be used."""
+
+
+def check_format(name: str) -> str:
+    """Returns name if it is a usable format, raising CodecError otherwise."""
+    if name not in FORMATS:
+        raise CodecError(f"Unknown vault format: {name!r} (expected one of {', '.join(FORMATS)})")
+    if name == "msgpack" and msgpack is None:
+        raise CodecError("The msgpack vault format needs the msgpack package (pip install msgpack)")
+    return name
+
+
+def vault_format() -> str:
+    """The format new artifacts are written in (QDB_VAULT_FORMAT, default json)."""
+    return check_format(os.environ.get("QDB_VAULT_FORMAT", "").strip().lower() or DEFAULT_FORMAT)
+
+
+def index_format() -> str:
+    """
+    The format for derived indexes, which are rebuilt rather than read by people:
+    the vault format, but never indented.
+    """
+    fmt = vault_format()
+    return "json-min" if fmt == "json" else fmt
+
+
+def detect(data: bytes) -> str:
+    """'msgpack' for MessagePack artifacts, 'json' for either JSON variant."""
+    return "msgpack" if data.startswith(MSGPACK_MAGIC) else "json"
+
+
+def encode(model: BaseModel, fmt: Optional[str] = None) -> bytes:
+    """Serializes a model in fmt (default: the configured vault format)."""
+    fmt = check_format(fmt) if fmt is not None else vault_format()
+    if fmt == "json":
+        return model.model_dump_json(indent=2).encode("utf-8")
+    if fmt == "json-min":
+        return model.model_dump_json().encode("utf-8")
+    return MSGPACK_MAGIC + msgpack.packb(model.model_dump(mode="json"), use_bin_type=True)
+
+
+def decode(data: bytes, model: Type[M]) -> M:
+    """
+    Parses an artifact in any supported format. Malformed content raises a
+    ValueError (a pydantic ValidationError or a CodecError).
+    """
+    if not data.startswith(MSGPACK_MAGIC):
+        return model.model_validate_json(data)
+    if msgpack is None:
+        raise CodecError("Artifact is msgpack-encoded but the msgpack package is not installed")
+    try:
+        obj = msgpack.unpackb(data[len(MSGPACK_MAGIC):], raw=False)
+    except Exception as e:  # msgpack raises several unrelated exception types
+        raise CodecError(f"Invalid msgpack artifact: {e}") from e
+    return model.model_validate(obj)
+
+
+def reencode(data: bytes, model: Type[M], fmt: str) -> Optional[bytes]:
+    """data re-encoded in fmt, or None if it already is (byte for byte)."""
+    encoded = encode(decode(data, model), fmt)
+    return None if encoded == data else encoded
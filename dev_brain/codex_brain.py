@@ -1,10 +1,10 @@
 import json
 import hashlib
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Iterable, List, Optional
 import os
-from .models import FileSummary
-from .paths import summary_path_for
+from .models import FileSummary, LogicView
+from .vault_io import save_file_summary
 from .openai_client import get_openai_client
 
 CODEX_SYSTEM_PROMPT = """You are a static analysis engine for a codebase.
@@ -12,9 +12,16 @@ Your task is to analyze a single source file and output a compact JSON summary
 matching the FileSummary schema used by Dev Brain.
 """.strip()
 
-def build_summary_for_file(file_path: Path) -> FileSummary:
+def hash_source(content: str) -> str:
+    """Returns the content hash stored in FileSummary.hash."""
+    return f"sha256:{hashlib.sha256(content.encode('utf-8')).hexdigest()}"
+
+def build_summary_for_file(file_path: Path, client=None) -> FileSummary:
     """
     Generates a FileSummary for the given file using Codex.
+    A shared client can be passed in (e.g. by the concurrent ingest pool).
+    API errors are raised without being printed, so a caller that retries logs a
+    failure once.
     """
     try:
         content = file_path.read_text(encoding="utf-8")
@@ -22,11 +29,12 @@ def build_summary_for_file(file_path: Path) -> FileSummary:
         print(f"Error reading {file_path}: {e}")
         raise
 
-    client = get_openai_client()
+    if client is None:
+        client = get_openai_client()
     model = os.environ.get("QDB_CODEX_MODEL", "gpt-5.1")
     
     # Calculate hash
-    file_hash = f"sha256:{hashlib.sha256(content.encode('utf-8')).hexdigest()}"
+    file_hash = hash_source(content)
     
     user_prompt = f"""Analyze the following file and produce a JSON object with this structure:
 
@@ -65,49 +73,83 @@ Here is the file content:
 ```
 """
 
-    try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": CODEX_SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt},
-            ],
-            response_format={"type": "json_object"},
-        )
-        
-        json_str = response.choices[0].message.content
-        data = json.loads(json_str)
-        
-        # Ensure critical fields match
-        data["file"] = file_path.as_posix()
-        data["hash"] = file_hash
-        
-        return FileSummary(**data)
-        
-    except Exception as e:
-        print(f"Error calling Codex for {file_path}: {e}")
-        raise
+    # Errors propagate unlogged: callers may retry, and report a failure once
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": CODEX_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        response_format={"type": "json_object"},
+    )
+
+    json_str = response.choices[0].message.content
+    data = json.loads(json_str)
+
+    # Ensure critical fields match
+    data["file"] = file_path.as_posix()
+    data["hash"] = file_hash
+
+    return FileSummary(**data)
+
+def build_logic_view_for_file(file_path: Path, client=None) -> LogicView:
+    """
+    Asks Codex for the logic view only (hybrid ingest: everything else comes from
+    the static analyzer).
+    """
+    content = file_path.read_text(encoding="utf-8")
+    if client is None:
+        client = get_openai_client()
+    model = os.environ.get("QDB_CODEX_MODEL", "gpt-5.1")
+
+    user_prompt = f"""Analyze the following file and produce a JSON object with this structure:
+
+{{
+  "flow": [...],
+  "critical_branches": [...]
+}}
+
+Notes:
+- Only output valid JSON.
+- `flow` lists the main steps the file performs, in order.
+- `critical_branches` lists conditions whose handling matters for correctness or safety.
+
+Here is the file content:
+
+```python
+{content}
+```
+"""
+
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": CODEX_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        response_format={"type": "json_object"},
+    )
+    return LogicView(**json.loads(response.choices[0].message.content))
+
+def enrich_summary(summary: FileSummary, file_path: Path, client=None) -> FileSummary:
+    """Returns the (static) summary with its logic view replaced by Codex's."""
+    enriched = summary.model_copy(deep=True)
+    enriched.lenses.logic_view = build_logic_view_for_file(file_path, client=client)
+    return enriched
 
 def write_summary_to_vault(summary: FileSummary) -> Path:
     """
     Writes the summary to the vault.
     """
-    # We need a Path object for summary_path_for, but it expects a string relative to root usually.
-    # Let's assume summary.file is relative to project root.
-    target_path = summary_path_for(summary.file)
-    
-    # Ensure parent dir exists
-    target_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    with open(target_path, "w", encoding="utf-8") as f:
-        f.write(summary.model_dump_json(indent=2))
-        
-    return target_path
+    # summary.file is used as the vault key; save_file_summary also refreshes
+    # the in-process summary cache so readers never see the previous version.
+    return save_file_summary(summary)
 
-def ingest_files(file_paths: Iterable[Path]) -> None:
+def ingest_files(file_paths: Iterable[Path]) -> List[Path]:
     """
-    Ingests multiple files.
+    Ingests multiple files. Returns the files that could not be ingested.
     """
+    failed = []
     for p in file_paths:
         print(f"Ingesting {p}...")
         try:
@@ -115,4 +157,6 @@ def ingest_files(file_paths: Iterable[Path]) -> None:
             out_path = write_summary_to_vault(summary)
             print(f"  -> Written to {out_path}")
         except Exception as e:
+            failed.append(p)
             print(f"  -> Failed: {e}")
+    return failed
@@ -1,11 +1,104 @@
 from pathlib import Path
 import argparse
+import fnmatch
 import sys
-from .codex_brain import ingest_files
+import time
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from .codex_brain import ingest_files, hash_source, enrich_summary
+from .ingest_pool import ingest_files_concurrently
+from .static_analyzer import analyze_files
+from .watcher import ChangeBatch, watch, DEFAULT_DEBOUNCE_SECONDS, DEFAULT_POLL_INTERVAL
+from .git_changes import GitChange, GitError, changed_files
+from .models import FileSummary
+from . import vault_io
+
+class IngestPlan(BaseModel):
+    new: List[Path] = []
+    changed: List[Path] = []
+    unchanged: List[Path] = []
+    deleted: List[str] = []  # summary keys whose source file no longer exists
+    renamed: List[Tuple[str, str]] = []  # (old key, new key) whose summary is carried over
+
+    @property
+    def to_ingest(self) -> List[Path]:
+        return self.new + self.changed
+
+def _is_under(path: Path, root: Path) -> bool:
+    try:
+        path.relative_to(root)
+        return True
+    except ValueError:
+        return False
+
+def matches_glob(root: Path, path: Path, pattern: str) -> bool:
+    """Whether path (under root) is selected by the --glob pattern, as root.glob(pattern) would."""
+    try:
+        rel = path.relative_to(root).as_posix()
+    except ValueError:
+        return False
+    if ".dev_brain" in path.parts:
+        return False
+    return fnmatch.fnmatch(rel, pattern) or (pattern.startswith("**/") and fnmatch.fnmatch(rel, pattern[3:]))
+
+def scan_files(root: Path, pattern: str) -> List[Path]:
+    return [p for p in root.glob(pattern) if p.is_file() and ".dev_brain" not in p.parts]
+
+def _classify(plan: IngestPlan, p: Path, summary: Optional[FileSummary], force: bool) -> None:
+    if summary is None:
+        plan.new.append(p)
+        return
+    try:
+        current_hash = hash_source(p.read_text(encoding="utf-8"))
+    except (OSError, UnicodeDecodeError):
+        # Let the ingest step report the unreadable file
+        plan.changed.append(p)
+        return
+    if force or summary.hash != current_hash:
+        plan.changed.append(p)
+    else:
+        plan.unchanged.append(p)
+
+def plan_ingest(root: Path, file_paths: List[Path], force: bool = False, scan_deleted: bool = True) -> IngestPlan:
+    """
+    Compares each file's source hash with the hash stored in its summary.
+    Files whose summary is up to date are skipped unless force is set.
+    Summaries under root whose source file was deleted are listed for pruning
+    (a scan of every summary, skipped with scan_deleted=False).
+    """
+    plan = IngestPlan()
+    for p in file_paths:
+        _classify(plan, p, vault_io.load_file_summary(p.as_posix()), force)
+
+    if not scan_deleted:
+        return plan
+    for summary in vault_io.iter_file_summaries():
+        source = Path(summary.file)
+        if not source.is_absolute():
+            source = root / source
+        if _is_under(source, root) and not source.exists():
+            plan.deleted.append(summary.file)
+    return plan
+
+def ingest_static(file_paths: List[Path], processes: Optional[int] = None) -> Dict[Path, FileSummary]:
+    """
+    Summarizes files with the local static analyzer across a process pool and writes
+    the summaries. Returns the summaries by path; files that failed are reported and left out.
+    """
+    start = time.monotonic()
+    summaries: Dict[Path, FileSummary] = {}
+    for result in analyze_files(file_paths, processes=processes):
+        if result.summary is None:
+            print(f"  -> Failed {result.path}: {result.error}")
+            continue
+        vault_io.save_file_summary(result.summary)
+        summaries[result.path] = result.summary
+    print(f"Static analysis: {len(summaries)}/{len(file_paths)} file(s) in {time.monotonic() - start:.2f}s")
+    return summaries
 
 def main() -> None:
     parser = argparse.ArgumentParser(
-        description="Ingest code files with Codex and populate .dev_brain/summaries"
+        description="Ingest code files with Codex (or the local static analyzer) and populate .dev_brain/summaries"
     )
     parser.add_argument(
         "--root",
@@ -19,22 +112,225 @@ def main() -> None:
         default="**/*.py",
         help="Glob pattern relative to root to select files (default: '**/*.py')",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-ingest every file, even if its summary hash matches the source",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report what would be ingested and pruned",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["llm", "static", "hybrid"],
+        default="llm",
+        help="llm: Codex only (default); static: local AST analysis only, no network; "
+             "hybrid: static analysis, then Codex fills in the logic view",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Processes for static analysis (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of concurrent LLM requests (default: 1, sequential)",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=None,
+        help="Maximum requests per minute when ingesting concurrently",
+    )
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        default=None,
+        help="Maximum (estimated) tokens per minute when ingesting concurrently",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=5,
+        help="Retries with exponential backoff on 429/5xx responses (default: 5)",
+    )
+    changes = parser.add_mutually_exclusive_group()
+    changes.add_argument(
+        "--since",
+        metavar="REF",
+        default=None,
+        help="Only ingest files git reports as changed between REF and the working tree (plus untracked files)",
+    )
+    changes.add_argument(
+        "--staged",
+        action="store_true",
+        help="Only ingest files staged for the next commit (for pre-commit hooks)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After ingesting, keep watching root and re-ingest changed files as they are saved",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE_SECONDS,
+        help=f"Seconds of quiet before a burst of saves is re-ingested (default: {DEFAULT_DEBOUNCE_SECONDS})",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Watch by polling even where inotify is available",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f"Minimum seconds between polling sweeps (default: {DEFAULT_POLL_INTERVAL})",
+    )
     args = parser.parse_args()
 
     root = Path(args.root).resolve()
     pattern = args.glob
 
-    # Exclude .dev_brain and other common excludes if needed, but glob usually handles it if careful
-    # For now, just simple glob
-    file_paths = [p for p in root.glob(pattern) if p.is_file() and ".dev_brain" not in p.parts]
+    if args.since or args.staged:
+        try:
+            changes = changed_files(root, since=args.since, staged=args.staged)
+        except GitError as e:
+            print(f"Error reading git changes: {e}")
+            sys.exit(1)
+        print(f">>> Codex Ingest – root={root}, git changes={len(changes)} "
+              f"({'staged' if args.staged else f'since {args.since}'})")
+        plan = plan_git_changes(root, pattern, changes, force=args.force)
+    else:
+        file_paths = scan_files(root, pattern)
+        print(f">>> Codex Ingest – root={root}, files={len(file_paths)}")
+        plan = plan_ingest(root, file_paths, force=args.force)
+    print(f"New: {len(plan.new)} | Changed: {len(plan.changed)} | "
+          f"Unchanged (skipped): {len(plan.unchanged)} | Deleted: {len(plan.deleted)} | Renamed: {len(plan.renamed)}")
+
+    if args.dry_run:
+        for old_key, new_key in plan.renamed:
+            print(f"  > {old_key} -> {new_key}")
+        for p in plan.new:
+            print(f"  + {p}")
+        for p in plan.changed:
+            print(f"  ~ {p}")
+        for file_key in plan.deleted:
+            print(f"  - {file_key}")
+        return
+
+    apply_plan(plan, args)
+
+    if args.watch:
+        print(f">>> Watching {root} (Ctrl+C to stop)")
+        try:
+            watch(
+                root,
+                lambda batch: apply_plan(plan_changes(root, pattern, batch), args),
+                debounce=args.debounce,
+                force_polling=args.poll,
+                poll_interval=args.poll_interval,
+            )
+        except KeyboardInterrupt:
+            pass
+
+def plan_changes(root: Path, pattern: str, batch: ChangeBatch) -> IngestPlan:
+    """Plans the re-ingest of one watcher batch: only the changed files are hashed."""
+    if batch.rescan:
+        return plan_ingest(root, scan_files(root, pattern))
+    changed = [p for p in batch.changed if p.is_file() and matches_glob(root, p, pattern)]
+    plan = plan_ingest(root, changed, scan_deleted=False)
+    plan.deleted = [p.as_posix() for p in batch.deleted if matches_glob(root, p, pattern)]
+    if batch.deleted_dirs:
+        for summary in vault_io.iter_file_summaries():
+            source = Path(summary.file)
+            if any(_is_under(source, d) for d in batch.deleted_dirs) and not source.exists():
+                plan.deleted.append(summary.file)
+    return plan
+
+def plan_git_changes(root: Path, pattern: str, changes: List[GitChange], force: bool = False) -> IngestPlan:
+    """
+    Plans an ingest from a git diff. Only the changed files are read. A renamed file
+    takes over its old summary, and is only re-ingested if its content changed too.
+    """
+    plan = IngestPlan()
+    for change in changes:
+        if change.status == "D":
+            if matches_glob(root, change.path, pattern):
+                plan.deleted.append(change.path.as_posix())
+            continue
+        if change.status == "R" and matches_glob(root, change.old_path, pattern):
+            old_summary = vault_io.load_file_summary(change.old_path.as_posix())
+            if old_summary is not None and matches_glob(root, change.path, pattern):
+                plan.renamed.append((change.old_path.as_posix(), change.path.as_posix()))
+                _classify(plan, change.path, old_summary, force)
+                continue
+            plan.deleted.append(change.old_path.as_posix())
+        if change.path.is_file() and matches_glob(root, change.path, pattern):
+            _classify(plan, change.path, vault_io.load_file_summary(change.path.as_posix()), force)
+    return plan
+
+def carry_over_summary(old_key: str, new_key: str) -> bool:
+    """Moves a summary to a renamed file's key. Returns False if there was none."""
+    summary = vault_io.load_file_summary(old_key)
+    if summary is None:
+        return False
+    vault_io.save_file_summary(summary.model_copy(update={"file": new_key}))
+    vault_io.delete_file_summary(old_key)
+    return True
+
+def apply_plan(plan: IngestPlan, args) -> None:
+    """Carries over renamed summaries, prunes deleted files' summaries and ingests new/changed files with the selected engine."""
+    for old_key, new_key in plan.renamed:
+        if carry_over_summary(old_key, new_key):
+            print(f"Carried over summary {old_key} -> {new_key}")
+
+    pruned = 0
+    for file_key in plan.deleted:
+        if vault_io.delete_file_summary(file_key):
+            pruned += 1
+            print(f"Pruned summary for deleted file {file_key}")
 
-    print(f">>> Codex Ingest – root={root}, files={len(file_paths)}")
-    
-    if not file_paths:
-        print("No files found.")
+    if not plan.to_ingest:
+        print("Nothing to ingest.")
         return
 
-    ingest_files(file_paths)
+    if args.engine in ("static", "hybrid"):
+        summaries = ingest_static(plan.to_ingest, processes=args.processes)
+        # A failed enrichment keeps the static summary, so only static failures count
+        failed = {str(p) for p in plan.to_ingest if p not in summaries}
+        if args.engine == "hybrid" and summaries:
+            report = ingest_files_concurrently(
+                list(summaries),
+                workers=args.workers,
+                requests_per_minute=args.rpm,
+                tokens_per_minute=args.tpm,
+                max_retries=args.max_retries,
+                build=lambda path, client: enrich_summary(summaries[path], path, client=client),
+            )
+            if report.failed:
+                print(f"Logic view enrichment failed for {len(report.failed)} file(s); static summaries kept")
+    elif args.workers > 1 or args.rpm or args.tpm:
+        report = ingest_files_concurrently(
+            plan.to_ingest,
+            workers=args.workers,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+            max_retries=args.max_retries,
+        )
+        failed = set(report.failed)
+    else:
+        failed = {str(p) for p in ingest_files(plan.to_ingest)}
+    refreshed = sum(1 for p in plan.changed if str(p) not in failed)
+    new = sum(1 for p in plan.new if str(p) not in failed)
+    print(f"Done: skipped={len(plan.unchanged)}, refreshed={refreshed}, new={new}, "
+          f"failed={len(failed)}, pruned={pruned}")
 
 if __name__ == "__main__":
     main()
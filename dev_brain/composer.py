@@ -1,52 +1,133 @@
 import os
 from pathlib import Path
-from .vault_io import load_decisions, load_file_summary, load_rule_states
+from typing import List, NamedTuple, Optional
+from .models import Decision, FileSummary, RuleStatesForFile
+from .vault_io import load_decisions, load_file_summary, load_rule_states, lookup_symbols, summary_digest, symbols_version
 from .governance import build_governance_state_block
+from .telemetry import timed
+from .symbol_index import ResolvedDependency, resolve_dependencies
+from .context_lens import SourceSlice, slice_source, token_budget_from_env
+from .tokens import estimate_tokens
+from .retention import half_lives, decay_rule_states
+from .graph_manager import current_frame_number
+from .prompt_cache import prompt_cache, source_digest, decisions_digest, rule_state_version, summary_version
 
-def generate_prompt(user_request: str, target_file: str) -> str:
+DEFAULT_DEPENDENCY_DEPTH = 1
+
+def _dependency_depth_from_env() -> int:
+    try:
+        return int(os.environ.get("QDB_DEPENDENCY_DEPTH", DEFAULT_DEPENDENCY_DEPTH))
+    except ValueError:
+        return DEFAULT_DEPENDENCY_DEPTH
+
+class PromptResult(NamedTuple):
+    prompt: str
+    # Estimated tokens removed from the target source by token-budget slicing
+    tokens_saved: int = 0
+
+def generate_prompt(
+    user_request: str,
+    target_file: str,
+    dependency_depth: Optional[int] = None,
+    token_budget: Optional[int] = None,
+) -> str:
     """
     Generates a governance-aware prompt for the coding LLM.
     """
-    
+    return generate_prompt_result(user_request, target_file, dependency_depth, token_budget).prompt
+
+def generate_prompt_result(
+    user_request: str,
+    target_file: str,
+    dependency_depth: Optional[int] = None,
+    token_budget: Optional[int] = None,
+) -> PromptResult:
+    """
+    Like generate_prompt, also reporting how many tokens slicing saved.
+    """
+    with timed("composer.generate_prompt"):
+        # Load knowledge from the vault
+        with timed("composer.load_vault"):
+            decisions = load_decisions()
+            rule_states = load_rule_states(target_file)
+            file_summary = load_file_summary(target_file)
+        return build_prompt(
+            user_request=user_request,
+            target_file=target_file,
+            decisions=decisions,
+            rule_states=rule_states,
+            file_summary=file_summary,
+            dependency_depth=dependency_depth,
+            token_budget=token_budget,
+        )
+
+def build_prompt(
+    user_request: str,
+    target_file: str,
+    decisions: List[Decision],
+    rule_states: Optional[RuleStatesForFile],
+    file_summary: Optional[FileSummary],
+    dependency_depth: Optional[int] = None,
+    token_budget: Optional[int] = None,
+    current_frame: Optional[int] = None,
+) -> PromptResult:
+    """
+    Builds the prompt from already-loaded knowledge.
+    Stored beliefs are faded to current_frame (default: the latest frame; see retention),
+    so rule_states must be as stored, not already decayed.
+    Dependencies are inlined up to dependency_depth levels (QDB_DEPENDENCY_DEPTH, default 1).
+    With a token_budget (QDB_CONTEXT_TOKEN_BUDGET, default 0 = off) a target source
+    larger than the budget is sliced to the parts relevant to the request (see context_lens).
+    Everything above the user request is memoized per version of the target source,
+    decisions, rule states, summary and symbol index (see prompt_cache); a hit skips
+    slicing and dependency resolution.
+    """
+    if current_frame is None:
+        current_frame = current_frame_number()
+    rule_states = decay_rule_states(rule_states, half_lives(decisions), current_frame)
+
     # 1. Read target file source code
-    try:
-        with open(target_file, 'r', encoding='utf-8') as f:
-            target_source = f.read()
-    except FileNotFoundError:
-        target_source = "(File not found, assuming new file creation)"
-    
-    # 2. Load knowledge
-    file_summary = load_file_summary(target_file)
-    decisions = load_decisions()
-    rule_states = load_rule_states(target_file)
-    
-    # 3. Build Governance Block
-    governance_block = build_governance_state_block(target_file, decisions, rule_states)
-    
-    # 4. Build Dependency View (Interface View)
-    dependency_block = ""
-    if file_summary and file_summary.lenses.interface_view:
-        deps = file_summary.lenses.interface_view.dependencies
-        if deps:
-            dependency_block = "\n[DEPENDENCIES] Interface Views:\n"
-            for dep in deps:
-                # In a real system, we'd resolve the file path for the dependency class
-                # For MVP, we'll just list the dependency name
-                dependency_block += f"- {dep} (Interface details would be loaded here)\n"
-    
-    # 5. Assemble Prompt
-    prompt = f"""SYSTEM:
-Role: "You are Nexus, a Senior Architect assistant. You act as a gatekeeper for code quality and architectural consistency."
+    with timed("composer.read_source"):
+        try:
+            with open(target_file, 'r', encoding='utf-8') as f:
+                target_source = f.read()
+        except FileNotFoundError:
+            target_source = "(File not found, assuming new file creation)"
 
-KNOWLEDGE GRAPH (Context Lensing Active):
+    budget = token_budget_from_env() if token_budget is None else token_budget
+    interface = file_summary.lenses.interface_view if file_summary else None
+    has_dependencies = bool(interface and interface.dependencies)
+    depth = _dependency_depth_from_env() if dependency_depth is None else dependency_depth
 
-[TARGET] {target_file} with full source code:
-```python
-{target_source}
-```
+    def render():
+        with timed("composer.slice_source"):
+            logic_view = file_summary.lenses.logic_view if file_summary else None
+            source_slice = slice_source(target_source, user_request, logic_view, budget)
 
-{dependency_block}
-{governance_block}
+        with timed("composer.resolve_dependencies"):
+            dependencies: List[ResolvedDependency] = []
+            if has_dependencies:
+                dependencies = resolve_dependencies(lookup_symbols, interface.dependencies, depth, exclude=target_file)
+
+        context = _render_context(target_file, source_slice, dependencies, decisions, rule_states, file_summary)
+        return context, source_slice.tokens_saved
+
+    with timed("composer.render_context"):
+        key = (
+            target_file,
+            source_digest(target_source),
+            budget,
+            # The request only shapes the context when the source has to be sliced
+            user_request if 0 < budget < estimate_tokens(target_source) else None,
+            decisions_digest(decisions),
+            rule_state_version(rule_states),
+            summary_version(file_summary, summary_digest(target_file, file_summary) if file_summary else None),
+            (depth, symbols_version()) if has_dependencies else None,
+        )
+        context, tokens_saved = prompt_cache.get_or_render(key, render)
+
+    # 4. Assemble Prompt
+    prompt = f"""{context}
 
 USER REQUEST:
 {user_request}
@@ -57,4 +138,56 @@ INSTRUCTIONS:
 3. Prefer changes that increase the "compliant" probability for critical rules.
 4. If you propose multiple refactorings, annotate which option best reduces overall risk.
 """
-    return prompt
+    return PromptResult(prompt, tokens_saved)
+
+def _render_dependency(dep: ResolvedDependency) -> str:
+    via = f" (via {dep.via})" if dep.via else ""
+    if dep.file is None:
+        return f"- {dep.symbol}{via}: not found in the vault\n"
+    lines = [f"- {dep.symbol} -> {dep.file}{via}"]
+    if dep.interface.classes:
+        lines.append(f"  - Classes: {', '.join(dep.interface.classes)}")
+    if dep.interface.public_methods:
+        lines.append(f"  - Public methods: {', '.join(dep.interface.public_methods)}")
+    if dep.interface.dependencies:
+        lines.append(f"  - Depends on: {', '.join(dep.interface.dependencies)}")
+    return "\n".join(lines) + "\n"
+
+def _render_context(
+    target_file: str,
+    source_slice: SourceSlice,
+    dependencies: List[ResolvedDependency],
+    decisions: List[Decision],
+    rule_states: Optional[RuleStatesForFile],
+    file_summary: Optional[FileSummary],
+) -> str:
+    # 2. Build Governance Block
+    governance_block = build_governance_state_block(target_file, decisions, rule_states, file_summary)
+    
+    # 3. Build Dependency View (Interface View of each resolved dependency)
+    dependency_block = ""
+    if dependencies:
+        dependency_block = "\n[DEPENDENCIES] Interface Views:\n"
+        for dep in dependencies:
+            dependency_block += _render_dependency(dep)
+
+    if source_slice.sliced:
+        target_header = (
+            f"[TARGET] {target_file} sliced to ~{source_slice.tokens} of {source_slice.full_tokens} tokens "
+            f"(bodies marked '...' are elided):"
+        )
+    else:
+        target_header = f"[TARGET] {target_file} with full source code:"
+
+    return f"""SYSTEM:
+Role: "You are Nexus, a Senior Architect assistant. You act as a gatekeeper for code quality and architectural consistency."
+
+KNOWLEDGE GRAPH (Context Lensing Active):
+
+{target_header}
+```python
+{source_slice.text}
+```
+
+{dependency_block}
+{governance_block}"""
@@ -0,0 +1,159 @@
+import ast
+import os
+import re
+from typing import Iterable, List, NamedTuple, Optional, Set
+
+from .models import LogicView
+from .tokens import estimate_tokens, CHARS_PER_TOKEN
+
+# Token-budgeted view of the target source for the composer. When the file does not
+# fit the budget, every function and method is first reduced to its signature; then
+# the ones most relevant to the user request and the summary's logic_view are
+# restored in full, highest score first, while the budget allows. Module- and
+# class-level statements (imports, constants, class headers) are always kept.
+#
+# QDB_CONTEXT_TOKEN_BUDGET sets the default budget in tokens; 0 (the default)
+# embeds the whole file as before.
+
+DEFAULT_TOKEN_BUDGET = 0
+# Name matches count more than words merely used in the body
+NAME_WEIGHT = 3
+
+
+def token_budget_from_env() -> int:
+    try:
+        return int(os.environ.get("QDB_CONTEXT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+    except ValueError:
+        return DEFAULT_TOKEN_BUDGET
+
+
+class SourceSlice(NamedTuple):
+    text: str
+    tokens: int
+    full_tokens: int
+    # Qualified names of the functions kept in full (None when the file was not sliced)
+    included: Optional[List[str]]
+
+    @property
+    def sliced(self) -> bool:
+        return self.included is not None
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.full_tokens - self.tokens)
+
+
+class _Unit(NamedTuple):
+    name: str
+    order: int
+    body_start: int  # first line of the body (1-based)
+    end: int         # last line of the body
+    indent: str
+    words: Set[str]
+    name_words: Set[str]
+
+
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_WORD_RE = re.compile(r"[A-Za-z][a-z0-9]*|[A-Z]+(?![a-z])")
+
+
+def words_of(text: str) -> Set[str]:
+    """Lowercased identifiers of text plus their parts split on underscores and camelCase."""
+    words = set()
+    for identifier in _IDENTIFIER_RE.findall(text):
+        words.add(identifier.lower())
+        words.update(w.lower() for w in _WORD_RE.findall(identifier))
+    return {w for w in words if len(w) >= 3}
+
+
+def query_words(user_request: str, logic_view: Optional[LogicView] = None) -> Set[str]:
+    parts = [user_request]
+    if logic_view is not None:
+        parts.extend(logic_view.flow)
+        parts.extend(logic_view.critical_branches)
+    return words_of(" ".join(parts))
+
+
+def _first_line(node: ast.stmt) -> int:
+    return min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+
+
+def _collect_units(body: Iterable[ast.stmt], lines: List[str], prefix: str, units: List[_Unit]) -> None:
+    for node in body:
+        if isinstance(node, ast.ClassDef):
+            _collect_units(node.body, lines, f"{prefix}{node.name}.", units)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            body_start = _first_line(node.body[0])
+            first = lines[body_start - 1]
+            if body_start <= node.lineno or node.body[0].col_offset != len(first) - len(first.lstrip()):
+                continue  # body shares a line with the header, nothing to elide
+            text = "\n".join(lines[body_start - 1:node.end_lineno])
+            units.append(_Unit(
+                name=prefix + node.name,
+                order=len(units),
+                body_start=body_start,
+                end=node.end_lineno,
+                indent=first[:len(first) - len(first.lstrip())],
+                words=words_of(text),
+                name_words=words_of(node.name),
+            ))
+
+
+def _render(lines: List[str], elided: List[_Unit]) -> str:
+    out: List[str] = []
+    cursor = 0
+    for unit in sorted(elided, key=lambda u: u.body_start):
+        out.extend(lines[cursor:unit.body_start - 1])
+        out.append(f"{unit.indent}...  # {unit.end - unit.body_start + 1} lines elided")
+        cursor = unit.end
+    out.extend(lines[cursor:])
+    return "\n".join(out)
+
+
+def slice_source(
+    source: str,
+    user_request: str,
+    logic_view: Optional[LogicView] = None,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+) -> SourceSlice:
+    """
+    Returns the source unchanged if it fits token_budget (or the budget is 0, or the
+    source does not parse), otherwise the sliced view described above. The signature
+    skeleton is returned even if it alone exceeds the budget.
+    """
+    full_tokens = estimate_tokens(source)
+    if token_budget <= 0 or full_tokens <= token_budget:
+        return SourceSlice(source, full_tokens, full_tokens, None)
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return SourceSlice(source, full_tokens, full_tokens, None)
+
+    lines = source.split("\n")
+    units: List[_Unit] = []
+    _collect_units(tree.body, lines, "", units)
+    if not units:
+        return SourceSlice(source, full_tokens, full_tokens, None)
+
+    # 1. Score units against the request and the logic view
+    query = query_words(user_request, logic_view)
+    def score(unit: _Unit) -> int:
+        return NAME_WEIGHT * len(unit.name_words & query) + len(unit.words & query)
+    ranked = sorted(units, key=lambda u: (-score(u), u.order))
+
+    # 2. Start from the skeleton and restore bodies greedily within the budget
+    elided = {u.order: u for u in units}
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    size = len(_render(lines, list(elided.values())))
+    included = []
+    for unit in ranked:
+        body_chars = sum(len(line) + 1 for line in lines[unit.body_start - 1:unit.end])
+        placeholder_chars = len(f"{unit.indent}...  # {unit.end - unit.body_start + 1} lines elided") + 1
+        delta = body_chars - placeholder_chars
+        if size + delta <= budget_chars:
+            size += delta
+            del elided[unit.order]
+            included.append(unit.name)
+
+    text = _render(lines, list(elided.values()))
+    return SourceSlice(text, estimate_tokens(text), full_tokens, included)
@@ -0,0 +1,87 @@
+import subprocess
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+# Asks local git which files changed, so ingest work is proportional to the diff
+# instead of the size of the tree.
+
+
+class GitError(RuntimeError):
+    pass
+
+
+class GitChange(NamedTuple):
+    # 'A' (added or untracked), 'M' (modified), 'D' (deleted) or 'R' (renamed)
+    status: str
+    path: Path
+    old_path: Optional[Path] = None
+
+
+def _git(cwd: Path, *args: str) -> str:
+    try:
+        result = subprocess.run(
+            ["git", *args], cwd=str(cwd), capture_output=True, text=True, encoding="utf-8", check=False
+        )
+    except FileNotFoundError:
+        raise GitError("git executable not found")
+    if result.returncode != 0:
+        raise GitError(result.stderr.strip() or f"git {' '.join(args)} failed")
+    return result.stdout
+
+
+def repo_toplevel(root: Path) -> Path:
+    return Path(_git(root, "rev-parse", "--show-toplevel").strip()).resolve()
+
+
+def parse_name_status(output: str, toplevel: Path) -> List[GitChange]:
+    """Parses `git diff --name-status -z` output (paths relative to toplevel)."""
+    tokens = output.split("\0")
+    changes = []
+    i = 0
+    while i < len(tokens) and tokens[i]:
+        code = tokens[i][0]
+        if code in "RC":
+            old, new = tokens[i + 1], tokens[i + 2]
+            i += 3
+            if code == "R":
+                changes.append(GitChange("R", toplevel / new, toplevel / old))
+            else:
+                changes.append(GitChange("A", toplevel / new))
+            continue
+        path = toplevel / tokens[i + 1]
+        i += 2
+        if code == "D":
+            changes.append(GitChange("D", path))
+        elif code == "A":
+            changes.append(GitChange("A", path))
+        else:  # M, T (type change), U (unmerged)
+            changes.append(GitChange("M", path))
+    return changes
+
+
+def changed_files(root: Path, since: Optional[str] = None, staged: bool = False) -> List[GitChange]:
+    """
+    Files changed in the repository containing root, with renames detected:
+    - staged: what is staged for the next commit (index vs HEAD);
+    - since: everything that differs between `since` and the working tree,
+      plus untracked files that are not ignored.
+    Paths are absolute; callers filter them to the part of the tree they ingest.
+    """
+    if staged == (since is not None):
+        raise ValueError("pass exactly one of since or staged")
+    toplevel = repo_toplevel(root)
+    if staged:
+        output = _git(toplevel, "diff", "--cached", "--name-status", "-z", "-M")
+        return parse_name_status(output, toplevel)
+
+    # Resolve since to a commit first so a value like "--output=..." is never read
+    # as an option by git diff
+    try:
+        commit = _git(toplevel, "rev-parse", "--verify", "--quiet", "--end-of-options", f"{since}^{{commit}}").strip()
+    except GitError:
+        raise GitError(f"not a commit: {since}")
+    output = _git(toplevel, "diff", "--name-status", "-z", "-M", commit, "--")
+    changes = parse_name_status(output, toplevel)
+    untracked = _git(toplevel, "ls-files", "--others", "--exclude-standard", "-z")
+    changes.extend(GitChange("A", toplevel / p) for p in untracked.split("\0") if p)
+    return changes
@@ -1,53 +1,53 @@
 from typing import List, Optional
-from .models import Decision, RuleStatesForFile
+from .models import Decision, FileSummary, RuleStatesForFile
+from .relevance import get_relevance_index
+from .metrics import rounded_belief
+
+def _is_elevated(rs) -> bool:
+    # Same cut-off the frame builder uses to flag suspected violations
+    sb = rs.state_belief
+    return sb.at_risk > 0.4 or sb.violating > 0.2
 
 def select_relevant_decisions(
     file_path: str,
     decisions: List[Decision],
-    rule_states: Optional[RuleStatesForFile]
+    rule_states: Optional[RuleStatesForFile],
+    file_summary: Optional[FileSummary] = None,
 ) -> List[Decision]:
     """
-    Selects relevant decisions for a given file based on tags and rule states.
-    For this MVP, we'll return all decisions that are either:
-    1. Global (scope_layer='architecture' or similar) - simplified logic for MVP
-    2. Specifically mentioned in rule_states with high risk/violation.
+    Selects relevant decisions for a given file based on tags and rule states:
+    1. Decisions applicable to the file (see relevance): global ones (global scope
+       layers or high amplitude) plus those matching the file's governance tags.
+       Without a summary only the global decisions apply.
+    2. Decisions tracked in the file's rule states with high risk/violation.
     """
-    relevant = []
-    
-    # Simple logic: if we have rule states, include decisions mentioned there
-    # Also include high amplitude decisions generally (mock logic for "relevant")
-    
-    relevant_ids = set()
+    applicable = set(get_relevance_index(decisions).positions_for_file(file_summary))
+
+    elevated_ids = set()
     if rule_states:
         for rs in rule_states.rule_states:
-            # If it's tracked, it's relevant
-            relevant_ids.add(rs.rule_id)
-            
-    for d in decisions:
-        if d.id in relevant_ids:
-            relevant.append(d)
-        elif d.amplitude > 0.8: # Arbitrary threshold for "important global rules"
-             relevant.append(d)
-             
-    # Deduplicate
-    unique_relevant = []
+            if _is_elevated(rs):
+                elevated_ids.add(rs.rule_id)
+
+    relevant = []
     seen = set()
-    for d in relevant:
-        if d.id not in seen:
-            unique_relevant.append(d)
+    for i, d in enumerate(decisions):
+        if (i in applicable or d.id in elevated_ids) and d.id not in seen:
+            relevant.append(d)
             seen.add(d.id)
-            
-    return unique_relevant
+
+    return relevant
 
 def build_governance_state_block(
     file_path: str,
     decisions: List[Decision],
-    rule_states: Optional[RuleStatesForFile]
+    rule_states: Optional[RuleStatesForFile],
+    file_summary: Optional[FileSummary] = None,
 ) -> str:
     """
     Formats the governance state block string.
     """
-    relevant_decisions = select_relevant_decisions(file_path, decisions, rule_states)
+    relevant_decisions = select_relevant_decisions(file_path, decisions, rule_states, file_summary)
     
     if not relevant_decisions:
         return "GOVERNANCE STATE (DevBrain-style):\n(No active governance rules found for this context)"
@@ -66,7 +66,7 @@ def build_governance_state_block(
         
         if d.id in rs_map:
             rs = rs_map[d.id]
-            sb = rs.state_belief
+            sb = rounded_belief(rs.state_belief)
             lines.append(f"  - {Path(file_path).name} -> compliant: {sb.compliant}, at_risk: {sb.at_risk}, violating: {sb.violating}")
             if rs.entangled_with:
                 entangled = ", ".join(rs.entangled_with)
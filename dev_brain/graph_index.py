@@ -0,0 +1,219 @@
+import bisect
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+from .models import Graph, FrameSnapshot, GraphEdge, EpochNode
+
+EdgeKey = Tuple[str, str, str]
+
+class IndexedGraph:
+    """
+    In-memory causal graph with hash and adjacency indexes.
+
+    Frames are indexed by frame_id and by (timestamp, insertion order); edges by
+    (from_frame_id, to_frame_id, type) with adjacency lists in both directions.
+    Secondary indexes list, per changed file and per relevant decision, the frames
+    that touched it in time order.
+    Insertion is constant time (amortized, for frames arriving in time order).
+    The pydantic Graph model is only used to load and save.
+    """
+
+    def __init__(self):
+        self._frames: Dict[str, FrameSnapshot] = {}
+        self._edges: Dict[EdgeKey, GraphEdge] = {}
+        self._out: Dict[str, List[GraphEdge]] = {}
+        self._in: Dict[str, List[GraphEdge]] = {}
+        self._by_time: List[Tuple[str, int, str]] = []
+        self._time_keys: Dict[str, Tuple[str, int, str]] = {}
+        self._by_file: Dict[str, List[Tuple[str, int, str]]] = {}
+        self._by_rule: Dict[str, List[Tuple[str, int, str]]] = {}
+        self._seq = 0
+        # Retired frames, summarized (see retention); their ids are edge endpoints too
+        self.epochs: List[EpochNode] = []
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> "IndexedGraph":
+        indexed = cls()
+        indexed.epochs = list(graph.epochs)
+        for frame in graph.frames:
+            indexed.add_frame(frame)
+        for edge in graph.edges:
+            indexed.add_graph_edge(edge)
+        return indexed
+
+    def to_graph(self) -> Graph:
+        """Returns the serializable Graph, frames and edges in insertion order."""
+        return Graph(frames=list(self._frames.values()), edges=list(self._edges.values()), epochs=list(self.epochs))
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def total_frames(self) -> int:
+        """Live frames plus the frames folded into epochs."""
+        return len(self._frames) + sum(e.frame_count for e in self.epochs)
+
+    def __contains__(self, frame_id: str) -> bool:
+        return frame_id in self._frames
+
+    @property
+    def frames(self) -> List[FrameSnapshot]:
+        return list(self._frames.values())
+
+    @property
+    def edges(self) -> List[GraphEdge]:
+        return list(self._edges.values())
+
+    def get_frame(self, frame_id: str) -> Optional[FrameSnapshot]:
+        return self._frames.get(frame_id)
+
+    def add_frame(self, frame: FrameSnapshot) -> bool:
+        """Adds a frame node. Returns False if the frame_id is already present."""
+        if frame.frame_id in self._frames:
+            return False
+        self._frames[frame.frame_id] = frame
+        self._seq += 1
+        key = (frame.timestamp, self._seq, frame.frame_id)
+        self._time_keys[frame.frame_id] = key
+        bisect.insort(self._by_time, key)
+        for file_path in set(frame.changed_files):
+            bisect.insort(self._by_file.setdefault(file_path, []), key)
+        for rule_id in set(frame.relevant_decisions):
+            bisect.insort(self._by_rule.setdefault(rule_id, []), key)
+        return True
+
+    def has_edge(self, from_frame_id: str, to_frame_id: str, edge_type: str) -> bool:
+        return (from_frame_id, to_frame_id, edge_type) in self._edges
+
+    def add_edge(
+        self,
+        from_frame_id: str,
+        to_frame_id: str,
+        edge_type: str,
+        weight: float = 1.0,
+    ) -> bool:
+        """Adds an edge between two frames. Returns False if it already exists."""
+        return self.add_graph_edge(GraphEdge(
+            from_frame_id=from_frame_id,
+            to_frame_id=to_frame_id,
+            type=edge_type,
+            weight=weight
+        ))
+
+    def add_graph_edge(self, edge: GraphEdge) -> bool:
+        key = (edge.from_frame_id, edge.to_frame_id, edge.type)
+        if key in self._edges:
+            return False
+        self._edges[key] = edge
+        self._out.setdefault(edge.from_frame_id, []).append(edge)
+        self._in.setdefault(edge.to_frame_id, []).append(edge)
+        return True
+
+    def last_added_frame(self) -> Optional[FrameSnapshot]:
+        """The frame inserted last, i.e. the last one appended to the stored graph."""
+        if not self._frames:
+            return None
+        return self._frames[next(reversed(self._frames))]
+
+    def latest_frame(self) -> Optional[FrameSnapshot]:
+        """The most recent frame by timestamp (ties go to the last inserted)."""
+        if not self._by_time:
+            return None
+        return self._frames[self._by_time[-1][2]]
+
+    def iter_by_time(self, reverse: bool = False) -> Iterator[FrameSnapshot]:
+        entries = reversed(self._by_time) if reverse else iter(self._by_time)
+        for _, _, frame_id in entries:
+            yield self._frames[frame_id]
+
+    def frames_between(self, start: Optional[str] = None, end: Optional[str] = None) -> List[FrameSnapshot]:
+        """Frames with start <= timestamp <= end (ISO-8601 strings), in time order."""
+        lo = 0 if start is None else bisect.bisect_left(self._by_time, (start,))
+        hi = len(self._by_time) if end is None else bisect.bisect_right(self._by_time, (end, float("inf")))
+        return [self._frames[entry[2]] for entry in self._by_time[lo:hi]]
+
+    def frames_for_file(self, file_path: str, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """IDs of frames that changed file_path with start <= timestamp <= end, in time order."""
+        return self._window(self._by_file.get(file_path, []), start, end)
+
+    def frames_for_rule(self, rule_id: str, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """IDs of frames that evaluated rule_id with start <= timestamp <= end, in time order."""
+        return self._window(self._by_rule.get(rule_id, []), start, end)
+
+    @staticmethod
+    def _window(entries: List[Tuple[str, int, str]], start: Optional[str], end: Optional[str]) -> List[str]:
+        lo = 0 if start is None else bisect.bisect_left(entries, (start,))
+        hi = len(entries) if end is None else bisect.bisect_right(entries, (end, float("inf")))
+        return [entry[2] for entry in entries[lo:hi]]
+
+    def adjacent_touching(self, frame_id: str, by: str) -> Tuple[List[str], List[str]]:
+        """
+        For each file (by="file") or rule (by="rule") the frame touched, the frames that
+        touched it just before and just after. Returns (previous, next), without duplicates.
+        """
+        key = self._time_keys.get(frame_id)
+        if key is None:
+            return [], []
+        frame = self._frames[frame_id]
+        index, names = (self._by_file, frame.changed_files) if by == "file" else (self._by_rule, frame.relevant_decisions)
+        previous, following = [], []
+        for name in dict.fromkeys(names):
+            entries = index[name]
+            pos = bisect.bisect_left(entries, key)
+            if pos > 0 and entries[pos - 1][2] not in previous:
+                previous.append(entries[pos - 1][2])
+            if pos + 1 < len(entries) and entries[pos + 1][2] not in following:
+                following.append(entries[pos + 1][2])
+        return previous, following
+
+    def out_edges(self, frame_id: str, edge_type: Optional[str] = None) -> List[GraphEdge]:
+        edges = self._out.get(frame_id, [])
+        if edge_type is None:
+            return list(edges)
+        return [e for e in edges if e.type == edge_type]
+
+    def in_edges(self, frame_id: str, edge_type: Optional[str] = None) -> List[GraphEdge]:
+        edges = self._in.get(frame_id, [])
+        if edge_type is None:
+            return list(edges)
+        return [e for e in edges if e.type == edge_type]
+
+    def successors(self, frame_id: str, edge_type: Optional[str] = None) -> List[str]:
+        return [e.to_frame_id for e in self.out_edges(frame_id, edge_type)]
+
+    def predecessors(self, frame_id: str, edge_type: Optional[str] = None) -> List[str]:
+        return [e.from_frame_id for e in self.in_edges(frame_id, edge_type)]
+
+    def neighbours(self, frame_id: str, edge_type: Optional[str] = None) -> List[str]:
+        seen = set()
+        result = []
+        for other in self.predecessors(frame_id, edge_type) + self.successors(frame_id, edge_type):
+            if other not in seen:
+                seen.add(other)
+                result.append(other)
+        return result
+
+    def ancestors(self, frame_id: str, max_depth: Optional[int] = None, edge_type: Optional[str] = None) -> List[str]:
+        """Frames that reach frame_id along incoming edges, nearest first."""
+        return self._walk(frame_id, self._in, "from_frame_id", max_depth, edge_type)
+
+    def descendants(self, frame_id: str, max_depth: Optional[int] = None, edge_type: Optional[str] = None) -> List[str]:
+        """Frames reachable from frame_id along outgoing edges, nearest first."""
+        return self._walk(frame_id, self._out, "to_frame_id", max_depth, edge_type)
+
+    def _walk(self, start, adjacency, attr, max_depth, edge_type) -> List[str]:
+        seen = {start}
+        order = []
+        queue = deque([(start, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for edge in adjacency.get(node, []):
+                if edge_type is not None and edge.type != edge_type:
+                    continue
+                other = getattr(edge, attr)
+                if other not in seen:
+                    seen.add(other)
+                    order.append(other)
+                    queue.append((other, depth + 1))
+        return order
@@ -1,51 +1,342 @@
 import json
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
-from .models import Graph, FrameSnapshot, GraphEdge
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from .models import Graph, FrameSnapshot, GraphEdge, GraphHead
+from .graph_index import IndexedGraph
 from .paths import get_vault_root
+from .vault_io import write_atomic, delete_frame
+from .locking import graph_lock
+from .retention import RetentionPolicy, policy_from_env, retire_frames, frame_number
+from . import codec
+
+# The graph is stored as a checkpoint (graph.json, in the vault format; see codec)
+# plus an append-only journal (graph.log.jsonl) of frames and edges added since the
+# checkpoint. A small head file tracks the frame count and last frame so a change
+# event can be recorded with O(1) I/O. The last frame is the one appended last, which
+# sequence edges link from; storage keeps frames in append order, so a rebuilt head
+# agrees with the one appends maintain even when timestamps are out of order.
+# Compaction folds the journal back into the checkpoint, and retires old frames into
+# epoch nodes when a retention policy is set (see retention).
+#
+# Every write to these files, and frame ID allocation, happens under the
+# cross-process graph lock (see locking.graph_lock).
+
+DEFAULT_COMPACT_EVERY = 1000
 
 def get_graph_path() -> Path:
     return get_vault_root() / "graph.json"
 
-def load_graph() -> Graph:
-    """Loads the causal graph from graph.json."""
+def get_journal_path() -> Path:
+    return get_vault_root() / "graph.log.jsonl"
+
+def get_head_path() -> Path:
+    return get_vault_root() / "graph_head.json"
+
+def get_frame_counter_path() -> Path:
+    return get_vault_root() / "frame_counter.json"
+
+def _compact_threshold() -> int:
+    try:
+        return int(os.environ.get("QDB_GRAPH_COMPACT_EVERY", DEFAULT_COMPACT_EVERY))
+    except ValueError:
+        return DEFAULT_COMPACT_EVERY
+
+def _load_checkpoint() -> Graph:
     path = get_graph_path()
     if not path.exists():
         return Graph(frames=[], edges=[])
-    
+
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return Graph(**data)
-    except (json.JSONDecodeError, IOError) as e:
+        with open(path, 'rb') as f:
+            return codec.decode(f.read(), Graph)
+    except (ValueError, IOError) as e:
         print(f"Error loading graph from {path}: {e}")
         return Graph(frames=[], edges=[])
 
-def save_graph(graph: Graph) -> None:
-    """Saves the causal graph to graph.json."""
+def _replay_journal(graph: IndexedGraph, start: int = 0) -> Tuple[int, int]:
+    """
+    Applies journal records from byte offset start to graph in place. Returns the
+    number of records read and the offset just past the last complete line.
+    """
+    path = get_journal_path()
+    if not path.exists():
+        return 0, 0
+
+    count = 0
+    end = start
+    with open(path, 'rb') as f:
+        f.seek(start)
+        for raw in f:
+            if raw.endswith(b"\n"):
+                end += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from an interrupted append; everything before it is intact
+                print(f"Skipping corrupt journal record in {path}")
+                continue
+            count += 1
+            if record.get("op") == "frame":
+                graph.add_frame(FrameSnapshot(**record["frame"]))
+            elif record.get("op") == "edge":
+                graph.add_graph_edge(GraphEdge(**record["edge"]))
+    return count, end
+
+def load_indexed_graph() -> IndexedGraph:
+    """Loads the causal graph (checkpoint plus journal tail) into an IndexedGraph."""
+    graph = IndexedGraph.from_graph(_load_checkpoint())
+    _replay_journal(graph)
+    return graph
+
+_shared_lock = threading.Lock()
+# vault root -> (checkpoint signature, journal offset replayed, graph)
+_shared_graphs: Dict[str, Tuple[Tuple[int, int], int, IndexedGraph]] = {}
+
+@contextmanager
+def shared_graph() -> Iterator[IndexedGraph]:
+    """
+    The causal graph for read-only queries, kept in memory across calls: the
+    checkpoint is only re-read when it changed, and only journal records appended
+    since the previous call are replayed. The graph must not be modified, and is
+    only valid inside the with block (which serializes queries in this process).
+    """
+    key = str(get_vault_root())
+    with _shared_lock:
+        checkpoint_sig = _file_signature(get_graph_path())
+        cached = _shared_graphs.get(key)
+        if cached is None or cached[0] != checkpoint_sig or _file_signature(get_journal_path())[1] < cached[1]:
+            graph, offset = IndexedGraph.from_graph(_load_checkpoint()), 0
+        else:
+            _, offset, graph = cached
+        _, offset = _replay_journal(graph, offset)
+        _shared_graphs[key] = (checkpoint_sig, offset, graph)
+        yield graph
+
+def load_graph() -> Graph:
+    """Loads the causal graph from the graph.json checkpoint plus the journal tail."""
+    return load_indexed_graph().to_graph()
+
+def _file_signature(path: Path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return 0, 0
+    return st.st_mtime_ns, st.st_size
+
+# Last head this process read or wrote, per vault, for /metrics
+_known_heads: Dict[str, GraphHead] = {}
+
+def last_known_head() -> Optional[GraphHead]:
+    """The head as last seen by this process, without touching the disk (None if never seen)."""
+    return _known_heads.get(str(get_vault_root()))
+
+def _write_head(head: GraphHead) -> None:
+    write_atomic(get_head_path(), head.model_dump_json().encode("utf-8"))
+    _known_heads[str(get_vault_root())] = head
+
+def save_graph(graph: Union[Graph, IndexedGraph]) -> None:
+    """Saves the causal graph as a new graph.json checkpoint and clears the journal."""
+    if isinstance(graph, Graph):
+        graph = IndexedGraph.from_graph(graph)
+    with graph_lock():
+        _save_checkpoint(graph)
+
+def _save_checkpoint(graph: IndexedGraph) -> None:
     path = get_graph_path()
+    latest = graph.last_added_frame()
     try:
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(graph.model_dump_json(indent=2))
+        write_atomic(path, codec.encode(graph.to_graph()))
+        journal_path = get_journal_path()
+        if journal_path.exists():
+            journal_path.unlink()
     except IOError as e:
         print(f"Error saving graph to {path}: {e}")
+        return
+
+    mtime_ns, size = _file_signature(path)
+    _write_head(GraphHead(
+        frame_count=graph.total_frames,
+        last_frame_id=latest.frame_id if latest else None,
+        checkpoint_mtime_ns=mtime_ns,
+        checkpoint_size=size,
+    ))
+
+def compact_graph(policy: Optional[RetentionPolicy] = None) -> IndexedGraph:
+    """
+    Folds the journal into a fresh checkpoint and returns the compacted graph.
+    Frames due for retirement under policy (default: QDB_RETAIN_FRAMES and
+    QDB_EPOCH_FRAMES) become epoch nodes and their snapshots are deleted.
+    """
+    with graph_lock():
+        loaded = load_indexed_graph()
+        graph, epochs = retire_frames(loaded, policy or policy_from_env())
+        _save_checkpoint(graph)
+    if epochs:
+        for frame in loaded.frames:
+            if frame.frame_id not in graph:
+                delete_frame(frame.frame_id)
+    return graph
+
+def _repair_journal() -> None:
+    """Truncates a torn final record so later appends start on a fresh line."""
+    path = get_journal_path()
+    if not path.exists():
+        return
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+def _read_current_head() -> Optional[GraphHead]:
+    try:
+        with open(get_head_path(), 'r', encoding='utf-8') as f:
+            head = GraphHead(**json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError, ValueError):
+        return None
+
+    checkpoint_sig = _file_signature(get_graph_path())
+    journal_size = _file_signature(get_journal_path())[1]
+    if (checkpoint_sig == (head.checkpoint_mtime_ns, head.checkpoint_size)
+            and journal_size == head.journal_size):
+        _known_heads[str(get_vault_root())] = head
+        return head
+    return None
+
+def load_graph_head() -> GraphHead:
+    """
+    Returns the frame count and last frame of the graph without loading it.
+    The head is rebuilt from the full graph if it is missing or does not match
+    the checkpoint and journal on disk (e.g. after a manual edit or a crash).
+    """
+    head = _read_current_head()
+    if head is not None:
+        return head
+
+    with graph_lock():
+        # Another writer may have rebuilt or advanced the head while we waited
+        head = _read_current_head()
+        if head is not None:
+            return head
 
-def add_frame_node(graph: Graph, frame: FrameSnapshot) -> None:
+        _repair_journal()
+        graph = IndexedGraph.from_graph(_load_checkpoint())
+        journal_entries, _ = _replay_journal(graph)
+        latest = graph.last_added_frame()
+        mtime_ns, size = _file_signature(get_graph_path())
+        head = GraphHead(
+            frame_count=graph.total_frames,
+            last_frame_id=latest.frame_id if latest else None,
+            journal_entries=journal_entries,
+            journal_size=_file_signature(get_journal_path())[1],
+            checkpoint_mtime_ns=mtime_ns,
+            checkpoint_size=size,
+        )
+        _write_head(head)
+        return head
+
+def current_frame_number() -> Optional[int]:
+    """Sequence number of the last appended frame (None for an empty graph)."""
+    head = load_graph_head()
+    return frame_number(head.last_frame_id) if head.last_frame_id else None
+
+def allocate_frame_ids(count: int = 1) -> List[str]:
+    """
+    Reserves `count` new frame IDs. IDs are unique and increasing across threads
+    and processes, and are never handed out twice even if the frames are appended
+    to the graph in a different order.
+    """
+    with graph_lock():
+        last = load_graph_head().frame_count
+        try:
+            with open(get_frame_counter_path(), 'r', encoding='utf-8') as f:
+                last = max(last, int(json.load(f)["last_allocated"]))
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            pass
+        write_atomic(get_frame_counter_path(), json.dumps({"last_allocated": last + count}).encode("utf-8"))
+    return [f"frame_{n:03d}" for n in range(last + 1, last + count + 1)]
+
+def append_frames_to_graph(
+    frames_with_edges: List[Tuple[FrameSnapshot, List[GraphEdge]]],
+    link_sequence: bool = False,
+) -> GraphHead:
+    """
+    Records new frames and their edges with a single journal append.
+    With link_sequence, each frame also gets a "sequence" edge from the frame
+    appended just before it, decided under the graph lock so concurrent writers
+    still produce a single chain.
+    Compacts the journal into graph.json once it exceeds QDB_GRAPH_COMPACT_EVERY records.
+    """
+    with graph_lock():
+        head = load_graph_head()
+        if not frames_with_edges:
+            return head
+
+        records = []
+        prev_frame_id = head.last_frame_id
+        for frame, edges in frames_with_edges:
+            records.append({"op": "frame", "frame": frame.model_dump(mode="json")})
+            edges = list(edges or [])
+            if link_sequence and prev_frame_id:
+                edges.insert(0, GraphEdge(
+                    from_frame_id=prev_frame_id,
+                    to_frame_id=frame.frame_id,
+                    type="sequence",
+                    weight=1.0
+                ))
+            for edge in edges:
+                records.append({"op": "edge", "edge": edge.model_dump(mode="json")})
+            prev_frame_id = frame.frame_id
+        payload = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+
+        journal_path = get_journal_path()
+        with open(journal_path, 'a', encoding='utf-8', newline='\n') as f:
+            f.write(payload)
+
+        head = head.model_copy(update={
+            "frame_count": head.frame_count + len(frames_with_edges),
+            "last_frame_id": frames_with_edges[-1][0].frame_id,
+            "journal_entries": head.journal_entries + len(records),
+            "journal_size": _file_signature(journal_path)[1],
+        })
+        _write_head(head)
+
+        if head.journal_entries >= _compact_threshold():
+            compact_graph()
+            head = load_graph_head()
+        return head
+
+def append_to_graph(frame: FrameSnapshot, edges: Optional[List[GraphEdge]] = None) -> GraphHead:
+    """Records a new frame and its edges by appending to the journal."""
+    return append_frames_to_graph([(frame, edges or [])])
+
+def add_frame_node(graph: Union[Graph, IndexedGraph], frame: FrameSnapshot) -> None:
     """Adds a frame node to the graph."""
-    # Check if frame already exists (idempotency)
+    if isinstance(graph, IndexedGraph):
+        graph.add_frame(frame)
+        return
+    # Plain Graph: check if frame already exists (idempotency)
     if any(f.frame_id == frame.frame_id for f in graph.frames):
         return
     graph.frames.append(frame)
 
 def add_edge(
-    graph: Graph,
+    graph: Union[Graph, IndexedGraph],
     from_frame_id: str,
     to_frame_id: str,
     edge_type: str,
     weight: float = 1.0,
 ) -> None:
     """Adds an edge between two frames."""
-    # Check if edge already exists
+    if isinstance(graph, IndexedGraph):
+        graph.add_edge(from_frame_id, to_frame_id, edge_type, weight)
+        return
+    # Plain Graph: check if edge already exists
     for edge in graph.edges:
         if (edge.from_frame_id == from_frame_id and 
             edge.to_frame_id == to_frame_id and 
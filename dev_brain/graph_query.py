@@ -0,0 +1,227 @@
+import re
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .graph_index import IndexedGraph
+from .models import GraphEdge
+
+# Read-only queries over the causal graph (see graph_manager.shared_graph for a
+# cached, incrementally refreshed graph to run them on).
+#
+# Besides the stored edges (the guardian's "sequence" chain, plus any others), two
+# edge types are derived on the fly from the graph's secondary indexes instead of
+# being written to graph.json, where they would cost one edge per file and rule of
+# every frame:
+# - "same_file": from a frame to the next frame that changed one of the same files;
+# - "same_rule": from a frame to the next frame that evaluated one of the same rules.
+# Each derived step is a bisect in a per-file or per-rule list, so traversals cost
+# the same as over stored edges.
+
+DERIVED_EDGE_TYPES = {"same_file": "file", "same_rule": "rule"}
+
+_DURATION_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhdw])\s*$")
+_DURATION_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def _stored_types(edge_types: Optional[Set[str]]) -> Optional[Set[str]]:
+    if edge_types is None:
+        return None
+    return {t for t in edge_types if t not in DERIVED_EDGE_TYPES}
+
+
+def _derived_types(edge_types: Optional[Set[str]]) -> List[str]:
+    if edge_types is None:
+        return list(DERIVED_EDGE_TYPES)
+    return [t for t in DERIVED_EDGE_TYPES if t in edge_types]
+
+
+def edges(graph: IndexedGraph, frame_id: str, edge_types: Optional[Iterable[str]] = None, forward: bool = True) -> List[GraphEdge]:
+    """
+    Outgoing (or incoming, with forward=False) edges of a frame, stored and derived,
+    restricted to edge_types if given.
+    """
+    types = set(edge_types) if edge_types is not None else None
+    stored = _stored_types(types)
+    result = [
+        e for e in (graph.out_edges(frame_id) if forward else graph.in_edges(frame_id))
+        if stored is None or e.type in stored
+    ]
+    for edge_type in _derived_types(types):
+        previous, following = graph.adjacent_touching(frame_id, DERIVED_EDGE_TYPES[edge_type])
+        if forward:
+            result.extend(GraphEdge(from_frame_id=frame_id, to_frame_id=other, type=edge_type, weight=1.0) for other in following)
+        else:
+            result.extend(GraphEdge(from_frame_id=other, to_frame_id=frame_id, type=edge_type, weight=1.0) for other in previous)
+    return result
+
+
+class _Stepper:
+    """(other node, edge type) pairs one step away, without building edge objects."""
+
+    def __init__(self, graph: IndexedGraph, edge_types: Optional[Iterable[str]]):
+        types = set(edge_types) if edge_types is not None else None
+        self.graph = graph
+        self.stored = _stored_types(types)
+        self.derived = [(t, DERIVED_EDGE_TYPES[t]) for t in _derived_types(types)]
+
+    def __call__(self, node: str, forward: bool) -> List[Tuple[str, str]]:
+        graph = self.graph
+        if forward:
+            result = [(e.to_frame_id, e.type) for e in graph.out_edges(node) if self.stored is None or e.type in self.stored]
+        else:
+            result = [(e.from_frame_id, e.type) for e in graph.in_edges(node) if self.stored is None or e.type in self.stored]
+        for edge_type, by in self.derived:
+            previous, following = graph.adjacent_touching(node, by)
+            result.extend((other, edge_type) for other in (following if forward else previous))
+        return result
+
+
+def _walk(graph, frame_id, edge_types, max_depth, limit, forward) -> List[str]:
+    step = _Stepper(graph, edge_types)
+    seen = {frame_id}
+    order = []
+    queue = deque([(frame_id, 0)])
+    while queue:
+        node, depth = queue.popleft()
+        if max_depth is not None and depth >= max_depth:
+            continue
+        for other, _ in step(node, forward):
+            if other not in seen:
+                seen.add(other)
+                order.append(other)
+                if limit is not None and len(order) >= limit:
+                    return order
+                queue.append((other, depth + 1))
+    return order
+
+
+def ancestors(
+    graph: IndexedGraph,
+    frame_id: str,
+    max_depth: Optional[int] = None,
+    edge_types: Optional[Iterable[str]] = None,
+    limit: Optional[int] = None,
+) -> List[str]:
+    """Frames (and epochs) that lead to frame_id, nearest first, up to max_depth steps and limit results."""
+    return _walk(graph, frame_id, edge_types, max_depth, limit, forward=False)
+
+
+def descendants(
+    graph: IndexedGraph,
+    frame_id: str,
+    max_depth: Optional[int] = None,
+    edge_types: Optional[Iterable[str]] = None,
+    limit: Optional[int] = None,
+) -> List[str]:
+    """Frames (and epochs) reachable from frame_id, nearest first, up to max_depth steps and limit results."""
+    return _walk(graph, frame_id, edge_types, max_depth, limit, forward=True)
+
+
+def shortest_path(
+    graph: IndexedGraph,
+    source: str,
+    target: str,
+    edge_types: Optional[Iterable[str]] = None,
+    max_depth: Optional[int] = None,
+) -> Optional[List[Tuple[str, Optional[str]]]]:
+    """
+    Fewest-edges causal path from source to target, following edges forward, as
+    [(frame_id, type of the edge leading to it)] starting with (source, None).
+    None if target is unreachable (within max_depth edges). The search runs from
+    both ends at once, expanding the smaller frontier.
+    """
+    if source == target:
+        return [(source, None)]
+    step = _Stepper(graph, edge_types)
+    # node -> (node one step closer to its end, edge type)
+    forward_parent: Dict[str, Tuple[Optional[str], Optional[str]]] = {source: (None, None)}
+    backward_parent: Dict[str, Tuple[Optional[str], Optional[str]]] = {target: (None, None)}
+    forward_frontier, backward_frontier = [source], [target]
+    depth = 0
+    meeting = None
+    while forward_frontier and backward_frontier and meeting is None:
+        if max_depth is not None and depth >= max_depth:
+            return None
+        depth += 1
+        expand_forward = len(forward_frontier) <= len(backward_frontier)
+        frontier = forward_frontier if expand_forward else backward_frontier
+        parents, others = (forward_parent, backward_parent) if expand_forward else (backward_parent, forward_parent)
+        next_frontier = []
+        for node in frontier:
+            for other, edge_type in step(node, expand_forward):
+                if other in parents:
+                    continue
+                parents[other] = (node, edge_type)
+                if other in others:
+                    meeting = other
+                    break
+                next_frontier.append(other)
+            if meeting is not None:
+                break
+        if expand_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+    if meeting is None:
+        return None
+
+    head = []
+    node = meeting
+    while node is not None:
+        parent, edge_type = forward_parent[node]
+        head.append((node, edge_type))
+        node = parent
+    head.reverse()
+    path = head
+    node = meeting
+    while True:
+        parent, edge_type = backward_parent[node]
+        if parent is None:
+            break
+        path.append((parent, edge_type))
+        node = parent
+    return path
+
+
+def frames_touching(
+    graph: IndexedGraph,
+    file_path: Optional[str] = None,
+    rule_id: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> List[str]:
+    """
+    IDs of frames in [start, end] (ISO-8601 timestamps) that changed file_path and/or
+    evaluated rule_id, in time order. With both, frames must match both.
+    """
+    if file_path is None and rule_id is None:
+        return [f.frame_id for f in graph.frames_between(start, end)]
+    if rule_id is None:
+        return graph.frames_for_file(file_path, start, end)
+    if file_path is None:
+        return graph.frames_for_rule(rule_id, start, end)
+    by_file = graph.frames_for_file(file_path, start, end)
+    by_rule = graph.frames_for_rule(rule_id, start, end)
+    smaller, larger = (by_file, by_rule) if len(by_file) <= len(by_rule) else (by_rule, by_file)
+    other = set(larger)
+    return [frame_id for frame_id in smaller if frame_id in other]
+
+
+def parse_duration(text: str) -> timedelta:
+    """'90s', '15m', '24h', '7d' or '2w' as a timedelta. Raises ValueError otherwise."""
+    match = _DURATION_RE.match(text)
+    if not match:
+        raise ValueError(f"invalid window {text!r} (expected e.g. 30m, 24h, 7d)")
+    return timedelta(**{_DURATION_UNITS[match.group(2)]: float(match.group(1))})
+
+
+def window_start(graph: IndexedGraph, window: str) -> Optional[str]:
+    """Start timestamp of a window ending at the latest frame (None for an empty graph)."""
+    latest = graph.latest_frame()
+    if latest is None:
+        return None
+    end = datetime.fromisoformat(latest.timestamp.replace("Z", "+00:00"))
+    start = end - parse_duration(window)
+    # Frames are stamped as naive UTC ISO strings with a trailing Z
+    return start.replace(tzinfo=None).isoformat() + ("Z" if latest.timestamp.endswith("Z") else "")
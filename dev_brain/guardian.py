@@ -1,12 +1,218 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 import uuid
 
-from .models import RuleStatesForFile, RuleStateEntry, FrameSnapshot
-from .vault_io import load_decisions, load_rule_states, save_rule_states, save_frame
-from .metrics import initial_state_belief, update_state_belief_for_request
+from pydantic import BaseModel
+
+from .models import Decision, RuleStatesForFile, RuleStateEntry, FrameSnapshot, GraphEdge
+from .vault_io import load_decisions, load_rule_states, save_rule_states_many, save_frame, load_file_summary
+from .metrics import initial_state_belief, apply_suspicion, rounded_belief
+from .rule_matcher import RuleMatch, get_matcher
+from .belief_store import BeliefStore
+from .telemetry import timed
+from .relevance import get_relevance_index
+from .retention import half_lives, decay_rule_states, frame_number
 from .frame_builder import build_frame_snapshot
-from .graph_manager import load_graph, save_graph, add_frame_node, add_edge
+from .graph_manager import allocate_frame_ids, append_frames_to_graph
+from .locking import rule_state_locks
+from . import belief_history
+
+class ChangeEvent(BaseModel):
+    user_goal: str
+    changed_files: List[str]
+    timestamp: Optional[str] = None
+
+class ChangeEventResult(BaseModel):
+    frame_id: str
+    # Rule states of the event's changed files right after this event
+    rule_states: Dict[str, RuleStatesForFile]
+
+def _update_rule_states_for_file(
+    rs_obj: Optional[RuleStatesForFile],
+    file_path: str,
+    decisions: List[Decision],
+    matches: Dict[int, RuleMatch],
+    frame_id: str,
+    positions: List[int],
+) -> RuleStatesForFile:
+    if not rs_obj:
+        rs_obj = RuleStatesForFile(file=file_path, rule_states=[])
+
+    # Create a map of existing entries for easy update
+    existing_entries = {entry.rule_id: entry for entry in rs_obj.rule_states}
+    new_entries = []
+
+    # Only decisions applicable to the file (see relevance) are re-evaluated;
+    # existing entries of the others are carried over unchanged
+    applicable = set(positions)
+    for i, decision in enumerate(decisions):
+        current_entry = existing_entries.get(decision.id)
+        if i not in applicable:
+            if current_entry:
+                new_entries.append(current_entry)
+            continue
+
+        if current_entry:
+            current_belief = current_entry.state_belief
+        else:
+            current_belief = initial_state_belief()
+
+        # Update belief based on user request (matched once per event, see rule_matcher)
+        new_belief = apply_suspicion(current_belief, matches[i].suspicion)
+
+        # Create new entry
+        new_entries.append(RuleStateEntry(
+            rule_id=decision.id,
+            state_belief=new_belief,
+            entangled_with=list(current_entry.entangled_with) if current_entry else [],
+            last_updated_frame=frame_id
+        ))
+
+    # rs_obj may be shared with the vault cache, so it is never mutated in place
+    return RuleStatesForFile(file=file_path, rule_states=new_entries)
+
+def _merge_rule_states(
+    previous: Optional[RuleStatesForFile],
+    updated: RuleStatesForFile,
+    rule_positions: Dict[str, int],
+) -> RuleStatesForFile:
+    """previous with updated's entries swapped in, in decision order, dropping rules that are no decision."""
+    merged = {e.rule_id: e for e in previous.rule_states} if previous else {}
+    merged.update((e.rule_id, e) for e in updated.rule_states)
+    entries = sorted((e for e in merged.values() if e.rule_id in rule_positions), key=lambda e: rule_positions[e.rule_id])
+    return RuleStatesForFile(file=updated.file, rule_states=entries)
+
+def process_change_events(events: List[ChangeEvent]) -> List[ChangeEventResult]:
+    """
+    Processes change events in order against shared state loaded once, chaining
+    each frame to the previous one, then persists everything in a single write pass.
+    Safe to call from several threads or processes at once: frame IDs come from
+    the graph's allocator and each touched file's rule states are locked for the
+    whole read-modify-write.
+    Returns one result per event.
+    """
+    if not events:
+        return []
+    with timed("guardian.process_change_events"):
+        return _process_change_events(events)
+
+def _process_change_events(events: List[ChangeEvent]) -> List[ChangeEventResult]:
+    # 1. Load Decisions once and reserve the batch's frame IDs
+    with timed("guardian.load_decisions"):
+        decisions = load_decisions()
+        matcher = get_matcher(decisions)
+        relevance = get_relevance_index(decisions)
+        rule_half_lives = half_lives(decisions)
+    with timed("guardian.allocate_frame_ids"):
+        frame_ids = allocate_frame_ids(len(events))
+
+    # Beliefs are updated in a files x rules array; the store keys rules by id,
+    # so decision lists with repeated ids take the per-entry path instead
+    rule_ids = [d.id for d in decisions]
+    rule_positions = {rule_id: i for i, rule_id in enumerate(rule_ids)}
+    store = BeliefStore(rules=rule_ids) if len(rule_positions) == len(rule_ids) else None
+
+    touched_files = {file_path for event in events for file_path in event.changed_files}
+    with rule_state_locks(touched_files):
+        working_rule_states: Dict[str, Optional[RuleStatesForFile]] = {}
+        applicable_positions: Dict[str, List[int]] = {}
+        # Last stored belief per (file, rule) and the changes to append to the history
+        stored_beliefs = {}
+        history_events: Dict[str, List[RuleStateEntry]] = {}
+        frames_with_edges = []
+        results = []
+
+        for event, frame_id in zip(events, frame_ids):
+            timestamp = event.timestamp or datetime.utcnow().isoformat() + "Z"
+            # 2. Update Rule States for each changed file (against the batch's working set)
+            updated_rule_states_map = {}
+            event_rule_states = {}
+            event_positions = set()
+            for file_path in event.changed_files:
+                if file_path not in working_rule_states:
+                    with timed("guardian.load_rule_states"):
+                        applicable_positions[file_path] = relevance.positions_for_file(load_file_summary(file_path))
+                        stored = load_rule_states(file_path)
+                        for entry in (stored.rule_states if stored else []):
+                            stored_beliefs[(file_path, entry.rule_id)] = entry.state_belief
+                        # Beliefs about to be re-evaluated first fade for the frames since
+                        # their last update (see retention); the others stay as stored
+                        working_rule_states[file_path] = decay_rule_states(
+                            stored,
+                            rule_half_lives,
+                            frame_number(frame_id),
+                            {decisions[i].id for i in applicable_positions[file_path]},
+                        )
+                    if store is not None:
+                        store.load(working_rule_states[file_path] or RuleStatesForFile(file=file_path, rule_states=[]), file_path)
+                event_positions.update(applicable_positions[file_path])
+
+            # Only decisions applicable to one of the changed files are matched
+            with timed("guardian.match_rules"):
+                matches = matcher.scan_positions(event.user_goal, sorted(event_positions))
+
+            for file_path in event.changed_files:
+                positions = applicable_positions[file_path]
+                with timed("guardian.update_beliefs"):
+                    if store is not None:
+                        store.update(
+                            [file_path],
+                            [rule_ids[i] for i in positions],
+                            [matches[i].suspicion for i in positions],
+                            frame_id,
+                        )
+                        # Only the re-evaluated entries are exported; the rest carry over
+                        rs_obj = _merge_rule_states(
+                            working_rule_states[file_path],
+                            store.to_rule_states(file_path, [rule_ids[i] for i in positions]),
+                            rule_positions,
+                        )
+                    else:
+                        rs_obj = _update_rule_states_for_file(
+                            working_rule_states[file_path], file_path, decisions, matches, frame_id, positions
+                        )
+                working_rule_states[file_path] = rs_obj
+                # The frame records what this event evaluated, not carried-over entries
+                updated_rule_states_map[file_path] = [
+                    e for e in rs_obj.rule_states if e.last_updated_frame == frame_id
+                ]
+                # Decay alone moves a belief a little every frame; the history only
+                # records changes visible at display precision
+                for entry in updated_rule_states_map[file_path]:
+                    previous = stored_beliefs.get((file_path, entry.rule_id))
+                    if previous is None or rounded_belief(previous) != rounded_belief(entry.state_belief):
+                        stored_beliefs[(file_path, entry.rule_id)] = entry.state_belief
+                        history_events.setdefault(file_path, []).append(entry)
+                event_rule_states[file_path] = rs_obj
+
+            # 3. Build Frame Snapshot
+            with timed("guardian.build_frame"):
+                frame = build_frame_snapshot(
+                    frame_id=frame_id,
+                    timestamp=timestamp,
+                    user_goal=event.user_goal,
+                    changed_files=event.changed_files,
+                    relevant_decisions=[decisions[i] for i in sorted(event_positions)],
+                    updated_rule_states=updated_rule_states_map
+                )
+            frames_with_edges.append((frame, []))
+            results.append(ChangeEventResult(frame_id=frame_id, rule_states=event_rule_states))
+
+        # 4. Single write pass: final rule states per file, frames, one graph append.
+        # Sequence edges are linked by the graph under its lock, so batches running
+        # concurrently still form one chain.
+        with timed("guardian.save_rule_states"):
+            save_rule_states_many(rs_obj for rs_obj in working_rule_states.values() if rs_obj is not None)
+        with timed("guardian.record_history"):
+            for file_path, entries in history_events.items():
+                belief_history.record_events(file_path, entries)
+        with timed("guardian.save_frames"):
+            for frame, _ in frames_with_edges:
+                save_frame(frame)
+        with timed("guardian.append_graph"):
+            append_frames_to_graph(frames_with_edges, link_sequence=True)
+
+    return results
 
 def process_change_event(
     user_goal: str,
@@ -17,88 +223,7 @@ def process_change_event(
     Processes a change event, updates rule states, creates a frame, and updates the graph.
     Returns the new frame_id.
     """
-    if timestamp is None:
-        timestamp = datetime.utcnow().isoformat() + "Z"
-        
-    # 1. Load Decisions
-    decisions = load_decisions()
-    
-    # 2. Update Rule States for each changed file
-    updated_rule_states_map = {}
-    
-    for file_path in changed_files:
-        # Load existing or create new
-        rs_obj = load_rule_states(file_path)
-        if not rs_obj:
-            rs_obj = RuleStatesForFile(file=file_path, rule_states=[])
-            
-        # Create a map of existing entries for easy update
-        existing_entries = {entry.rule_id: entry for entry in rs_obj.rule_states}
-        new_entries = []
-        
-        # For MVP, we check ALL decisions against the user request for each file
-        # In reality, we'd filter by relevance
-        for decision in decisions:
-            current_entry = existing_entries.get(decision.id)
-            
-            if current_entry:
-                current_belief = current_entry.state_belief
-            else:
-                current_belief = initial_state_belief()
-                
-            # Update belief based on user request
-            new_belief = update_state_belief_for_request(current_belief, user_goal, decision)
-            
-            # Create new entry
-            new_entry = RuleStateEntry(
-                rule_id=decision.id,
-                state_belief=new_belief,
-                entangled_with=current_entry.entangled_with if current_entry else [],
-                last_updated_frame="PENDING" # Will update with frame ID later
-            )
-            new_entries.append(new_entry)
-            
-        # Update the object
-        rs_obj.rule_states = new_entries
-        updated_rule_states_map[file_path] = new_entries
-        
-        # We will save after we generate the frame ID, so we can update last_updated_frame
-        
-    # 3. Create Frame ID
-    # Simple counter or UUID. Let's use a simple counter based on graph size + 1 for readability
-    graph = load_graph()
-    frame_count = len(graph.frames)
-    frame_id = f"frame_{frame_count + 1:03d}"
-    
-    # 4. Finalize Rule States with Frame ID and Save
-    for file_path, entries in updated_rule_states_map.items():
-        for entry in entries:
-            entry.last_updated_frame = frame_id
-            
-        rs_obj = RuleStatesForFile(file=file_path, rule_states=entries)
-        save_rule_states(rs_obj)
-        
-    # 5. Build Frame Snapshot
-    frame = build_frame_snapshot(
-        frame_id=frame_id,
-        timestamp=timestamp,
-        user_goal=user_goal,
-        changed_files=changed_files,
-        relevant_decisions=decisions, # Passing all for MVP
-        updated_rule_states=updated_rule_states_map
-    )
-    save_frame(frame)
-    
-    # 6. Update Graph
-    add_frame_node(graph, frame)
-    
-    # Add edge from previous frame if exists
-    if frame_count > 0:
-        prev_frame = graph.frames[-1] # Assuming order is preserved
-        # Or find the one with highest ID if not sorted
-        # For MVP, just taking the last one in the list is fine if we append
-        add_edge(graph, prev_frame.frame_id, frame_id, "sequence", 1.0)
-        
-    save_graph(graph)
-    
-    return frame_id
+    results = process_change_events([
+        ChangeEvent(user_goal=user_goal, changed_files=changed_files, timestamp=timestamp)
+    ])
+    return results[0].frame_id
@@ -0,0 +1,177 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, TypeVar
+
+import openai
+from pydantic import BaseModel
+
+from .codex_brain import build_summary_for_file, write_summary_to_vault
+from .models import FileSummary
+from .openai_client import get_openai_client
+from .tokens import estimate_tokens
+
+T = TypeVar("T")
+
+# Fixed prompt scaffolding plus a typical JSON summary response, added to the
+# source size when charging a request against the tokens-per-minute budget.
+PROMPT_OVERHEAD_TOKENS = 400
+COMPLETION_TOKENS_ESTIMATE = 800
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at rate_per_minute, holding at
+    most one minute's worth of tokens. acquire() blocks until enough are available.
+    """
+
+    def __init__(self, rate_per_minute: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.capacity = float(rate_per_minute)
+        self.rate_per_second = rate_per_minute / 60.0
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> None:
+        # A single request larger than the bucket waits for a full bucket instead of forever
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate_per_second
+            self._sleep(wait)
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits; either may be disabled (None)."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def acquire(self, tokens: int) -> None:
+        if self.requests:
+            self.requests.acquire(1)
+        if self.tokens:
+            self.tokens.acquire(tokens)
+
+def is_retryable(exc: BaseException) -> bool:
+    """429s, 5xx responses, timeouts and connection failures are worth retrying."""
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+def _retry_after_seconds(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def call_with_retries(
+    fn: Callable[[], T],
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> T:
+    """
+    Calls fn, retrying retryable API errors with exponential backoff and full jitter.
+    A Retry-After header from the server takes precedence over the computed delay.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = _retry_after_seconds(e)
+            if delay is None:
+                delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            attempt += 1
+            sleep(delay)
+
+class IngestReport(BaseModel):
+    total: int = 0
+    succeeded: int = 0
+    failed: List[str] = []
+    elapsed_seconds: float = 0.0
+
+def ingest_files_concurrently(
+    file_paths: Iterable[Path],
+    workers: int = 4,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    client=None,
+    build: Optional[Callable[[Path, Any], FileSummary]] = None,
+) -> IngestReport:
+    """
+    Ingests files with up to `workers` requests in flight, subject to the rate limits.
+    Summaries are written to the vault by the calling thread as results arrive, and a
+    progress line is printed per completed file. `build(path, client)` produces each
+    summary (default: build_summary_for_file).
+    """
+    paths = list(file_paths)
+    report = IngestReport(total=len(paths))
+    if not paths:
+        return report
+
+    if client is None:
+        client = get_openai_client()
+    # Retries are handled here so the backoff policy and rate limiter see every attempt
+    client = client.with_options(max_retries=0)
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    if build is None:
+        build = lambda path, client: build_summary_for_file(path, client=client)
+
+    def summarize(path: Path):
+        try:
+            source_tokens = estimate_tokens(path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError):
+            source_tokens = 0
+        cost = source_tokens + PROMPT_OVERHEAD_TOKENS + COMPLETION_TOKENS_ESTIMATE
+
+        def attempt():
+            limiter.acquire(cost)
+            return build(path, client)
+
+        return call_with_retries(attempt, max_retries=max_retries, base_delay=base_delay)
+
+    start = time.monotonic()
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(summarize, p): p for p in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            done += 1
+            elapsed = time.monotonic() - start
+            try:
+                out_path = write_summary_to_vault(future.result())
+                report.succeeded += 1
+                print(f"[{done}/{len(paths)} {elapsed:.1f}s] {path} -> {out_path}", flush=True)
+            except Exception as e:
+                report.failed.append(str(path))
+                print(f"[{done}/{len(paths)} {elapsed:.1f}s] {path} -> Failed: {e}", flush=True)
+
+    report.elapsed_seconds = time.monotonic() - start
+    return report
@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .paths import is_sharded, normalize_path, path_hash
+from .locking import get_lock
+
+# Manifest and directory listing for the sharded vault layout (see paths).
+#
+# A sharded artifact's name is the hash of its workspace path, so lookups by path
+# never need the manifest. The manifest (.dev_brain/manifest.jsonl) maps hashes back
+# to paths for listings and tools. It is append-only, one {"hash", "file"} record per
+# line, and gains a record the first time an artifact is saved for a path; a later
+# record for the same hash wins. Entries are not removed when artifacts are deleted.
+#
+# The rule and symbol indexes notice files written or removed behind their back by a
+# stamp of the rule_states/ and summaries/ directories (artifacts_stamp). In the flat
+# layout that is the directory's mtime. In the sharded layout a file lands in a leaf
+# shard directory, so the stamp sums the mtimes of the directory and all of its shard
+# directories. Listing every shard costs ~90ms per 20k files, so the listing is kept
+# per process for QDB_SHARD_SCAN_SECONDS (default 2) and the backend folds its own
+# writes into it (note_write); callers that must see external edits at once pass
+# fresh=True. A stamp that differs from the kept listing is checked against a fresh
+# one before an index is declared stale, so writes by other processes do not force
+# rebuilds.
+
+MANIFEST_FILENAME = "manifest.jsonl"
+DEFAULT_SHARD_SCAN_SECONDS = 2.0
+
+_manifests: Dict[str, Tuple[Tuple[int, int], Dict[str, str]]] = {}
+_manifests_lock = threading.Lock()
+
+
+def manifest_path(root: Path) -> Path:
+    return root / MANIFEST_FILENAME
+
+
+def load_manifest(root: Path) -> Dict[str, str]:
+    """Hash -> workspace path for every artifact saved in the sharded layout (shared, read-only)."""
+    path = manifest_path(root)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    signature = (st.st_mtime_ns, st.st_size)
+    with _manifests_lock:
+        cached = _manifests.get(str(path))
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    entries: Dict[str, str] = {}
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # torn final record of an interrupted append
+            try:
+                record = json.loads(line)
+                entries[record["hash"]] = record["file"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+    with _manifests_lock:
+        _manifests[str(path)] = (signature, entries)
+    return entries
+
+
+def register(root: Path, file_path: str) -> None:
+    """Records file_path in the manifest if the vault is sharded and it is not there yet."""
+    if not is_sharded(root):
+        return
+    digest = path_hash(file_path)
+    if digest in load_manifest(root):
+        return
+    with get_lock("manifest", root):
+        if digest in load_manifest(root):
+            return
+        line = json.dumps({"hash": digest, "file": normalize_path(file_path)}) + "\n"
+        with open(manifest_path(root), "a", encoding="utf-8", newline="\n") as f:
+            f.write(line)
+
+
+def write_manifest(root: Path, files: Iterable[str], write: Callable[[Path, bytes], None]) -> None:
+    """Replaces the manifest with one record per distinct path in files."""
+    entries = {path_hash(f): normalize_path(f) for f in files}
+    data = "".join(json.dumps({"hash": h, "file": f}) + "\n" for h, f in sorted(entries.items()))
+    write(manifest_path(root), data.encode("utf-8"))
+
+
+def file_for_hash(root: Path, digest: str) -> Optional[str]:
+    """Workspace path of a sharded artifact, from its hash."""
+    return load_manifest(root).get(digest)
+
+
+def artifact_paths(root: Path, kind: str, suffix: str = ".json") -> List[Path]:
+    """Every artifact file of kind ('summaries', 'rule_states', 'history') in the vault's layout, sorted."""
+    directory = root / kind
+    if not directory.exists():
+        return []
+    pattern = f"*/*/*{suffix}" if is_sharded(root) else f"*{suffix}"
+    return sorted(directory.glob(pattern))
+
+
+class _ShardScan:
+    def __init__(self, mtimes: Dict[str, int]):
+        self.at = time.monotonic()
+        self.mtimes = mtimes
+        self.total = sum(mtimes.values())
+
+
+_scans: Dict[str, _ShardScan] = {}
+_scans_lock = threading.Lock()
+
+
+def _scan_seconds_from_env() -> float:
+    try:
+        return float(os.environ.get("QDB_SHARD_SCAN_SECONDS", DEFAULT_SHARD_SCAN_SECONDS))
+    except ValueError:
+        return DEFAULT_SHARD_SCAN_SECONDS
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _scan_shards(directory: Path) -> Dict[str, int]:
+    mtimes = {str(directory): directory.stat().st_mtime_ns}
+    for first in os.scandir(directory):
+        if not first.is_dir():
+            continue
+        mtimes[first.path] = first.stat().st_mtime_ns
+        for leaf in os.scandir(first.path):
+            if leaf.is_dir():
+                mtimes[leaf.path] = leaf.stat().st_mtime_ns
+    return mtimes
+
+
+def artifacts_stamp(root: Path, kind: str, fresh: bool = False) -> int:
+    """Changes whenever a file of kind is written or removed (0 while the directory is missing)."""
+    directory = root / kind
+    if not is_sharded(root):
+        return _mtime_ns(str(directory)) or 0
+    key = str(directory)
+    with _scans_lock:
+        scan = _scans.get(key)
+        if scan is not None and not fresh and time.monotonic() - scan.at < _scan_seconds_from_env():
+            return scan.total % 2**63
+    try:
+        scan = _ShardScan(_scan_shards(directory))
+    except FileNotFoundError:
+        return 0
+    with _scans_lock:
+        _scans[key] = scan
+    # Kept to 63 bits so every vault format can store it
+    return scan.total % 2**63
+
+
+def stamp_is_current(root: Path, kind: str, stamp: int, fresh: bool = False) -> bool:
+    """Whether an index stamped with stamp still matches the files of kind."""
+    if stamp == artifacts_stamp(root, kind, fresh):
+        return True
+    return not fresh and is_sharded(root) and stamp == artifacts_stamp(root, kind, fresh=True)
+
+
+def note_write(root: Path, kind: str, path: Path) -> None:
+    """Folds a write or removal of the artifact at path into the kept shard listing."""
+    key = str(root / kind)
+    with _scans_lock:
+        scan = _scans.get(key)
+        if scan is None:
+            return
+        for directory in (path.parent, path.parent.parent, root / kind):
+            mtime = _mtime_ns(str(directory))
+            if mtime is not None:
+                scan.total += mtime - scan.mtimes.get(str(directory), 0)
+                scan.mtimes[str(directory)] = mtime
+
+
+def invalidate_scans() -> None:
+    """Drops the kept shard listings, after files were moved or rewritten in bulk."""
+    with _scans_lock:
+        _scans.clear()
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager, ExitStack
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+from .paths import get_vault_root
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Cross-process locks are advisory OS locks on files under .dev_brain/locks/.
+# Threads of one process first serialize on an in-process lock for the same file,
+# because OS file locks are held per process (or per open file), not per thread.
+#
+# Per-file locks are striped: a file's path hashes to one of RULE_STATE_LOCK_STRIPES
+# locks, so the lock objects and lock files stay bounded however many files the vault
+# tracks. Files sharing a stripe just serialize with each other.
+
+RULE_STATE_LOCK_STRIPES = 256
+
+class VaultLock:
+    """Reentrant lock that excludes other threads and other processes."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self) -> None:
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._fd = self._lock_file()
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            self._unlock_file(fd)
+        self._thread_lock.release()
+
+    def __enter__(self) -> "VaultLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    def _lock_file(self) -> int:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK gives up after ~10 seconds; keep waiting
+                        continue
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    def _unlock_file(self, fd: int) -> None:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+
+_locks: Dict[str, VaultLock] = {}
+_locks_guard = threading.Lock()
+
+def get_lock(name: str, root: Optional[Path] = None) -> VaultLock:
+    """Returns the process-wide lock object for a named lock in the given (default: current) vault."""
+    path = (root or get_vault_root()) / "locks" / f"{name}.lock"
+    key = str(path)
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = VaultLock(path)
+        return lock
+
+def graph_lock() -> VaultLock:
+    """Serializes frame ID allocation and appends to the causal graph."""
+    return get_lock("graph")
+
+def _rule_state_stripe(file_path: str) -> int:
+    digest = hashlib.sha1(str(file_path).encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") % RULE_STATE_LOCK_STRIPES
+
+def _stripe_lock(stripe: int) -> VaultLock:
+    return get_lock(f"rule_state_{stripe:03d}")
+
+def rule_state_lock(file_path: str) -> VaultLock:
+    """Guards the read-modify-write of one file's rule states (a lock shared by its stripe)."""
+    return _stripe_lock(_rule_state_stripe(file_path))
+
+@contextmanager
+def rule_state_locks(file_paths: Iterable[str]) -> Iterator[None]:
+    """Holds the rule-state locks of several files, acquired in a fixed order to avoid deadlocks."""
+    with ExitStack() as stack:
+        for stripe in sorted({_rule_state_stripe(f) for f in file_paths}):
+            stack.enter_context(_stripe_lock(stripe))
+        yield
@@ -1,10 +1,56 @@
-from typing import Dict
+from typing import Dict, List
 from .models import Decision, StateBelief
 
 def initial_state_belief() -> StateBelief:
     """Returns the initial state belief for a new file/rule."""
     return StateBelief(compliant=0.8, at_risk=0.15, violating=0.05)
 
+def rounded_belief(belief: StateBelief) -> StateBelief:
+    """The belief at the 2-decimal precision it is shown with (decayed beliefs are stored unrounded)."""
+    return StateBelief(
+        compliant=round(belief.compliant, 2),
+        at_risk=round(belief.at_risk, 2),
+        violating=round(belief.violating, 2),
+    )
+
+# Keyword lists used by the belief heuristic (rule_matcher compiles the same lists)
+DATA_ACCESS_TOPIC = "data access"
+DATA_ACCESS_KEYWORDS = ["sql", "raw query", "direct db", "direct database", "query the db"]
+CONFESSION_PATTERNS = ["i know it violates", "ignore the rule", "i don't care about the rule", "bypass"]
+# Forbidden-pattern tokens this short are too common to be a signal
+MIN_FORBIDDEN_TOKEN_LENGTH = 4
+
+def forbidden_pattern_tokens(decision: Decision) -> List[str]:
+    """Returns the lowercased tokens of a decision's forbidden pattern that count as weak signals."""
+    if not decision.forbidden_pattern:
+        return []
+    tokens = decision.forbidden_pattern.lower().split()
+    # Filter out common small words to avoid noise
+    return [t for t in tokens if len(t) >= MIN_FORBIDDEN_TOKEN_LENGTH]
+
+def suspicion_score(data_access_hit: bool, confession_hit: bool, match_count: int) -> float:
+    """Combines the heuristic's signals for one decision into a suspicion score in [0, 1]."""
+    suspicion = 0.0
+
+    # 1. Specific topic violations (Data Access)
+    if data_access_hit:
+        suspicion = max(suspicion, 0.7)
+
+    # 2. "Confessing" patterns
+    if confession_hit:
+        suspicion = max(suspicion, 0.9)
+
+    # 3. Forbidden pattern tokens (weak signal)
+    if match_count > 0:
+        # Add a small bonus, capped at 0.5 if no other strong signal
+        bonus = 0.1 * match_count
+        if suspicion == 0:
+            suspicion = min(0.5, bonus)
+        else:
+            suspicion = min(1.0, suspicion + 0.1)
+
+    return suspicion
+
 def update_state_belief_for_request(
     current: StateBelief,
     user_request: str,
@@ -13,38 +59,19 @@ def update_state_belief_for_request(
     """
     Heuristic update of state belief based on user request and decision.
     """
-    suspicion = 0.0
     req_lower = user_request.lower()
-    
-    # 1. Check for specific topic violations (Data Access)
-    if decision.topic.lower() == "data access":
-        keywords = ["sql", "raw query", "direct db", "direct database", "query the db"]
-        for kw in keywords:
-            if kw in req_lower:
-                suspicion = max(suspicion, 0.7)
-                break
-                
-    # 2. Check for "confessing" patterns
-    confessions = ["i know it violates", "ignore the rule", "i don't care about the rule", "bypass"]
-    for conf in confessions:
-        if conf in req_lower:
-            suspicion = max(suspicion, 0.9)
-            break
-            
-    # 3. Check for forbidden pattern tokens (weak signal)
-    if decision.forbidden_pattern:
-        tokens = decision.forbidden_pattern.lower().split()
-        # Filter out common small words to avoid noise
-        tokens = [t for t in tokens if len(t) > 3]
-        match_count = sum(1 for t in tokens if t in req_lower)
-        if match_count > 0:
-            # Add a small bonus, capped at 0.5 if no other strong signal
-            bonus = 0.1 * match_count
-            if suspicion == 0:
-                suspicion = min(0.5, bonus)
-            else:
-                suspicion = min(1.0, suspicion + 0.1)
 
+    data_access_hit = (
+        decision.topic.lower() == DATA_ACCESS_TOPIC
+        and any(kw in req_lower for kw in DATA_ACCESS_KEYWORDS)
+    )
+    confession_hit = any(conf in req_lower for conf in CONFESSION_PATTERNS)
+    match_count = sum(1 for t in forbidden_pattern_tokens(decision) if t in req_lower)
+
+    return apply_suspicion(current, suspicion_score(data_access_hit, confession_hit, match_count))
+
+def apply_suspicion(current: StateBelief, suspicion: float) -> StateBelief:
+    """Shifts belief mass away from compliant in proportion to the suspicion score."""
     if suspicion == 0:
         return current
         
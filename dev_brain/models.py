@@ -89,6 +89,68 @@ class GraphEdge(BaseModel):
     type: str
     weight: float
 
+class EpochNode(BaseModel):
+    # A run of old frames retired by compaction (see retention), kept as one graph node
+    epoch_id: str
+    first_frame_id: str
+    last_frame_id: str
+    start_timestamp: str
+    end_timestamp: str
+    frame_count: int
+    # decision_id -> suspected violations across the epoch's frames
+    violation_counts: Dict[str, int] = {}
+    # predicted risk type -> occurrences
+    risk_counts: Dict[str, int] = {}
+    # changed file -> frames that touched it
+    file_counts: Dict[str, int] = {}
+    # Edges between two of the epoch's own frames, dropped when it was formed
+    internal_edges: int = 0
+
 class Graph(BaseModel):
     frames: List[FrameSnapshot]
     edges: List[GraphEdge]
+    epochs: List[EpochNode] = []
+
+class GraphHead(BaseModel):
+    frame_count: int
+    last_frame_id: Optional[str] = None
+    journal_entries: int = 0
+    journal_size: int = 0
+    checkpoint_mtime_ns: int = 0
+    checkpoint_size: int = 0
+
+class RuleAggregate(BaseModel):
+    rule_id: str
+    file_count: int = 0
+    compliant_sum: float = 0.0
+    at_risk_sum: float = 0.0
+    violating_sum: float = 0.0
+
+    def means(self) -> StateBelief:
+        if self.file_count == 0:
+            return StateBelief(compliant=0.0, at_risk=0.0, violating=0.0)
+        return StateBelief(
+            compliant=self.compliant_sum / self.file_count,
+            at_risk=self.at_risk_sum / self.file_count,
+            violating=self.violating_sum / self.file_count,
+        )
+
+class RuleIndexEntry(RuleAggregate):
+    # Candidate most-violating files as [file, violating], highest first. Every file
+    # not listed has violating <= top_floor (None means every file is listed).
+    top_violating: List[List[Any]] = []
+    top_floor: Optional[float] = None
+
+class RuleIndex(BaseModel):
+    rule_state_files: int = 0
+    # mtime of the rule_states directory when the index was last brought up to date
+    rule_states_mtime_ns: int = 0
+    rules: Dict[str, RuleIndexEntry] = {}
+
+class SymbolIndex(BaseModel):
+    # mtime of the summaries directory when the index was last brought up to date
+    summaries_mtime_ns: int = 0
+    # Interface view of every summarized file that has one
+    interfaces: Dict[str, InterfaceView] = {}
+    # Class and public-method names -> files defining them (sorted)
+    symbols: Dict[str, List[str]] = {}
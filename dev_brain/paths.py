@@ -1,5 +1,8 @@
-from pathlib import Path
+import hashlib
 import os
+import posixpath
+from pathlib import Path
+from typing import Optional
 
 def get_vault_root() -> Path:
     """Returns the root path of the .dev_brain vault."""
@@ -7,16 +10,52 @@ def get_vault_root() -> Path:
     # For this MVP, we'll assume it's in the CWD.
     return Path(os.getcwd()) / ".dev_brain"
 
+# Per-file artifacts live in one of two layouts. The legacy layout flattens the
+# file path into one name per directory (services/payment.py ->
+# summaries/services_payment.json), so a/b_c.py and a_b/c.py collide. The sharded
+# layout, selected by a layout.json marker in the vault, names each artifact by the
+# SHA-1 of the normalized workspace path, two prefix directories deep
+# (summaries/3f/a2/3fa2....json). See layout for the manifest and the migration.
+
+LAYOUT_FILENAME = "layout.json"
+
+def normalize_path(file_path: str) -> str:
+    """Workspace path with forward slashes and no ./ or .. segments, as hashed by the sharded layout."""
+    return posixpath.normpath(str(file_path).replace("\\", "/"))
+
+def path_hash(file_path: str) -> str:
+    return hashlib.sha1(normalize_path(file_path).encode("utf-8")).hexdigest()
+
+def is_sharded(root: Optional[Path] = None) -> bool:
+    """Whether the vault uses the sharded layout."""
+    return ((root or get_vault_root()) / LAYOUT_FILENAME).exists()
+
+def sharded_path(root: Path, kind: str, file_path: str, suffix: str) -> Path:
+    digest = path_hash(file_path)
+    return root / kind / digest[:2] / digest[2:4] / f"{digest}{suffix}"
+
+def legacy_name(kind: str, file_path: str) -> str:
+    """An artifact's file name in the legacy layout."""
+    flat = str(file_path).replace("/", "_").replace("\\", "_")
+    return f"{flat}.jsonl" if kind == "history" else flat.replace(".py", ".json")
+
+def _artifact_path(kind: str, file_path: str) -> Path:
+    root = get_vault_root()
+    if is_sharded(root):
+        return sharded_path(root, kind, file_path, ".jsonl" if kind == "history" else ".json")
+    return root / kind / legacy_name(kind, file_path)
+
 def summary_path_for(file_path: str) -> Path:
-    """Returns the path to the summary JSON for a given file."""
-    # Convert file path to a safe filename, e.g. services/payment_service.py -> services_payment_service.json
-    safe_name = str(file_path).replace("/", "_").replace("\\", "_").replace(".py", ".json")
-    return get_vault_root() / "summaries" / safe_name
+    """Returns the path to the summary for a given file."""
+    return _artifact_path("summaries", file_path)
 
 def rule_state_path_for(file_path: str) -> Path:
-    """Returns the path to the rule state JSON for a given file."""
-    safe_name = str(file_path).replace("/", "_").replace("\\", "_").replace(".py", ".json")
-    return get_vault_root() / "rule_states" / safe_name
+    """Returns the path to the rule states for a given file."""
+    return _artifact_path("rule_states", file_path)
+
+def history_path_for(file_path: str) -> Path:
+    """Returns the path to the belief history log for a given file."""
+    return _artifact_path("history", file_path)
 
 def decisions_path() -> Path:
     """Returns the path to the decisions.json file."""
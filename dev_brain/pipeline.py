@@ -1,10 +1,21 @@
 from typing import List, Optional, Tuple
+from pydantic import BaseModel
 from . import guardian, composer
+from .vault_io import load_decisions, load_rule_states, load_file_summary
+from .telemetry import timed
+from .retention import frame_number
+
+class CycleEvent(BaseModel):
+    user_request: str
+    target_file: str
+    changed_files: Optional[List[str]] = None
+    token_budget: Optional[int] = None
 
 def run_cycle(
     user_request: str,
     target_file: str,
-    changed_files: Optional[List[str]] = None
+    changed_files: Optional[List[str]] = None,
+    token_budget: Optional[int] = None,
 ) -> Tuple[str, str]:
     """
     High-level orchestration:
@@ -14,23 +25,94 @@ def run_cycle(
     - user_request: natural language description of the dev intent.
     - target_file: path to the main file being edited.
     - changed_files: list of files touched; if None, default to [target_file].
+    - token_budget: token budget for the target source (see composer.build_prompt).
 
     Returns:
         (frame_id, prompt_text)
     """
+    frame_id, result = run_cycle_result(user_request, target_file, changed_files, token_budget)
+    return frame_id, result.prompt
+
+def run_cycle_result(
+    user_request: str,
+    target_file: str,
+    changed_files: Optional[List[str]] = None,
+    token_budget: Optional[int] = None,
+) -> Tuple[str, composer.PromptResult]:
+    """
+    Like run_cycle, returning the composer's PromptResult (prompt plus tokens saved).
+    """
     if changed_files is None:
         changed_files = [target_file]
         
-    # 1. Run Guardian
-    frame_id = guardian.process_change_event(
-        user_goal=user_request,
-        changed_files=changed_files
-    )
-    
-    # 2. Run Composer
-    prompt_text = composer.generate_prompt(
-        user_request=user_request,
-        target_file=target_file
-    )
+    with timed("pipeline.run_cycle"):
+        # 1. Run Guardian
+        frame_id = guardian.process_change_event(
+            user_goal=user_request,
+            changed_files=changed_files
+        )
+        
+        # 2. Run Composer
+        result = composer.generate_prompt_result(
+            user_request=user_request,
+            target_file=target_file,
+            token_budget=token_budget,
+        )
     
-    return frame_id, prompt_text
+    return frame_id, result
+
+def run_cycles(events: List[CycleEvent]) -> List[Tuple[str, str]]:
+    """
+    Batch orchestration for many change events (CI bots, multi-file refactors):
+    shared state is loaded once, events are processed in order with chained frames,
+    and the vault is written in a single pass.
+
+    Each prompt reflects the target file's rule states right after its own event.
+
+    Returns:
+        [(frame_id, prompt_text), ...] in event order
+    """
+    return [(frame_id, result.prompt) for frame_id, result in run_cycles_results(events)]
+
+def run_cycles_results(events: List[CycleEvent]) -> List[Tuple[str, composer.PromptResult]]:
+    """
+    Like run_cycles, returning the composer's PromptResult for each event.
+    """
+    if not events:
+        return []
+
+    # Rule states of every target file as they were before the batch; each event's
+    # prompt then sees the batch's updates up to and including that event.
+    current_rule_states = {}
+    for event in events:
+        if event.target_file not in current_rule_states:
+            current_rule_states[event.target_file] = load_rule_states(event.target_file)
+
+    # 1. Run Guardian over the whole batch
+    results = guardian.process_change_events([
+        guardian.ChangeEvent(
+            user_goal=event.user_request,
+            changed_files=event.changed_files if event.changed_files is not None else [event.target_file]
+        )
+        for event in events
+    ])
+
+    # 2. Run Composer per event against the in-memory state
+    with timed("pipeline.compose_batch"):
+        decisions = load_decisions()
+        outputs = []
+        for event, result in zip(events, results):
+            current_rule_states.update(result.rule_states)
+            prompt_result = composer.build_prompt(
+                user_request=event.user_request,
+                target_file=event.target_file,
+                decisions=decisions,
+                rule_states=current_rule_states.get(event.target_file),
+                file_summary=load_file_summary(event.target_file),
+                token_budget=event.token_budget,
+                # Beliefs as of this event's frame, as run_cycle would show them
+                current_frame=frame_number(result.frame_id),
+            )
+            outputs.append((result.frame_id, prompt_result))
+
+    return outputs
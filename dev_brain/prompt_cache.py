@@ -0,0 +1,118 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from .metrics import rounded_belief
+from .models import Decision, FileSummary, RuleStatesForFile
+
+# Rendered prompt context (target source, dependency block, governance block) only
+# changes when the target file, the summaries its dependencies resolve through, the
+# decisions or the file's rule states change, so the composer memoizes it per
+# version of those inputs and re-renders only the user-request section. The lookup
+# happens before slicing and dependency resolution, so a hit skips both; versions
+# come from digests the vault cache already holds where possible, and rule states
+# are versioned by what the governance block renders, not by when they were updated.
+
+DEFAULT_PROMPT_CACHE_SIZE = 256
+
+
+def _cache_size_from_env() -> int:
+    try:
+        return int(os.environ.get("QDB_PROMPT_CACHE_SIZE", DEFAULT_PROMPT_CACHE_SIZE))
+    except ValueError:
+        return DEFAULT_PROMPT_CACHE_SIZE
+
+
+def _digest(parts: List[str]) -> str:
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def source_digest(source: str) -> str:
+    return _digest([source])
+
+
+_last_decisions: tuple = ((), _digest([]))
+_last_decisions_lock = threading.Lock()
+
+def decisions_digest(decisions: List[Decision]) -> str:
+    """Content hash of the decisions, computed once per set of (read-only, vault-cached) decision objects."""
+    global _last_decisions
+    with _last_decisions_lock:
+        objects, digest = _last_decisions
+    if len(objects) == len(decisions) and all(a is b for a, b in zip(objects, decisions)):
+        return digest
+    digest = _digest([d.model_dump_json() for d in decisions])
+    with _last_decisions_lock:
+        _last_decisions = (tuple(decisions), digest)
+    return digest
+
+
+def rule_state_version(rule_states: Optional[RuleStatesForFile]) -> str:
+    """
+    Hash of what the governance block shows of one file's rule states (rule, rounded
+    belief, entanglement), so re-saving them with only a new last_updated_frame keeps the
+    version ("" when the file has none).
+    """
+    if rule_states is None:
+        return ""
+    parts = []
+    for rs in rule_states.rule_states:
+        sb = rounded_belief(rs.state_belief)
+        parts.append(f"{rs.rule_id}|{sb.compliant}|{sb.at_risk}|{sb.violating}|" + ",".join(rs.entangled_with))
+    return _digest(parts)
+
+
+def summary_version(file_summary: Optional[FileSummary], digest: Optional[str] = None) -> str:
+    """The summary's content digest: digest (e.g. the vault cache's) if known, else hashed here."""
+    if file_summary is None:
+        return ""
+    return digest if digest is not None else _digest([file_summary.model_dump_json()])
+
+
+class PromptCache:
+    """Bounded LRU of rendered prompt sections; a maxsize of 0 disables caching."""
+
+    def __init__(self, maxsize: int = DEFAULT_PROMPT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key: Hashable, render: Callable[[], Any]) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = render()
+        if self.maxsize == 0:
+            return value
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "maxsize": self.maxsize}
+
+
+prompt_cache = PromptCache(_cache_size_from_env())
@@ -0,0 +1,90 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .models import Decision, FileSummary
+
+# Which decisions apply to a file. A decision applies when it is global (a global
+# scope layer, or an amplitude above the threshold) or when its scope layer or topic
+# matches one of the file's governance tags. Tags, layers and topics are compared in
+# a normalized form, so "Data Access", "data-access" and "data_access" match, as do
+# "service" and "service_layer".
+#
+# Files without a summary have no tags to go on, so only the global decisions apply
+# to them. The guardian and the composer's governance block both use this rule.
+
+GLOBAL_SCOPES = {"architecture", "global", "project"}
+DEFAULT_AMPLITUDE_THRESHOLD = 0.8
+
+
+def _amplitude_threshold_from_env() -> float:
+    try:
+        return float(os.environ.get("QDB_RELEVANCE_AMPLITUDE", DEFAULT_AMPLITUDE_THRESHOLD))
+    except ValueError:
+        return DEFAULT_AMPLITUDE_THRESHOLD
+
+
+def normalize_key(value: str) -> str:
+    key = re.sub(r"[^a-z0-9]+", "_", value.lower()).strip("_")
+    if key.endswith("_layer"):
+        key = key[:-len("_layer")]
+    return key
+
+
+class RelevanceIndex:
+    """Inverted index from normalized tags to the positions of the decisions they select."""
+
+    def __init__(self, decisions: List[Decision], amplitude_threshold: float = DEFAULT_AMPLITUDE_THRESHOLD):
+        self.size = len(decisions)
+        self.amplitude_threshold = amplitude_threshold
+        self.global_positions: List[int] = []
+        self.by_key: Dict[str, List[int]] = {}
+        for i, d in enumerate(decisions):
+            layer = normalize_key(d.scope_layer)
+            if layer in GLOBAL_SCOPES or d.amplitude > amplitude_threshold:
+                self.global_positions.append(i)
+                continue
+            for key in {layer, normalize_key(d.topic)}:
+                if key:
+                    self.by_key.setdefault(key, []).append(i)
+
+    def positions_for_tags(self, tags: Optional[Iterable[str]]) -> List[int]:
+        """Positions (in decision order) of the decisions that apply to a file with these tags; None means unknown."""
+        if tags is None:
+            return list(self.global_positions)
+        selected: Set[int] = set(self.global_positions)
+        for tag in tags:
+            selected.update(self.by_key.get(normalize_key(tag), ()))
+        return sorted(selected)
+
+    def positions_for_file(self, file_summary: Optional[FileSummary]) -> List[int]:
+        return self.positions_for_tags(file_summary.governance_tags if file_summary else None)
+
+    def applicable(self, decisions: List[Decision], file_summary: Optional[FileSummary]) -> List[Decision]:
+        """The decisions (the list the index was built for) that apply to a file, in decision order."""
+        return [decisions[i] for i in self.positions_for_file(file_summary)]
+
+
+_INDEX_CACHE_SIZE = 8
+_indexes: "OrderedDict[Tuple, RelevanceIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+def get_relevance_index(decisions: List[Decision], amplitude_threshold: Optional[float] = None) -> RelevanceIndex:
+    """Returns the relevance index for this version of the decisions, building it once."""
+    if amplitude_threshold is None:
+        amplitude_threshold = _amplitude_threshold_from_env()
+    key = (amplitude_threshold,) + tuple((d.id, d.topic, d.scope_layer, d.amplitude) for d in decisions)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+
+    index = RelevanceIndex(decisions, amplitude_threshold)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > _INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
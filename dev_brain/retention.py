@@ -0,0 +1,191 @@
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .models import Decision, EpochNode, FrameSnapshot, GraphEdge, RuleStatesForFile, StateBelief
+from .metrics import initial_state_belief
+from .graph_index import IndexedGraph
+
+# Bounded vault growth for long-lived projects, in two parts.
+#
+# Decay: a decision's Decay.half_life_frames says how fast evidence about it goes
+# stale. Stored beliefs are never rewritten for this; whoever reads a rule state
+# decays it for the frames elapsed since its last_updated_frame, halving its distance
+# from the initial belief every half-life. Decisions without a decay never fade.
+# Decayed beliefs are not rounded: the guardian stores them with a new
+# last_updated_frame, so rounding each one-frame decay would undo it on files touched
+# every frame. They are rounded for display only (metrics.rounded_belief).
+#
+# Retirement: compaction folds the oldest frames, in runs of `epoch_size`, into
+# epoch nodes that keep aggregate violation, risk and file counts. Edges to or from
+# retired frames are rewired to their epoch (weights of edges that merge add up),
+# so causal paths through old history survive. Only frames beyond the newest
+# `keep_frames` are retired; keep_frames=0 (the default) keeps every frame.
+#
+# QDB_RETAIN_FRAMES and QDB_EPOCH_FRAMES set the policy that graph compaction
+# applies on its own.
+
+DEFAULT_RETAIN_FRAMES = 0
+DEFAULT_EPOCH_FRAMES = 100
+
+_FRAME_NUMBER_RE = re.compile(r"(\d+)$")
+
+
+class RetentionPolicy(NamedTuple):
+    keep_frames: int = DEFAULT_RETAIN_FRAMES
+    epoch_size: int = DEFAULT_EPOCH_FRAMES
+
+    @property
+    def enabled(self) -> bool:
+        return self.keep_frames > 0 and self.epoch_size > 0
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def policy_from_env() -> RetentionPolicy:
+    return RetentionPolicy(
+        keep_frames=_env_int("QDB_RETAIN_FRAMES", DEFAULT_RETAIN_FRAMES),
+        epoch_size=_env_int("QDB_EPOCH_FRAMES", DEFAULT_EPOCH_FRAMES),
+    )
+
+
+def frame_number(frame_id: Optional[str]) -> Optional[int]:
+    """The sequence number of an allocated frame ID ("frame_042" -> 42), None for other IDs."""
+    if not frame_id:
+        return None
+    match = _FRAME_NUMBER_RE.search(frame_id)
+    return int(match.group(1)) if match else None
+
+
+# --- Decay -------------------------------------------------------------------
+
+def half_lives(decisions: Iterable[Decision]) -> Dict[str, int]:
+    """rule_id -> half-life in frames, for the decisions that decay."""
+    return {d.id: d.decay.half_life_frames for d in decisions if d.decay and d.decay.half_life_frames > 0}
+
+
+def decay_factor(half_life: int, elapsed_frames: int) -> float:
+    """Share of a belief's distance from the initial belief left after elapsed_frames."""
+    if half_life <= 0 or elapsed_frames <= 0:
+        return 1.0
+    return 0.5 ** (elapsed_frames / half_life)
+
+
+def decay_belief(belief: StateBelief, factor: float) -> StateBelief:
+    """Moves a belief towards the initial belief, keeping `factor` of its distance (as BeliefStore.decay)."""
+    if factor >= 1.0:
+        return belief
+    prior = initial_state_belief()
+    return StateBelief(
+        compliant=prior.compliant + (belief.compliant - prior.compliant) * factor,
+        at_risk=prior.at_risk + (belief.at_risk - prior.at_risk) * factor,
+        violating=prior.violating + (belief.violating - prior.violating) * factor,
+    )
+
+
+def decay_rule_states(
+    rule_states: Optional[RuleStatesForFile],
+    rule_half_lives: Dict[str, int],
+    current_frame: Optional[int],
+    rule_ids: Optional[Set[str]] = None,
+) -> Optional[RuleStatesForFile]:
+    """
+    The rule states as of current_frame (restricted to rule_ids if given). Returns the
+    input object itself when nothing decays; it is never modified.
+    """
+    if rule_states is None or current_frame is None or not rule_half_lives:
+        return rule_states
+    entries = []
+    changed = False
+    for entry in rule_states.rule_states:
+        half_life = rule_half_lives.get(entry.rule_id)
+        updated = frame_number(entry.last_updated_frame)
+        if half_life and updated is not None and (rule_ids is None or entry.rule_id in rule_ids):
+            belief = decay_belief(entry.state_belief, decay_factor(half_life, current_frame - updated))
+            if belief != entry.state_belief:
+                entry = entry.model_copy(update={"state_belief": belief})
+                changed = True
+        entries.append(entry)
+    if not changed:
+        return rule_states
+    return RuleStatesForFile(file=rule_states.file, rule_states=entries)
+
+
+# --- Retirement --------------------------------------------------------------
+
+def _count(counts: Dict[str, int], key: str) -> None:
+    counts[key] = counts.get(key, 0) + 1
+
+
+def summarize_epoch(epoch_id: str, frames: List[FrameSnapshot]) -> EpochNode:
+    """Aggregates a run of frames (in time order) into an epoch node."""
+    epoch = EpochNode(
+        epoch_id=epoch_id,
+        first_frame_id=frames[0].frame_id,
+        last_frame_id=frames[-1].frame_id,
+        start_timestamp=frames[0].timestamp,
+        end_timestamp=frames[-1].timestamp,
+        frame_count=len(frames),
+    )
+    for frame in frames:
+        for violation in frame.suspected_violations:
+            _count(epoch.violation_counts, violation.decision_id)
+        for risk in frame.predicted_risks:
+            _count(epoch.risk_counts, risk.type)
+        for file_path in set(frame.changed_files):
+            _count(epoch.file_counts, file_path)
+    return epoch
+
+
+def retire_frames(graph: IndexedGraph, policy: RetentionPolicy) -> Tuple[IndexedGraph, List[EpochNode]]:
+    """
+    Applies the retention policy. Returns the compacted graph and the epochs it added
+    (the input graph is returned unchanged when nothing is due for retirement).
+    """
+    if not policy.enabled:
+        return graph, []
+    by_time = list(graph.iter_by_time())
+    candidates = by_time[:max(0, len(by_time) - policy.keep_frames)]
+    full = len(candidates) - len(candidates) % policy.epoch_size
+    if full == 0:
+        return graph, []
+
+    epochs: List[EpochNode] = []
+    epoch_of: Dict[str, str] = {}
+    for start in range(0, full, policy.epoch_size):
+        chunk = candidates[start:start + policy.epoch_size]
+        epoch = summarize_epoch(f"epoch_{len(graph.epochs) + len(epochs) + 1:03d}", chunk)
+        epochs.append(epoch)
+        for frame in chunk:
+            epoch_of[frame.frame_id] = epoch.epoch_id
+
+    # Rewire edges onto epochs, merging the ones that now share endpoints and type
+    merged: Dict[Tuple[str, str, str], GraphEdge] = {}
+    internal: Dict[str, int] = {}
+    for edge in graph.edges:
+        source = epoch_of.get(edge.from_frame_id, edge.from_frame_id)
+        target = epoch_of.get(edge.to_frame_id, edge.to_frame_id)
+        if source == target and edge.from_frame_id in epoch_of:
+            internal[source] = internal.get(source, 0) + 1
+            continue
+        key = (source, target, edge.type)
+        if key in merged:
+            merged[key].weight += edge.weight
+        else:
+            merged[key] = GraphEdge(from_frame_id=source, to_frame_id=target, type=edge.type, weight=edge.weight)
+    for epoch in epochs:
+        epoch.internal_edges = internal.get(epoch.epoch_id, 0)
+
+    compacted = IndexedGraph()
+    compacted.epochs = graph.epochs + epochs
+    for frame in graph.frames:
+        if frame.frame_id not in epoch_of:
+            compacted.add_frame(frame)
+    for edge in merged.values():
+        compacted.add_graph_edge(edge)
+    return compacted, epochs
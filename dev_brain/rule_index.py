@@ -0,0 +1,119 @@
+import heapq
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import RuleIndex, RuleIndexEntry, RuleStatesForFile
+from . import codec, layout
+
+# Materialized per-rule aggregates for the JSON vault (.dev_brain/rule_index.json).
+# Saving a file's rule states applies the difference between its old and new entries,
+# so `brain_cli status` and `brain_cli rules` read one small file instead of every
+# rule-state file.
+#
+# Top violating files are kept as a bounded candidate pool per rule plus a floor:
+# every file outside the pool has a violating belief <= floor. The top N is known as
+# long as N pool entries are at or above the floor; otherwise the index is rebuilt.
+
+INDEX_FILENAME = "rule_index.json"
+TOP_N = 5
+POOL_SIZE = 4 * TOP_N
+
+def index_path(root: Path) -> Path:
+    return root / INDEX_FILENAME
+
+def rule_states_mtime_ns(root: Path, fresh: bool = False) -> int:
+    return layout.artifacts_stamp(root, "rule_states", fresh)
+
+def load_index(root: Path, fresh: bool = False) -> Optional[RuleIndex]:
+    """
+    Returns the stored index, or None if it is missing, unreadable or out of date.
+    fresh=True also notices external edits made within the shard listing's lifetime (see layout).
+    """
+    try:
+        with open(index_path(root), 'rb') as f:
+            index = codec.decode(f.read(), RuleIndex)
+    except (FileNotFoundError, ValueError):
+        return None
+    # Rule-state files written or removed behind the index's back (manual edits, checkouts)
+    if not layout.stamp_is_current(root, "rule_states", index.rule_states_mtime_ns, fresh):
+        return None
+    return index
+
+def save_index(root: Path, index: RuleIndex, write, fmt: Optional[str] = None) -> None:
+    index.rule_states_mtime_ns = rule_states_mtime_ns(root)
+    write(index_path(root), codec.encode(index, fmt or codec.index_format()))
+
+def _max_violating(rs_obj: RuleStatesForFile) -> Dict[str, float]:
+    values: Dict[str, float] = {}
+    for entry in rs_obj.rule_states:
+        values[entry.rule_id] = max(values.get(entry.rule_id, 0.0), entry.state_belief.violating)
+    return values
+
+def _update_pool(entry: RuleIndexEntry, file_path: str, value: Optional[float]) -> None:
+    pool = {f: v for f, v in entry.top_violating if f != file_path}
+    if value is not None and (entry.top_floor is None or value > entry.top_floor):
+        pool[file_path] = value
+    ranked = sorted(pool.items(), key=lambda item: (-item[1], item[0]))
+    for _, evicted in ranked[POOL_SIZE:]:
+        entry.top_floor = evicted if entry.top_floor is None else max(entry.top_floor, evicted)
+    entry.top_violating = [[f, v] for f, v in ranked[:POOL_SIZE]]
+
+def _add_sums(index: RuleIndex, rs_obj: RuleStatesForFile, sign: int) -> None:
+    for e in rs_obj.rule_states:
+        agg = index.rules.get(e.rule_id)
+        if agg is None:
+            agg = index.rules[e.rule_id] = RuleIndexEntry(rule_id=e.rule_id)
+        agg.file_count += sign
+        agg.compliant_sum += sign * e.state_belief.compliant
+        agg.at_risk_sum += sign * e.state_belief.at_risk
+        agg.violating_sum += sign * e.state_belief.violating
+
+def apply_change(
+    index: RuleIndex,
+    file_path: str,
+    old: Optional[RuleStatesForFile],
+    new: Optional[RuleStatesForFile],
+    existed: bool,
+) -> None:
+    """Updates the index in place for one rule-state file going from `old` to `new`."""
+    if not existed:
+        index.rule_state_files += 1
+    if old is not None:
+        _add_sums(index, old, -1)
+    if new is not None:
+        _add_sums(index, new, 1)
+
+    new_values = _max_violating(new) if new else {}
+    touched = set(new_values) | (set(_max_violating(old)) if old else set())
+    for rule_id in touched:
+        agg = index.rules[rule_id]
+        if agg.file_count <= 0:
+            del index.rules[rule_id]
+            continue
+        _update_pool(agg, file_path, new_values.get(rule_id))
+
+def build_index(rule_states: Iterable[RuleStatesForFile], file_count: int) -> RuleIndex:
+    """Computes the index from scratch. file_count counts rule-state files, readable or not."""
+    index = RuleIndex(rule_state_files=file_count)
+    pools: Dict[str, List[Tuple[float, str]]] = {}
+    for rs_obj in rule_states:
+        _add_sums(index, rs_obj, 1)
+        for rule_id, value in _max_violating(rs_obj).items():
+            pool = pools.setdefault(rule_id, [])
+            heapq.heappush(pool, (value, rs_obj.file))
+            if len(pool) > POOL_SIZE:
+                evicted, _ = heapq.heappop(pool)
+                agg = index.rules[rule_id]
+                agg.top_floor = evicted if agg.top_floor is None else max(agg.top_floor, evicted)
+
+    for rule_id, pool in pools.items():
+        ranked = sorted(pool, key=lambda item: (-item[0], item[1]))
+        index.rules[rule_id].top_violating = [[f, v] for v, f in ranked]
+    return index
+
+def top_violating(entry: RuleIndexEntry, n: int = TOP_N) -> Optional[List[Tuple[str, float]]]:
+    """Returns the n most violating files of a rule, or None if the index cannot tell without a rebuild."""
+    known = [(f, v) for f, v in entry.top_violating if entry.top_floor is None or v >= entry.top_floor]
+    if entry.top_floor is not None and len(known) < min(n, entry.file_count):
+        return None
+    return known[:n]
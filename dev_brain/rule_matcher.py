@@ -0,0 +1,120 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+from .models import Decision
+from .metrics import (
+    DATA_ACCESS_TOPIC,
+    DATA_ACCESS_KEYWORDS,
+    CONFESSION_PATTERNS,
+    forbidden_pattern_tokens,
+    suspicion_score,
+)
+
+# The belief heuristic asks, for every decision, which of a few keyword lists and
+# forbidden-pattern tokens occur as substrings of the lowercased request. RuleMatcher
+# compiles every pattern of every decision into one trie-shaped regex, finds the set
+# of patterns present in a single pass over the request, and derives each decision's
+# signals from that set. Results are identical to metrics.update_state_belief_for_request.
+
+class RuleMatch(NamedTuple):
+    match_count: int
+    suspicion: float
+
+def _trie_regex(patterns: List[str]) -> str:
+    """Builds a regex matching the longest of `patterns` that starts at the current position."""
+    trie: Dict = {}
+    for pattern in patterns:
+        node = trie
+        for ch in pattern:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Optional groups are greedy, so longer patterns win over their prefixes
+        return f"(?:{body})?" if terminal else body
+
+    return build(trie)
+
+class RuleMatcher:
+    """Matches a request against all decisions at once."""
+
+    def __init__(self, decisions: List[Decision]):
+        patterns = set(DATA_ACCESS_KEYWORDS) | set(CONFESSION_PATTERNS)
+        self._decision_tokens: List[Tuple[bool, List[str]]] = []
+        for decision in decisions:
+            tokens = forbidden_pattern_tokens(decision)
+            patterns.update(tokens)
+            self._decision_tokens.append((decision.topic.lower() == DATA_ACCESS_TOPIC, tokens))
+
+        patterns.discard("")
+        self._patterns = sorted(patterns)
+        # Every pattern present at a position is a prefix of the longest match there
+        self._prefixes: Dict[str, FrozenSet[str]] = {
+            p: frozenset(p[:i] for i in range(1, len(p) + 1) if p[:i] in patterns)
+            for p in self._patterns
+        }
+        self._regex: Optional[Pattern] = (
+            re.compile(f"(?=({_trie_regex(self._patterns)}))", re.DOTALL) if self._patterns else None
+        )
+
+    def present_patterns(self, req_lower: str) -> FrozenSet[str]:
+        """Returns the set of compiled patterns that occur in an already lowercased request."""
+        if self._regex is None:
+            return frozenset()
+        found = set()
+        for longest in set(self._regex.findall(req_lower)):
+            if longest:
+                found |= self._prefixes[longest]
+        return frozenset(found)
+
+    def scan(self, user_request: str) -> List[RuleMatch]:
+        """Returns a RuleMatch per decision, in the order the matcher was built with."""
+        matches = self.scan_positions(user_request, range(len(self._decision_tokens)))
+        return [matches[i] for i in range(len(self._decision_tokens))]
+
+    def scan_positions(self, user_request: str, positions: Iterable[int]) -> Dict[int, RuleMatch]:
+        """Like scan, for the decisions at the given positions only."""
+        present = self.present_patterns(user_request.lower())
+        data_access_hit = any(kw in present for kw in DATA_ACCESS_KEYWORDS)
+        confession_hit = any(conf in present for conf in CONFESSION_PATTERNS)
+
+        matches = {}
+        for i in positions:
+            is_data_access, tokens = self._decision_tokens[i]
+            match_count = sum(1 for t in tokens if t in present)
+            matches[i] = RuleMatch(
+                match_count=match_count,
+                suspicion=suspicion_score(is_data_access and data_access_hit, confession_hit, match_count),
+            )
+        return matches
+
+
+_MATCHER_CACHE_SIZE = 8
+_matchers: "OrderedDict[Tuple, RuleMatcher]" = OrderedDict()
+_matchers_lock = threading.Lock()
+
+def _decisions_fingerprint(decisions: List[Decision]) -> Tuple:
+    return tuple((d.topic, d.forbidden_pattern) for d in decisions)
+
+def get_matcher(decisions: List[Decision]) -> RuleMatcher:
+    """Returns a compiled matcher for this version of the decisions, reusing earlier compilations."""
+    key = _decisions_fingerprint(decisions)
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is not None:
+            _matchers.move_to_end(key)
+            return matcher
+
+    matcher = RuleMatcher(decisions)
+    with _matchers_lock:
+        _matchers[key] = matcher
+        while len(_matchers) > _MATCHER_CACHE_SIZE:
+            _matchers.popitem(last=False)
+    return matcher
@@ -1,7 +1,12 @@
-from fastapi import FastAPI, HTTPException
+import time
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Optional
-from .pipeline import run_cycle
+from .pipeline import run_cycle_result, run_cycles_results, CycleEvent
+from .prompt_cache import prompt_cache
+from . import telemetry, vault_cache, vault_io, graph_manager, belief_history, graph_query
+from .models import StateBelief
 
 app = FastAPI(title="Dev Brain API")
 
@@ -9,23 +14,198 @@ class RunCycleRequest(BaseModel):
     user_request: str
     target_file: str
     changed_files: Optional[List[str]] = None
+    # Token budget for the target source; None uses QDB_CONTEXT_TOKEN_BUDGET
+    token_budget: Optional[int] = None
 
 class RunCycleResponse(BaseModel):
     frame_id: str
     prompt: str
+    # Estimated tokens removed from the target source by slicing
+    tokens_saved: int = 0
+
+class BatchRunCycleRequest(BaseModel):
+    events: List[RunCycleRequest]
+
+class BatchRunCycleResponse(BaseModel):
+    results: List[RunCycleResponse]
+
+class GraphPathStep(BaseModel):
+    frame_id: str
+    # Type of the edge leading to this frame (None for the source)
+    edge_type: Optional[str] = None
+
+class GraphPathResponse(BaseModel):
+    source: str
+    target: str
+    # None when the target is unreachable
+    path: Optional[List[GraphPathStep]] = None
+
+class GraphFramesResponse(BaseModel):
+    frame_ids: List[str]
+
+class HistoricalBelief(BaseModel):
+    rule_id: str
+    state_belief: StateBelief
+    # Frame that set the belief
+    frame_id: str
+
+class HistoryResponse(BaseModel):
+    file: str
+    at: Optional[str] = None
+    beliefs: List[HistoricalBelief]
+
+@app.middleware("http")
+async def count_requests(request: Request, call_next):
+    if not telemetry.enabled():
+        return await call_next(request)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        _record_request(request, time.perf_counter() - start, failed=True)
+        raise
+    _record_request(request, time.perf_counter() - start, failed=response.status_code >= 500)
+    return response
+
+def _record_request(request: Request, seconds: float, failed: bool) -> None:
+    # Label by route template rather than raw path to keep the series bounded
+    route = request.scope.get("route")
+    endpoint = f"{request.method} {route.path if route else 'unmatched'}"
+    telemetry.requests_total.inc(endpoint)
+    telemetry.request_seconds.observe(endpoint, seconds)
+    if failed:
+        telemetry.request_errors_total.inc(endpoint)
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    caches = {
+        "decisions": vault_cache.decisions_cache.stats(),
+        "summary": vault_cache.summary_cache.stats(),
+        "rule_state": vault_cache.rule_state_cache.stats(),
+        "frame": vault_cache.frame_cache.stats(),
+        "prompt": prompt_cache.stats(),
+    }
+    # Only values this process already holds: a scrape never rebuilds an index,
+    # replays the graph or counts as a cache lookup
+    items = {}
+    decision_count = vault_io.known_decision_count()
+    if decision_count is not None:
+        items["decisions"] = decision_count
+    index = vault_io.last_rule_index()
+    if index is not None:
+        items["rule_state_files"] = index.rule_state_files
+    head = graph_manager.last_known_head()
+    if head is not None:
+        items["frames"] = head.frame_count
+        items["graph_journal_entries"] = head.journal_entries
+    lines = []
+    lines += telemetry.render_gauges("devbrain_vault_items", "Number of items in the vault (as last seen).", "kind", items)
+    lines += telemetry.render_counters("devbrain_cache_hits_total", "Cache hits since start.", "cache",
+                                       {name: s["hits"] for name, s in caches.items()})
+    lines += telemetry.render_counters("devbrain_cache_misses_total", "Cache misses since start.", "cache",
+                                       {name: s["misses"] for name, s in caches.items()})
+    lines += telemetry.render_gauges("devbrain_cache_hit_ratio", "Cache hits / lookups since start.", "cache", {
+        name: s["hits"] / (s["hits"] + s["misses"]) if s["hits"] + s["misses"] else 0.0
+        for name, s in caches.items()
+    })
+    return PlainTextResponse(telemetry.render_metrics(lines), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {"prompt": prompt_cache.stats()}
+
 @app.post("/run-cycle", response_model=RunCycleResponse)
 def run_cycle_endpoint(request: RunCycleRequest):
     try:
-        frame_id, prompt = run_cycle(
+        frame_id, result = run_cycle_result(
             user_request=request.user_request,
             target_file=request.target_file,
             changed_files=request.changed_files,
+            token_budget=request.token_budget,
         )
-        return RunCycleResponse(frame_id=frame_id, prompt=prompt)
+        return RunCycleResponse(frame_id=frame_id, prompt=result.prompt, tokens_saved=result.tokens_saved)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/run-cycle/batch", response_model=BatchRunCycleResponse)
+def run_cycle_batch_endpoint(request: BatchRunCycleRequest):
+    try:
+        outputs = run_cycles_results([
+            CycleEvent(
+                user_request=event.user_request,
+                target_file=event.target_file,
+                changed_files=event.changed_files,
+                token_budget=event.token_budget,
+            )
+            for event in request.events
+        ])
+        return BatchRunCycleResponse(results=[
+            RunCycleResponse(frame_id=frame_id, prompt=result.prompt, tokens_saved=result.tokens_saved)
+            for frame_id, result in outputs
+        ])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/history", response_model=HistoryResponse)
+def history_endpoint(file: str, rule: Optional[str] = None, at: Optional[str] = None):
+    """Rule-state beliefs of a file as of frame `at` (default: latest), rebuilt from the belief history."""
+    try:
+        state = belief_history.state_at(file, at)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    beliefs = [
+        HistoricalBelief(rule_id=b.rule_id, state_belief=b.state_belief, frame_id=b.frame_id)
+        for rule_id, b in sorted(state.items())
+        if rule is None or rule_id == rule
+    ]
+    return HistoryResponse(file=file, at=at, beliefs=beliefs)
+
+# Read-only causal graph queries (see graph_query); edge_type may be repeated
+
+@app.get("/graph/path", response_model=GraphPathResponse)
+def graph_path_endpoint(
+    source: str,
+    target: str,
+    edge_type: Optional[List[str]] = Query(None),
+    max_depth: Optional[int] = None,
+):
+    with graph_manager.shared_graph() as graph:
+        path = graph_query.shortest_path(graph, source, target, edge_type, max_depth)
+    return GraphPathResponse(
+        source=source,
+        target=target,
+        path=None if path is None else [GraphPathStep(frame_id=f, edge_type=t) for f, t in path],
+    )
+
+@app.get("/graph/frames/{frame_id}/ancestors", response_model=GraphFramesResponse)
+def graph_ancestors_endpoint(frame_id: str, depth: Optional[int] = 3, edge_type: Optional[List[str]] = Query(None), limit: int = 100):
+    with graph_manager.shared_graph() as graph:
+        return GraphFramesResponse(frame_ids=graph_query.ancestors(graph, frame_id, depth, edge_type, limit))
+
+@app.get("/graph/frames/{frame_id}/descendants", response_model=GraphFramesResponse)
+def graph_descendants_endpoint(frame_id: str, depth: Optional[int] = 3, edge_type: Optional[List[str]] = Query(None), limit: int = 100):
+    with graph_manager.shared_graph() as graph:
+        return GraphFramesResponse(frame_ids=graph_query.descendants(graph, frame_id, depth, edge_type, limit))
+
+@app.get("/graph/touching", response_model=GraphFramesResponse)
+def graph_touching_endpoint(
+    file: Optional[str] = None,
+    rule: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    window: Optional[str] = None,
+    limit: Optional[int] = None,
+):
+    """Frames that changed `file` and/or evaluated `rule` in [start, end], or in `window` (e.g. 24h) up to the latest frame; the most recent `limit`."""
+    with graph_manager.shared_graph() as graph:
+        try:
+            if window:
+                start = graph_query.window_start(graph, window)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        frame_ids = graph_query.frames_touching(graph, file, rule, start, end)
+    return GraphFramesResponse(frame_ids=frame_ids[-limit:] if limit else frame_ids)
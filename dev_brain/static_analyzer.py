@@ -0,0 +1,270 @@
+import ast
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .models import FileSummary, Lenses, InterfaceView, LogicView, DataView
+from .codex_brain import hash_source
+
+# Local, offline summarizer: fills the interface view, the data view (file, network,
+# database, subprocess and environment access detected by call patterns) and
+# heuristic governance tags from the AST, with no LLM round trip. The logic view is
+# only a sketch (public entry points and the exceptions they raise); the hybrid
+# ingest engine asks the LLM to replace it.
+
+# Calls recognized by their dotted name (or its last component for methods)
+NETWORK_MODULES = ("requests", "httpx", "aiohttp", "urllib", "http.client", "socket", "grpc", "boto3")
+HTTP_READ_METHODS = {"get", "head", "options", "urlopen"}
+HTTP_WRITE_METHODS = {"post", "put", "patch", "delete"}
+DB_MODULES = ("sqlite3", "psycopg2", "pymysql", "sqlalchemy", "pymongo", "redis")
+DB_EXECUTE_METHODS = {"execute", "executemany", "executescript"}
+DB_SESSION_WRITE_METHODS = {"commit", "add", "add_all", "bulk_save_objects", "insert_one", "insert_many", "update_one", "delete_one"}
+DB_SESSION_READ_METHODS = {"query", "fetchone", "fetchall", "fetchmany", "find_one"}
+FILE_READ_CALLS = {"read_text", "read_bytes", "json.load", "yaml.safe_load", "pickle.load", "csv.reader"}
+FILE_WRITE_CALLS = {"write_text", "write_bytes", "json.dump", "yaml.dump", "pickle.dump", "csv.writer",
+                    "os.remove", "os.unlink", "os.rename", "os.replace", "shutil.copy", "shutil.move", "shutil.rmtree"}
+SUBPROCESS_CALLS = {"subprocess.run", "subprocess.Popen", "subprocess.call", "subprocess.check_call",
+                    "subprocess.check_output", "os.system", "os.popen"}
+ENV_CALLS = {"os.getenv", "os.environ.get"}
+SQL_WRITE_KEYWORDS = ("INSERT", "UPDATE", "DELETE", "CREATE", "DROP", "ALTER", "REPLACE")
+
+# Path fragment -> governance tag
+PATH_TAGS = [
+    ("service", "service_layer"),
+    ("repositor", "data_access"),
+    ("dao", "data_access"),
+    ("model", "domain"),
+    ("schema", "domain"),
+    ("controller", "api_layer"),
+    ("route", "api_layer"),
+    ("view", "api_layer"),
+    ("api", "api_layer"),
+    ("handler", "api_layer"),
+    ("config", "configuration"),
+    ("setting", "configuration"),
+    ("migration", "data_access"),
+    ("test", "tests"),
+    ("util", "utility"),
+    ("cli", "cli"),
+]
+
+
+def _dotted_name(node: ast.AST) -> Optional[str]:
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+    elif isinstance(node, ast.Call):
+        # e.g. sqlite3.connect(...).execute(...) -> "<call>.execute"
+        parts.append("<call>")
+    else:
+        return None
+    return ".".join(reversed(parts))
+
+
+def _string_arg(call: ast.Call, index: int = 0) -> Optional[str]:
+    if len(call.args) > index and isinstance(call.args[index], ast.Constant) and isinstance(call.args[index].value, str):
+        return call.args[index].value
+    return None
+
+
+def _open_mode(call: ast.Call) -> str:
+    mode = _string_arg(call, 1)
+    for kw in call.keywords:
+        if kw.arg == "mode" and isinstance(kw.value, ast.Constant) and isinstance(kw.value.value, str):
+            mode = kw.value.value
+    return mode or "r"
+
+
+def _add(items: List[str], value: str) -> None:
+    if value not in items:
+        items.append(value)
+
+
+class _Visitor(ast.NodeVisitor):
+    def __init__(self):
+        self.imports: Dict[str, str] = {}  # local alias -> module
+        self.data = DataView(reads_from=[], writes_to=[], side_effects=[])
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.imports[(alias.asname or alias.name).split(".")[0]] = alias.name
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        for alias in node.names:
+            self.imports[alias.asname or alias.name] = f"{node.module or ''}.{alias.name}".lstrip(".")
+
+    def _module_of(self, name: str) -> str:
+        head, _, rest = name.partition(".")
+        module = self.imports.get(head, head)
+        return f"{module}.{rest}" if rest else module
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if _dotted_name(node) == "os.environ":
+            _add(self.data.reads_from, "environment")
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        name = _dotted_name(node.func)
+        if name:
+            self._classify(name, node)
+        self.generic_visit(node)
+
+    def _classify(self, name: str, call: ast.Call) -> None:
+        full = self._module_of(name)
+        method = name.rsplit(".", 1)[-1]
+        data = self.data
+
+        if name == "open" or full == "io.open":
+            target = f"file:{_string_arg(call) or '?'}"
+            mode = _open_mode(call)
+            _add(data.writes_to if any(c in mode for c in "wax+") else data.reads_from, target)
+        elif method in FILE_READ_CALLS or full in FILE_READ_CALLS:
+            _add(data.reads_from, "filesystem")
+        elif method in FILE_WRITE_CALLS or full in FILE_WRITE_CALLS:
+            _add(data.writes_to, "filesystem")
+        elif full in SUBPROCESS_CALLS:
+            _add(data.side_effects, f"subprocess: {full}")
+        elif full in ENV_CALLS:
+            _add(data.reads_from, "environment")
+        elif full.startswith(NETWORK_MODULES):
+            if method in HTTP_READ_METHODS:
+                _add(data.reads_from, f"network: {full}")
+            elif method in HTTP_WRITE_METHODS:
+                _add(data.writes_to, f"network: {full}")
+            else:
+                _add(data.side_effects, f"network: {full}")
+        elif full.startswith(DB_MODULES) and method == "connect":
+            _add(data.side_effects, f"database connection: {full}")
+        elif method in DB_EXECUTE_METHODS:
+            sql = (_string_arg(call) or "").lstrip().upper()
+            if sql.startswith("SELECT") or sql.startswith("WITH"):
+                _add(data.reads_from, "database")
+            elif sql.startswith(SQL_WRITE_KEYWORDS):
+                _add(data.writes_to, "database")
+            else:
+                _add(data.side_effects, "database: execute")
+        elif method in DB_SESSION_READ_METHODS and "." in name:
+            _add(data.reads_from, "database")
+        elif method in DB_SESSION_WRITE_METHODS and "." in name and "session" in name.lower():
+            _add(data.writes_to, "database")
+
+
+def _interface(tree: ast.Module) -> InterfaceView:
+    classes, methods, dependencies = [], [], []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            classes.append(node.name)
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and not item.name.startswith("_"):
+                    _add(methods, item.name)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and not node.name.startswith("_"):
+            _add(methods, node.name)
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if alias.name != "*":
+                    _add(dependencies, alias.name)
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                _add(dependencies, alias.name)
+    return InterfaceView(classes=classes, public_methods=methods, dependencies=dependencies)
+
+
+def _logic_sketch(tree: ast.Module) -> LogicView:
+    flow, branches = [], []
+    entry_points = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            entry_points.extend((f"{node.name}.{item.name}", item) for item in node.body
+                                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and not item.name.startswith("_"))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and not node.name.startswith("_"):
+            entry_points.append((node.name, node))
+
+    for qualified, func in entry_points:
+        flow.append(qualified)
+        for sub in ast.walk(func):
+            if isinstance(sub, ast.Raise) and sub.exc is not None:
+                exc = sub.exc.func if isinstance(sub.exc, ast.Call) else sub.exc
+                exc_name = _dotted_name(exc)
+                if exc_name:
+                    _add(branches, f"{qualified} raises {exc_name}")
+    return LogicView(flow=flow, critical_branches=branches)
+
+
+def governance_tags_for(file_key: str, interface: InterfaceView, data: DataView) -> List[str]:
+    tags: List[str] = []
+    lowered = file_key.lower()
+    stem_parts = Path(lowered).parts[-3:]
+    for fragment, tag in PATH_TAGS:
+        if any(fragment in part for part in stem_parts):
+            _add(tags, tag)
+    effects = data.reads_from + data.writes_to + data.side_effects
+    if any(e == "database" or e.startswith("database") for e in effects):
+        _add(tags, "data_access")
+    if any(e.startswith("network") for e in effects):
+        _add(tags, "infrastructure")
+    if any(e.startswith("file:") or e == "filesystem" for e in effects):
+        _add(tags, "filesystem")
+    if any(e.startswith("subprocess") for e in effects):
+        _add(tags, "infrastructure")
+    if "environment" in data.reads_from:
+        _add(tags, "configuration")
+    return tags
+
+
+def analyze_source(source: str, file_key: str) -> FileSummary:
+    """Builds a FileSummary for Python source. Raises SyntaxError if it does not parse."""
+    tree = ast.parse(source)
+    visitor = _Visitor()
+    visitor.visit(tree)
+    interface = _interface(tree)
+    return FileSummary(
+        file=file_key,
+        hash=hash_source(source),
+        lenses=Lenses(interface_view=interface, logic_view=_logic_sketch(tree), data_view=visitor.data),
+        governance_tags=governance_tags_for(file_key, interface, visitor.data),
+    )
+
+
+def analyze_file(file_path: Path) -> FileSummary:
+    """Summarizes one file; the vault key is its path as given (like the LLM engine)."""
+    source = file_path.read_text(encoding="utf-8")
+    return analyze_source(source, file_path.as_posix())
+
+
+class AnalysisResult(NamedTuple):
+    path: Path
+    summary: Optional[FileSummary]
+    error: Optional[str]
+
+
+def _analyze_path(path: Path) -> Tuple[Path, Optional[dict], Optional[str]]:
+    # Runs in worker processes; summaries travel back as plain dicts
+    try:
+        return path, analyze_file(path).model_dump(), None
+    except (OSError, UnicodeDecodeError, SyntaxError, ValueError) as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def analyze_files(file_paths: Iterable[Path], processes: Optional[int] = None) -> Iterator[AnalysisResult]:
+    """
+    Analyzes files across a process pool (processes=None uses every CPU; 1 runs
+    in-process). Results are yielded in input order.
+    """
+    paths = list(file_paths)
+    processes = processes or os.cpu_count() or 1
+    if processes <= 1 or len(paths) < 2:
+        results = map(_analyze_path, paths)
+        for path, data, error in results:
+            yield AnalysisResult(path, FileSummary(**data) if data else None, error)
+        return
+
+    chunksize = max(1, len(paths) // (processes * 8))
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for path, data, error in executor.map(_analyze_path, paths, chunksize=chunksize):
+            yield AnalysisResult(path, FileSummary(**data) if data else None, error)
@@ -0,0 +1,158 @@
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .models import FileSummary, InterfaceView, SymbolIndex
+from .paths import normalize_path
+from .vault_cache import symbol_index_cache
+from . import codec, layout
+
+# Symbol -> file resolution for the composer's dependency views
+# (.dev_brain/symbol_index.json). Every class and public method named in a summary's
+# interface view maps to the files defining it, and each file's interface view is
+# stored alongside, so a dependency is resolved with two dict lookups instead of a
+# scan of the summaries directory. Saving or deleting a summary updates the index in
+# place; it is rebuilt when the summaries directory changed behind its back.
+
+INDEX_FILENAME = "symbol_index.json"
+
+
+class ResolvedDependency(NamedTuple):
+    symbol: str
+    file: Optional[str]
+    interface: Optional[InterfaceView]
+    depth: int
+    via: Optional[str]
+
+
+def index_path(root: Path) -> Path:
+    return root / INDEX_FILENAME
+
+def summaries_mtime_ns(root: Path, fresh: bool = False) -> int:
+    return layout.artifacts_stamp(root, "summaries", fresh)
+
+def _parse(data) -> SymbolIndex:
+    return codec.decode(data, SymbolIndex)
+
+def load_index(root: Path, cached: bool = True) -> Optional[SymbolIndex]:
+    """
+    Returns the stored index, or None if it is missing, unreadable or out of date.
+    The cached copy is shared between callers; pass cached=False to get one to modify.
+    """
+    path = index_path(root)
+    try:
+        if cached:
+            index = symbol_index_cache.get(path, _parse)
+        else:
+            with open(path, "rb") as f:
+                index = _parse(f.read())
+    except (FileNotFoundError, ValueError):
+        return None
+    if index is None or not layout.stamp_is_current(root, "summaries", index.summaries_mtime_ns):
+        return None
+    return index
+
+def save_index(root: Path, index: SymbolIndex, write, fmt: Optional[str] = None) -> None:
+    index.summaries_mtime_ns = summaries_mtime_ns(root)
+    path = index_path(root)
+    data = codec.encode(index, fmt or codec.index_format())
+    write(path, data)
+    symbol_index_cache.put(path, index, data)
+
+def symbols_of(interface: Optional[InterfaceView]) -> Set[str]:
+    if interface is None:
+        return set()
+    return set(interface.classes) | set(interface.public_methods)
+
+def apply_change(index: SymbolIndex, file_path: str, summary: Optional[FileSummary]) -> None:
+    """Updates the index in place for one file's summary being saved (or deleted, with None)."""
+    for symbol in symbols_of(index.interfaces.pop(file_path, None)):
+        files = [f for f in index.symbols.get(symbol, []) if f != file_path]
+        if files:
+            index.symbols[symbol] = files
+        else:
+            index.symbols.pop(symbol, None)
+
+    interface = summary.lenses.interface_view if summary else None
+    if interface is None:
+        return
+    index.interfaces[file_path] = interface
+    for symbol in symbols_of(interface):
+        index.symbols[symbol] = sorted(set(index.symbols.get(symbol, [])) | {file_path})
+
+def build_index(summaries: Iterable[FileSummary]) -> SymbolIndex:
+    """Computes the index from scratch."""
+    index = SymbolIndex()
+    for summary in summaries:
+        interface = summary.lenses.interface_view
+        if interface is None:
+            continue
+        index.interfaces[summary.file] = interface
+        for symbol in symbols_of(interface):
+            index.symbols.setdefault(symbol, []).append(summary.file)
+    for symbol, files in index.symbols.items():
+        files.sort()
+    return index
+
+def resolve(index: SymbolIndex, symbol: str) -> Optional[str]:
+    """Returns the file defining symbol, preferring a class of that name over a method."""
+    files = index.symbols.get(symbol)
+    if not files:
+        return None
+    for file_path in files:
+        if symbol in index.interfaces[file_path].classes:
+            return file_path
+    return files[0]
+
+def lookup(index: SymbolIndex, symbols: Iterable[str]) -> Dict[str, Tuple[str, InterfaceView]]:
+    """Resolves each known symbol to (file, interface view)."""
+    found = {}
+    for symbol in symbols:
+        file_path = resolve(index, symbol)
+        if file_path is not None:
+            found[symbol] = (file_path, index.interfaces[file_path])
+    return found
+
+def _file_key(file_path: str) -> str:
+    # Summaries may be keyed by absolute paths (codex_ingest) while callers pass
+    # workspace-relative ones, so files are compared as absolute, normalized paths
+    return normalize_path(os.path.abspath(file_path))
+
+def resolve_dependencies(
+    lookup_symbols: Callable[[List[str]], Dict[str, Tuple[str, InterfaceView]]],
+    dependencies: List[str],
+    depth: int = 1,
+    exclude: Optional[str] = None,
+) -> List[ResolvedDependency]:
+    """
+    Resolves dependency names breadth-first with one batched lookup per level,
+    following the dependencies of resolved files up to `depth` levels. Each file is
+    listed once and `exclude` (the target file) never is. Names that cannot be
+    resolved are returned with file=None.
+    """
+    resolved: List[ResolvedDependency] = []
+    seen_files = {_file_key(exclude)} if exclude else set()
+    seen_symbols: Set[str] = set()
+    level = [(dep, None) for dep in dependencies]
+    for current in range(1, depth + 1):
+        pending = []
+        for symbol, via in level:
+            if symbol not in seen_symbols:
+                seen_symbols.add(symbol)
+                pending.append((symbol, via))
+        if not pending:
+            break
+        found = lookup_symbols([symbol for symbol, _ in pending])
+        next_level = []
+        for symbol, via in pending:
+            if symbol not in found:
+                resolved.append(ResolvedDependency(symbol, None, None, current, via))
+                continue
+            file_path, interface = found[symbol]
+            if _file_key(file_path) in seen_files:
+                continue
+            seen_files.add(_file_key(file_path))
+            resolved.append(ResolvedDependency(symbol, file_path, interface, current, via))
+            next_level.extend((dep, symbol) for dep in interface.dependencies)
+        level = next_level
+    return resolved
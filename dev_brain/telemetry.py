@@ -0,0 +1,161 @@
+import bisect
+import contextlib
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# In-process metrics for the hot path: per-stage latency histograms and labelled
+# counters, rendered in the Prometheus text format by the API server's /metrics.
+# Set QDB_METRICS=0 to disable; timed() then returns a shared no-op context manager.
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = os.environ.get("QDB_METRICS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(value: bool) -> None:
+    global _enabled
+    _enabled = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values (seconds), per label value."""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._series: Dict[str, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                # per-bucket counts (+Inf last), count, sum
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def snapshot(self) -> Dict[str, Tuple[List[int], int, float]]:
+        with self._lock:
+            return {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for label_value, (counts, count, total) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f'{self.name}_bucket{{{self.label}="{_escape(label_value)}",le="{le}"}} {cumulative}'
+            yield f'{self.name}_sum{{{self.label}="{_escape(label_value)}"}} {total}'
+            yield f'{self.name}_count{{{self.label}="{_escape(label_value)}"}} {count}'
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    """Monotonic counter per label value."""
+
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def value(self, label_value: str) -> float:
+        with self._lock:
+            return self._values.get(label_value, 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_value, value in items:
+            yield f'{self.name}{{{self.label}="{_escape(label_value)}"}} {value}'
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+stage_seconds = Histogram("devbrain_stage_seconds", "Time spent in each pipeline stage.", "stage")
+request_seconds = Histogram("devbrain_request_seconds", "HTTP request latency.", "endpoint")
+requests_total = Counter("devbrain_requests_total", "HTTP requests handled.", "endpoint")
+request_errors_total = Counter("devbrain_request_errors_total", "HTTP requests that failed with a 5xx status.", "endpoint")
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        stage_seconds.observe(self.stage, time.perf_counter() - self.start)
+
+
+_NOOP = contextlib.nullcontext()
+
+def timed(stage: str):
+    """Context manager recording the block's duration under `stage`; a no-op when metrics are disabled."""
+    return _Timer(stage) if _enabled else _NOOP
+
+
+def _render_values(name: str, help_text: str, kind: str, label: Optional[str], values: Dict[str, float]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for label_value, value in sorted(values.items()):
+        if label is None:
+            lines.append(f"{name} {value}")
+        else:
+            lines.append(f'{name}{{{label}="{_escape(label_value)}"}} {value}')
+    return lines
+
+
+def render_gauges(name: str, help_text: str, label: Optional[str], values: Dict[str, float]) -> List[str]:
+    """Renders point-in-time values (computed at scrape time) as a Prometheus gauge."""
+    return _render_values(name, help_text, "gauge", label, values)
+
+
+def render_counters(name: str, help_text: str, label: Optional[str], values: Dict[str, float]) -> List[str]:
+    """Renders monotonic totals kept elsewhere (e.g. cache stats) as a Prometheus counter."""
+    return _render_values(name, help_text, "counter", label, values)
+
+
+def render_metrics(extra_lines: Iterable[str] = ()) -> str:
+    lines: List[str] = []
+    for metric in (stage_seconds, request_seconds, requests_total, request_errors_total):
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    for metric in (stage_seconds, request_seconds, requests_total, request_errors_total):
+        metric.reset()
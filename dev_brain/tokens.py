@@ -0,0 +1,12 @@
+import math
+
+# Rough characters-per-token ratio for English prose and source code with
+# cl100k/o200k-style BPE vocabularies. Good enough for budgeting and rate
+# limiting; no tokenizer dependency or network access is needed.
+CHARS_PER_TOKEN = 4.0
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of LLM tokens in text."""
+    if not text:
+        return 0
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
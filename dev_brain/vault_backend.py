@@ -0,0 +1,843 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from .models import Decision, FileSummary, Graph, InterfaceView, RuleStatesForFile, RuleStateEntry, StateBelief, FrameSnapshot, RuleAggregate, RuleIndex, RuleIndexEntry, SymbolIndex
+from .paths import decisions_path, summary_path_for, rule_state_path_for, get_vault_root
+from .vault_cache import VaultCache, content_digest, decisions_cache, summary_cache, rule_state_cache, frame_cache, symbol_index_cache
+from .locking import get_lock
+from . import codec, layout, rule_index, symbol_index
+
+SQLITE_FILENAME = "vault.sqlite3"
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Writes data to path via a temporary file so readers never see a partial file."""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    for attempt in range(10):
+        try:
+            os.replace(tmp_path, path)
+            return
+        except PermissionError:
+            # Windows refuses to replace a file another process has open; retry briefly
+            if attempt == 9:
+                raise
+            time.sleep(0.01 * (attempt + 1))
+
+_decision_list = TypeAdapter(List[Decision])
+
+def _parse_decisions(data) -> List[Decision]:
+    return _decision_list.validate_json(data)
+
+def _parse_summary(data) -> FileSummary:
+    return codec.decode(data, FileSummary)
+
+def _parse_rule_states(data) -> RuleStatesForFile:
+    return codec.decode(data, RuleStatesForFile)
+
+def _parse_frame(data) -> FrameSnapshot:
+    return codec.decode(data, FrameSnapshot)
+
+def _load_cached(cache: VaultCache, path: Path, parse: Callable, label: str):
+    try:
+        return cache.get(path, parse)
+    except (ValueError, IOError) as e:
+        print(f"Error loading {label} from {path}: {e}")
+        return None
+
+def load_summary_file(path: Path) -> Optional[FileSummary]:
+    """Loads a summary file in the vault layout (any vault format)."""
+    return _load_cached(summary_cache, path, _parse_summary, "summary")
+
+def load_rule_states_file(path: Path) -> Optional[RuleStatesForFile]:
+    """Loads a rule-state file in the vault layout (any vault format)."""
+    return _load_cached(rule_state_cache, path, _parse_rule_states, "rule states")
+
+
+class VaultBackend(ABC):
+    """Storage engine for decisions, summaries, rule states and frames."""
+
+    name = "abstract"
+    # The rule index as last loaded or updated by this process (see last_rule_index)
+    last_rule_index: Optional[RuleIndex] = None
+
+    @abstractmethod
+    def load_decisions(self) -> List[Decision]: ...
+
+    @abstractmethod
+    def save_decisions(self, decisions: List[Decision]) -> None: ...
+
+    @abstractmethod
+    def known_decision_count(self) -> Optional[int]:
+        """Number of decisions if known without parsing them or counting a cache lookup."""
+
+    @abstractmethod
+    def load_file_summary(self, file_path: str) -> Optional[FileSummary]: ...
+
+    @abstractmethod
+    def save_file_summary(self, summary: FileSummary) -> Path: ...
+
+    @abstractmethod
+    def delete_file_summary(self, file_path: str) -> bool: ...
+
+    @abstractmethod
+    def iter_file_summaries(self) -> Iterator[FileSummary]: ...
+
+    def summary_digest(self, file_path: str, summary: FileSummary) -> Optional[str]:
+        """Content digest of a summary this backend returned, if it has one at hand."""
+        return None
+
+    @abstractmethod
+    def symbols_version(self) -> str:
+        """Changes whenever symbol resolution (lookup_symbols) may give different results."""
+
+    @abstractmethod
+    def load_rule_states(self, file_path: str) -> Optional[RuleStatesForFile]: ...
+
+    @abstractmethod
+    def save_rule_states(self, rule_states: RuleStatesForFile) -> None: ...
+
+    @abstractmethod
+    def save_rule_states_many(self, rule_states: Iterable[RuleStatesForFile]) -> None: ...
+
+    @abstractmethod
+    def iter_rule_states(self) -> Iterator[RuleStatesForFile]: ...
+
+    @abstractmethod
+    def count_rule_state_files(self) -> int: ...
+
+    @abstractmethod
+    def rule_aggregates(self) -> Dict[str, RuleAggregate]:
+        """Per-rule file counts and belief sums across all files."""
+
+    @abstractmethod
+    def rule_index(self, rebuild: bool = False) -> RuleIndex:
+        """Per-rule aggregates plus the most violating files of each rule."""
+
+    @abstractmethod
+    def lookup_symbols(self, symbols: Iterable[str]) -> Dict[str, Tuple[str, InterfaceView]]:
+        """Resolves class/public-method names to (file, interface view) of the summary defining them."""
+
+    @abstractmethod
+    def load_frame(self, frame_id: str) -> Optional[FrameSnapshot]: ...
+
+    @abstractmethod
+    def save_frame(self, frame: FrameSnapshot) -> None: ...
+
+    @abstractmethod
+    def delete_frame(self, frame_id: str) -> bool: ...
+
+    @abstractmethod
+    def count_frames(self) -> int: ...
+
+    def close(self) -> None:
+        pass
+
+
+class JsonVaultBackend(VaultBackend):
+    """
+    The original layout: one file per artifact under .dev_brain/, read through the
+    vault caches and written in the configured vault format (see codec).
+    """
+
+    name = "json"
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def load_decisions(self) -> List[Decision]:
+        decisions = _load_cached(decisions_cache, decisions_path(), _parse_decisions, "decisions")
+        return list(decisions) if decisions is not None else []
+
+    def known_decision_count(self) -> Optional[int]:
+        decisions = decisions_cache.peek(decisions_path())
+        return len(decisions) if decisions is not None else None
+
+    def save_decisions(self, decisions: List[Decision]) -> None:
+        path = decisions_path()
+        data = json.dumps([d.model_dump(mode="json") for d in decisions], indent=4).encode("utf-8")
+        write_atomic(path, data)
+        decisions_cache.put(path, [d.model_copy(deep=True) for d in decisions], data)
+
+    def load_file_summary(self, file_path: str) -> Optional[FileSummary]:
+        return load_summary_file(summary_path_for(file_path))
+
+    def save_file_summary(self, summary: FileSummary) -> Path:
+        path = summary_path_for(summary.file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = codec.encode(summary)
+        with get_lock("symbol_index", self.root):
+            # Like the rule index, the symbol index is only patched while it is current
+            index = symbol_index.load_index(self.root, cached=False)
+            write_atomic(path, data)
+            layout.note_write(self.root, "summaries", path)
+            summary_cache.put(path, summary.model_copy(deep=True), data)
+            layout.register(self.root, summary.file)
+            if index is not None:
+                symbol_index.apply_change(index, summary.file, summary)
+                self._save_symbol_index(index)
+        return path
+
+    def delete_file_summary(self, file_path: str) -> bool:
+        path = summary_path_for(file_path)
+        summary_cache.invalidate(path)
+        with get_lock("symbol_index", self.root):
+            index = symbol_index.load_index(self.root, cached=False)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                return False
+            layout.note_write(self.root, "summaries", path)
+            if index is not None:
+                symbol_index.apply_change(index, str(file_path), None)
+                self._save_symbol_index(index)
+        return True
+
+    def _save_symbol_index(self, index: SymbolIndex) -> None:
+        try:
+            symbol_index.save_index(self.root, index, write_atomic)
+        except IOError as e:
+            print(f"Error saving symbol index to {symbol_index.index_path(self.root)}: {e}")
+
+    def symbol_index(self, rebuild: bool = False) -> SymbolIndex:
+        """The persisted symbol index, rebuilt from the summaries when missing or stale."""
+        index = None if rebuild else symbol_index.load_index(self.root)
+        if index is not None:
+            return index
+        with get_lock("symbol_index", self.root):
+            index = None if rebuild else symbol_index.load_index(self.root)
+            if index is None:
+                index = symbol_index.build_index(self.iter_file_summaries())
+                if (self.root / "summaries").exists():
+                    self._save_symbol_index(index)
+            return index
+
+    def lookup_symbols(self, symbols: Iterable[str]) -> Dict[str, Tuple[str, InterfaceView]]:
+        return symbol_index.lookup(self.symbol_index(), symbols)
+
+    def summary_digest(self, file_path: str, summary: FileSummary) -> Optional[str]:
+        return summary_cache.digest_of(summary_path_for(file_path), summary)
+
+    def symbols_version(self) -> str:
+        index = self.symbol_index()
+        digest = symbol_index_cache.digest_of(symbol_index.index_path(self.root), index)
+        return digest if digest is not None else content_digest(index.model_dump_json().encode("utf-8"))
+
+    def iter_file_summaries(self) -> Iterator[FileSummary]:
+        for path in layout.artifact_paths(self.root, "summaries"):
+            summary = load_summary_file(path)
+            if summary:
+                yield summary
+
+    def load_rule_states(self, file_path: str) -> Optional[RuleStatesForFile]:
+        return load_rule_states_file(rule_state_path_for(file_path))
+
+    def save_rule_states(self, rule_states: RuleStatesForFile) -> None:
+        self.save_rule_states_many([rule_states])
+
+    def save_rule_states_many(self, rule_states: Iterable[RuleStatesForFile]) -> None:
+        # The rule index is loaded, patched and rewritten once for the whole batch
+        # instead of once per file.
+        batch = list(rule_states)
+        if not batch:
+            return
+        with get_lock("rule_index", self.root):
+            index = rule_index.load_index(self.root)
+            changed = False
+            for rs_obj in batch:
+                changed = self._write_rule_states(rs_obj, index) or changed
+            if index is not None and changed:
+                self._save_rule_index(index)
+                self.last_rule_index = index
+
+    def _write_rule_states(self, rule_states: RuleStatesForFile, index: Optional[RuleIndex]) -> bool:
+        """Writes one file's rule states and patches the in-memory index; False on IO error."""
+        path = rule_state_path_for(rule_states.file)
+        data = codec.encode(rule_states)
+        existed = path.exists()
+        old = load_rule_states_file(path) if index is not None and existed else None
+        try:
+            if not existed:
+                path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, data)
+        except IOError as e:
+            rule_state_cache.invalidate(path)
+            print(f"Error saving rule states to {path}: {e}")
+            return False
+        layout.note_write(self.root, "rule_states", path)
+        rule_state_cache.put(path, rule_states.model_copy(deep=True), data)
+        if not existed:
+            layout.register(self.root, rule_states.file)
+        if index is not None:
+            rule_index.apply_change(index, rule_states.file, old, rule_states, existed)
+        return True
+
+    def _save_rule_index(self, index: RuleIndex) -> None:
+        try:
+            rule_index.save_index(self.root, index, write_atomic)
+        except IOError as e:
+            print(f"Error saving rule index to {rule_index.index_path(self.root)}: {e}")
+
+    def _rule_state_paths(self) -> List[Path]:
+        return layout.artifact_paths(self.root, "rule_states")
+
+    def iter_rule_states(self) -> Iterator[RuleStatesForFile]:
+        for path in self._rule_state_paths():
+            rs_obj = load_rule_states_file(path)
+            if rs_obj:
+                yield rs_obj
+
+    def count_rule_state_files(self) -> int:
+        return len(self._rule_state_paths())
+
+    def rule_aggregates(self) -> Dict[str, RuleAggregate]:
+        return dict(self.rule_index().rules)
+
+    def rule_index(self, rebuild: bool = False) -> RuleIndex:
+        with get_lock("rule_index", self.root):
+            index = None if rebuild else rule_index.load_index(self.root, fresh=True)
+            # A rule whose top files fell out of the candidate pool also needs a full pass
+            if index is None or any(rule_index.top_violating(e) is None for e in index.rules.values()):
+                index = rule_index.build_index(self.iter_rule_states(), len(self._rule_state_paths()))
+                if self.root.exists():
+                    self._save_rule_index(index)
+            self.last_rule_index = index
+            return index
+
+    def _frame_path(self, frame_id: str) -> Path:
+        return self.root / "frames" / f"{frame_id}.json"
+
+    def load_frame(self, frame_id: str) -> Optional[FrameSnapshot]:
+        return _load_cached(frame_cache, self._frame_path(frame_id), _parse_frame, "frame")
+
+    def save_frame(self, frame: FrameSnapshot) -> None:
+        path = self._frame_path(frame.frame_id)
+        data = codec.encode(frame)
+        try:
+            write_atomic(path, data)
+        except IOError as e:
+            frame_cache.invalidate(path)
+            print(f"Error saving frame to {path}: {e}")
+            return
+        frame_cache.put(path, frame.model_copy(deep=True), data)
+
+    def delete_frame(self, frame_id: str) -> bool:
+        path = self._frame_path(frame_id)
+        frame_cache.invalidate(path)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def count_frames(self) -> int:
+        frames_dir = self.root / "frames"
+        return len(list(frames_dir.glob("*.json"))) if frames_dir.exists() else 0
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS decisions (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS summaries (
+    file TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rule_state_files (
+    file TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS rule_states (
+    file TEXT NOT NULL,
+    rule_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    compliant REAL NOT NULL,
+    at_risk REAL NOT NULL,
+    violating REAL NOT NULL,
+    entangled_with TEXT NOT NULL,
+    last_updated_frame TEXT NOT NULL,
+    PRIMARY KEY (file, rule_id)
+);
+CREATE INDEX IF NOT EXISTS idx_rule_states_rule_id ON rule_states (rule_id);
+CREATE TABLE IF NOT EXISTS frames (
+    frame_id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_frames_timestamp ON frames (timestamp);
+CREATE TABLE IF NOT EXISTS symbols (
+    symbol TEXT NOT NULL,
+    file TEXT NOT NULL,
+    is_class INTEGER NOT NULL,
+    PRIMARY KEY (symbol, file)
+);
+CREATE INDEX IF NOT EXISTS idx_symbols_file ON symbols (file);
+"""
+
+
+class SqliteVaultBackend(VaultBackend):
+    """
+    Single-file SQLite vault (WAL mode). Rule states are stored one row per
+    (file, rule_id) so aggregates are answered by indexed queries.
+
+    decisions.json stays the human-edited source of rules: whenever it changes
+    on disk it is re-imported into the decisions table.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.db_path = root / SQLITE_FILENAME
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+            # Vaults created before the symbols table existed
+            if not conn.execute("SELECT 1 FROM meta WHERE key = 'symbols_indexed'").fetchone():
+                for (data,) in conn.execute("SELECT data FROM summaries").fetchall():
+                    self._index_symbols(conn, FileSummary.model_validate_json(data))
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('symbols_indexed', '1')")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections may not be shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _sync_decisions_source(self, conn: sqlite3.Connection) -> None:
+        path = decisions_path()
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return
+        signature = f"{st.st_mtime_ns}:{st.st_size}"
+        row = conn.execute("SELECT value FROM meta WHERE key = 'decisions_source'").fetchone()
+        if row and row[0] == signature:
+            return
+        try:
+            with open(path, 'rb') as f:
+                decisions = _parse_decisions(f.read())
+        except (ValueError, IOError) as e:
+            print(f"Error loading decisions from {path}: {e}")
+            return
+        with conn:
+            self._replace_decisions(conn, decisions)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('decisions_source', ?)", (signature,))
+
+    def _replace_decisions(self, conn: sqlite3.Connection, decisions: List[Decision]) -> None:
+        conn.execute("DELETE FROM decisions")
+        conn.executemany(
+            "INSERT INTO decisions (id, position, data) VALUES (?, ?, ?)",
+            [(d.id, i, d.model_dump_json()) for i, d in enumerate(decisions)],
+        )
+
+    def load_decisions(self) -> List[Decision]:
+        conn = self._connect()
+        self._sync_decisions_source(conn)
+        rows = conn.execute("SELECT data FROM decisions ORDER BY position").fetchall()
+        return [Decision.model_validate_json(row[0]) for row in rows]
+
+    def known_decision_count(self) -> Optional[int]:
+        return self._connect().execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+
+    def save_decisions(self, decisions: List[Decision]) -> None:
+        conn = self._connect()
+        with conn:
+            self._replace_decisions(conn, decisions)
+
+    def load_file_summary(self, file_path: str) -> Optional[FileSummary]:
+        row = self._connect().execute("SELECT data FROM summaries WHERE file = ?", (str(file_path),)).fetchone()
+        return FileSummary.model_validate_json(row[0]) if row else None
+
+    def save_file_summary(self, summary: FileSummary) -> Path:
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (file, hash, data) VALUES (?, ?, ?)",
+                (summary.file, summary.hash, summary.model_dump_json()),
+            )
+            self._index_symbols(conn, summary)
+        return self.db_path
+
+    def delete_file_summary(self, file_path: str) -> bool:
+        conn = self._connect()
+        with conn:
+            cur = conn.execute("DELETE FROM summaries WHERE file = ?", (str(file_path),))
+            conn.execute("DELETE FROM symbols WHERE file = ?", (str(file_path),))
+        return cur.rowcount > 0
+
+    def _index_symbols(self, conn: sqlite3.Connection, summary: FileSummary) -> None:
+        conn.execute("DELETE FROM symbols WHERE file = ?", (summary.file,))
+        interface = summary.lenses.interface_view
+        if interface is None:
+            return
+        classes = set(interface.classes)
+        conn.executemany(
+            "INSERT OR IGNORE INTO symbols (symbol, file, is_class) VALUES (?, ?, ?)",
+            [(symbol, summary.file, int(symbol in classes)) for symbol in symbol_index.symbols_of(interface)],
+        )
+
+    def lookup_symbols(self, symbols: Iterable[str]) -> Dict[str, Tuple[str, InterfaceView]]:
+        symbols = list(dict.fromkeys(symbols))
+        conn = self._connect()
+        found: Dict[str, Tuple[str, InterfaceView]] = {}
+        for start in range(0, len(symbols), 500):
+            chunk = symbols[start:start + 500]
+            rows = conn.execute(
+                "SELECT s.symbol, s.file, m.data FROM symbols s JOIN summaries m ON m.file = s.file "
+                f"WHERE s.symbol IN ({','.join('?' * len(chunk))}) ORDER BY s.symbol, s.is_class DESC, s.file",
+                chunk,
+            ).fetchall()
+            for symbol, file_path, data in rows:
+                if symbol not in found:
+                    found[symbol] = (file_path, FileSummary.model_validate_json(data).lenses.interface_view)
+        return found
+
+    def symbols_version(self) -> str:
+        # Replacing a summary gives its row a new rowid; deleting one lowers the count
+        count, max_rowid = self._connect().execute("SELECT COUNT(*), MAX(rowid) FROM summaries").fetchone()
+        return f"{count}:{max_rowid}"
+
+    def iter_file_summaries(self) -> Iterator[FileSummary]:
+        rows = self._connect().execute("SELECT data FROM summaries ORDER BY file").fetchall()
+        for row in rows:
+            yield FileSummary.model_validate_json(row[0])
+
+    def _rows_to_rule_states(self, file_path: str, rows) -> RuleStatesForFile:
+        return RuleStatesForFile(file=file_path, rule_states=[
+            RuleStateEntry(
+                rule_id=rule_id,
+                state_belief=StateBelief(compliant=c, at_risk=r, violating=v),
+                entangled_with=json.loads(entangled),
+                last_updated_frame=last_frame,
+            )
+            for rule_id, c, r, v, entangled, last_frame in rows
+        ])
+
+    def load_rule_states(self, file_path: str) -> Optional[RuleStatesForFile]:
+        conn = self._connect()
+        if not conn.execute("SELECT 1 FROM rule_state_files WHERE file = ?", (str(file_path),)).fetchone():
+            return None
+        rows = conn.execute(
+            "SELECT rule_id, compliant, at_risk, violating, entangled_with, last_updated_frame "
+            "FROM rule_states WHERE file = ? ORDER BY position",
+            (str(file_path),),
+        ).fetchall()
+        return self._rows_to_rule_states(str(file_path), rows)
+
+    def save_rule_states(self, rule_states: RuleStatesForFile) -> None:
+        self.save_rule_states_many([rule_states])
+
+    def save_rule_states_many(self, rule_states: Iterable[RuleStatesForFile]) -> None:
+        conn = self._connect()
+        with conn:
+            for rs_obj in rule_states:
+                conn.execute("INSERT OR IGNORE INTO rule_state_files (file) VALUES (?)", (rs_obj.file,))
+                conn.execute("DELETE FROM rule_states WHERE file = ?", (rs_obj.file,))
+                conn.executemany(
+                    "INSERT INTO rule_states (file, rule_id, position, compliant, at_risk, violating, "
+                    "entangled_with, last_updated_frame) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            rs_obj.file, e.rule_id, i,
+                            e.state_belief.compliant, e.state_belief.at_risk, e.state_belief.violating,
+                            json.dumps(e.entangled_with), e.last_updated_frame,
+                        )
+                        for i, e in enumerate(rs_obj.rule_states)
+                    ],
+                )
+
+    def iter_rule_states(self) -> Iterator[RuleStatesForFile]:
+        conn = self._connect()
+        files = [row[0] for row in conn.execute("SELECT file FROM rule_state_files ORDER BY file")]
+        for file_path in files:
+            rs_obj = self.load_rule_states(file_path)
+            if rs_obj:
+                yield rs_obj
+
+    def count_rule_state_files(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM rule_state_files").fetchone()[0]
+
+    def rule_aggregates(self) -> Dict[str, RuleAggregate]:
+        rows = self._connect().execute(
+            "SELECT rule_id, COUNT(*), SUM(compliant), SUM(at_risk), SUM(violating) "
+            "FROM rule_states GROUP BY rule_id"
+        ).fetchall()
+        return {
+            rule_id: RuleAggregate(
+                rule_id=rule_id,
+                file_count=count,
+                compliant_sum=c,
+                at_risk_sum=r,
+                violating_sum=v,
+            )
+            for rule_id, count, c, r, v in rows
+        }
+
+    def rule_index(self, rebuild: bool = False) -> RuleIndex:
+        # The rule_states table is indexed by rule_id, so this is always computed live
+        index = RuleIndex(rule_state_files=self.count_rule_state_files())
+        for rule_id, agg in self.rule_aggregates().items():
+            index.rules[rule_id] = RuleIndexEntry(**agg.model_dump())
+        rows = self._connect().execute(
+            "SELECT rule_id, file, violating FROM ("
+            "  SELECT rule_id, file, violating, "
+            "  ROW_NUMBER() OVER (PARTITION BY rule_id ORDER BY violating DESC, file) AS rank "
+            "  FROM rule_states"
+            ") WHERE rank <= ? ORDER BY rule_id, rank",
+            (rule_index.TOP_N,),
+        ).fetchall()
+        for rule_id, file_path, violating in rows:
+            index.rules[rule_id].top_violating.append([file_path, violating])
+        self.last_rule_index = index
+        return index
+
+    def load_frame(self, frame_id: str) -> Optional[FrameSnapshot]:
+        row = self._connect().execute("SELECT data FROM frames WHERE frame_id = ?", (frame_id,)).fetchone()
+        return FrameSnapshot.model_validate_json(row[0]) if row else None
+
+    def save_frame(self, frame: FrameSnapshot) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO frames (frame_id, timestamp, data) VALUES (?, ?, ?)",
+                (frame.frame_id, frame.timestamp, frame.model_dump_json()),
+            )
+
+    def delete_frame(self, frame_id: str) -> bool:
+        conn = self._connect()
+        with conn:
+            return conn.execute("DELETE FROM frames WHERE frame_id = ?", (frame_id,)).rowcount > 0
+
+    def count_frames(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM frames").fetchone()[0]
+
+
+_backends: Dict[str, VaultBackend] = {}
+_backends_lock = threading.Lock()
+
+def backend_name_for(root: Path) -> str:
+    """
+    Resolves the storage engine: QDB_VAULT_BACKEND ('json' or 'sqlite') if set,
+    otherwise sqlite when the vault has been migrated, else json.
+    """
+    name = os.environ.get("QDB_VAULT_BACKEND", "").strip().lower()
+    if name:
+        return name
+    return "sqlite" if (root / SQLITE_FILENAME).exists() else "json"
+
+def create_backend(name: str, root: Path) -> VaultBackend:
+    if name == "json":
+        return JsonVaultBackend(root)
+    if name == "sqlite":
+        return SqliteVaultBackend(root)
+    raise ValueError(f"Unknown vault backend: {name!r} (expected 'json' or 'sqlite')")
+
+def get_backend() -> VaultBackend:
+    """Returns the backend for the current vault root, creating it on first use."""
+    root = get_vault_root()
+    name = backend_name_for(root)
+    key = f"{name}:{root}"
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            backend = _backends[key] = create_backend(name, root)
+        return backend
+
+def migrate_json_to_sqlite(root: Optional[Path] = None) -> Dict[str, int]:
+    """
+    Imports an existing JSON vault into vault.sqlite3. The JSON files are left
+    in place. Returns the number of imported artifacts per kind.
+    """
+    root = root or get_vault_root()
+    source = JsonVaultBackend(root)
+    target = SqliteVaultBackend(root)
+    counts = {"decisions": 0, "summaries": 0, "rule_states": 0, "frames": 0}
+    try:
+        decisions = source.load_decisions()
+        target.save_decisions(decisions)
+        counts["decisions"] = len(decisions)
+
+        for summary in source.iter_file_summaries():
+            target.save_file_summary(summary)
+            counts["summaries"] += 1
+
+        for rs_obj in source.iter_rule_states():
+            target.save_rule_states(rs_obj)
+            counts["rule_states"] += 1
+
+        frames_dir = root / "frames"
+        if frames_dir.exists():
+            for path in sorted(frames_dir.glob("*.json")):
+                frame = _load_cached(frame_cache, path, _parse_frame, "frame")
+                if frame:
+                    target.save_frame(frame)
+                    counts["frames"] += 1
+    finally:
+        target.close()
+
+    with _backends_lock:
+        _backends.pop(f"sqlite:{root}", None)
+    return counts
+
+def _reencode_file(path: Path, model, fmt: str, dry_run: bool) -> bool:
+    """Rewrites one artifact in fmt. Returns whether it needed converting."""
+    try:
+        with open(path, "rb") as f:
+            data = codec.reencode(f.read(), model, fmt)
+    except (ValueError, IOError) as e:
+        print(f"Error converting {path}: {e}")
+        return False
+    if data is None:
+        return False
+    if not dry_run:
+        write_atomic(path, data)
+    return True
+
+def convert_vault_format(fmt: str, root: Optional[Path] = None, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Re-encodes the JSON-layout artifacts of a vault (summaries, rule states, frames,
+    the graph checkpoint and the derived indexes) in fmt, skipping files that already
+    use it. decisions.json is left as is. Returns the number of converted files per kind.
+    """
+    codec.check_format(fmt)
+    root = root or get_vault_root()
+    index_fmt = "json-min" if fmt == "json" else fmt
+    counts = {"summaries": 0, "rule_states": 0, "frames": 0, "graph": 0, "indexes": 0}
+
+    def convert_dir(kind: str, model) -> None:
+        for path in layout.artifact_paths(root, kind):
+            counts[kind] += _reencode_file(path, model, fmt, dry_run)
+
+    # Rewriting a directory's files changes its mtime, so an index that is current is
+    # saved again afterwards (restamped) instead of being left to a full rebuild
+    for kind, model, lock_name, index_module, index_model, load in (
+        ("summaries", FileSummary, "symbol_index", symbol_index, SymbolIndex, lambda: symbol_index.load_index(root, cached=False)),
+        ("rule_states", RuleStatesForFile, "rule_index", rule_index, RuleIndex, lambda: rule_index.load_index(root)),
+    ):
+        with get_lock(lock_name, root):
+            index = load()
+            convert_dir(kind, model)
+            layout.invalidate_scans()
+            if index is not None:
+                counts["indexes"] += _reencode_file(index_module.index_path(root), index_model, index_fmt, True)
+                if not dry_run:
+                    index_module.save_index(root, index, write_atomic, index_fmt)
+
+    frames_dir = root / "frames"
+    for path in sorted(frames_dir.glob("*.json")) if frames_dir.exists() else []:
+        counts["frames"] += _reencode_file(path, FrameSnapshot, fmt, dry_run)
+    graph_path = root / "graph.json"
+    if graph_path.exists():
+        with get_lock("graph", root):
+            counts["graph"] += _reencode_file(graph_path, Graph, fmt, dry_run)
+
+    for cache in (summary_cache, rule_state_cache, frame_cache):
+        cache.clear()
+    return counts
+
+def _read_artifact(path: Path, model):
+    try:
+        with open(path, "rb") as f:
+            return codec.decode(f.read(), model)
+    except (ValueError, IOError) as e:
+        print(f"Error reading {path}, left in place: {e}")
+        return None
+
+def migrate_to_sharded_layout(root: Optional[Path] = None, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Moves the summaries, rule states and belief histories of a legacy-layout vault
+    into the sharded layout (see paths), writes the manifest and then the layout
+    marker. Artifacts are placed by the file path recorded inside them; a history log
+    holds no path, so it moves with the summary or rule states of the same file and is
+    left in place (counted as unmatched) otherwise. An interrupted run can be repeated.
+    Returns the number of moved artifacts per kind.
+    """
+    from .paths import LAYOUT_FILENAME, legacy_name, sharded_path
+
+    root = root or get_vault_root()
+    counts = {"summaries": 0, "rule_states": 0, "history": 0, "unmatched": 0}
+    moves: List[Tuple[Path, Path]] = []
+    files = set(layout.load_manifest(root).values())
+
+    with get_lock("symbol_index", root), get_lock("rule_index", root):
+        symbols = symbol_index.load_index(root, cached=False)
+        rules = rule_index.load_index(root)
+
+        by_history_name: Dict[str, str] = {}
+        for kind, model in (("summaries", FileSummary), ("rule_states", RuleStatesForFile)):
+            directory = root / kind
+            if not directory.exists():
+                continue
+            # Artifacts an interrupted run already moved still belong in the manifest
+            for path in directory.glob("*/*/*.json"):
+                artifact = _read_artifact(path, model)
+                if artifact is not None:
+                    files.add(artifact.file)
+            for path in sorted(directory.glob("*.json")):
+                artifact = _read_artifact(path, model)
+                if artifact is None:
+                    continue
+                file_path = artifact.file
+                moves.append((path, sharded_path(root, kind, file_path, ".json")))
+                files.add(file_path)
+                by_history_name[legacy_name("history", file_path)] = file_path
+                counts[kind] += 1
+
+        history_dir = root / "history"
+        for path in sorted(history_dir.glob("*.jsonl")) if history_dir.exists() else []:
+            file_path = by_history_name.get(path.name)
+            if file_path is None:
+                counts["unmatched"] += 1
+                continue
+            target = sharded_path(root, "history", file_path, ".jsonl")
+            moves.append((path, target))
+            index_file = path.with_name(path.name + ".idx")
+            if index_file.exists():
+                moves.append((index_file, target.with_name(target.name + ".idx")))
+            counts["history"] += 1
+
+        if dry_run:
+            return counts
+
+        for source, target in moves:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, target)
+        layout.write_manifest(root, files, write_atomic)
+        write_atomic(root / LAYOUT_FILENAME, json.dumps({"layout": "sharded", "version": 1}).encode("utf-8"))
+
+        # The moves changed the directories' mtimes; indexes that were current stay so
+        layout.invalidate_scans()
+        if symbols is not None:
+            symbol_index.save_index(root, symbols, write_atomic)
+        if rules is not None:
+            rule_index.save_index(root, rules, write_atomic)
+
+    for cache in (summary_cache, rule_state_cache):
+        cache.clear()
+    return counts
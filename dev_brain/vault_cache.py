@@ -0,0 +1,172 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Files modified this close to the moment they were cached may be rewritten
+# again within the filesystem's mtime granularity without the (mtime, size)
+# signature changing, so hits on such entries are confirmed by content hash.
+RACY_WINDOW_SECONDS = 2.0
+
+DEFAULT_CACHE_SIZE = 1024
+
+
+def _cache_size_from_env() -> int:
+    try:
+        return int(os.environ.get("QDB_VAULT_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+    except ValueError:
+        return DEFAULT_CACHE_SIZE
+
+
+def content_digest(data: bytes) -> str:
+    """Returns the content hash used to validate and version cache entries."""
+    return hashlib.sha1(data).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("signature", "digest", "value", "cached_at")
+
+    def __init__(self, signature: Tuple[int, int], digest: str, value: Any, cached_at: float):
+        self.signature = signature
+        self.digest = digest
+        self.value = value
+        self.cached_at = cached_at
+
+
+class VaultCache:
+    """
+    Path-keyed cache of parsed vault artifacts.
+
+    Entries are validated against the file's (mtime_ns, size) signature on every
+    lookup, and against a content hash when the file was modified too recently for
+    its mtime to be trusted. With a maxsize the cache evicts least recently used
+    entries; a maxsize of 0 disables caching.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path, parse: Callable[[bytes], Any]) -> Optional[Any]:
+        """
+        Returns the parsed content of path, or None if the file does not exist.
+        Parse errors propagate to the caller and are never cached.
+        """
+        key = str(path)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self.invalidate(path)
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                if not self._is_racy(entry):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+            else:
+                entry = None
+
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = content_digest(data)
+
+        if entry is not None and entry.digest == digest:
+            with self._lock:
+                entry.cached_at = time.time()
+                self.hits += 1
+            return entry.value
+
+        value = parse(data)
+        with self._lock:
+            self.misses += 1
+        self._store(key, signature, digest, value)
+        return value
+
+    def peek(self, path: Path) -> Optional[Any]:
+        """The cached value of path if it still matches the file, without counting a hit or miss."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            entry = self._entries.get(str(path))
+            if entry is not None and entry.signature == (st.st_mtime_ns, st.st_size):
+                return entry.value
+        return None
+
+    def digest(self, path: Path) -> Optional[str]:
+        """Returns the content hash of a cached entry, if it is cached."""
+        with self._lock:
+            entry = self._entries.get(str(path))
+            return entry.digest if entry is not None else None
+
+    def digest_of(self, path: Path, value: Any) -> Optional[str]:
+        """The content hash of path if value is the object cached for it, else None."""
+        with self._lock:
+            entry = self._entries.get(str(path))
+            return entry.digest if entry is not None and entry.value is value else None
+
+    def put(self, path: Path, value: Any, data: bytes) -> None:
+        """Records a value that was just written to path (write-through)."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self.invalidate(path)
+            return
+        self._store(str(path), (st.st_mtime_ns, st.st_size), content_digest(data), value)
+
+    def invalidate(self, path: Path) -> None:
+        with self._lock:
+            self._entries.pop(str(path), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _is_racy(self, entry: _Entry) -> bool:
+        mtime = entry.signature[0] / 1e9
+        return entry.cached_at - mtime < RACY_WINDOW_SECONDS
+
+    def _store(self, key: str, signature: Tuple[int, int], digest: str, value: Any) -> None:
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._entries[key] = _Entry(signature, digest, value, time.time())
+            self._entries.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+
+# Shared caches used by vault_io. Decisions are a single small file and are kept
+# unbounded; per-file artifacts share the configured LRU bound.
+decisions_cache = VaultCache()
+summary_cache = VaultCache(maxsize=_cache_size_from_env())
+rule_state_cache = VaultCache(maxsize=_cache_size_from_env())
+frame_cache = VaultCache(maxsize=_cache_size_from_env())
+# The symbol index is one file read on every prompt
+symbol_index_cache = VaultCache(maxsize=1)
+
+
+def clear_all() -> None:
+    """Drops every cached vault artifact."""
+    for cache in (decisions_cache, summary_cache, rule_state_cache, frame_cache, symbol_index_cache):
+        cache.clear()
@@ -1,74 +1,105 @@
-import json
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
-from .models import Decision, FileSummary, RuleStatesForFile, FrameSnapshot
-from .paths import decisions_path, summary_path_for, rule_state_path_for, get_vault_root
+from .models import Decision, FileSummary, InterfaceView, RuleStatesForFile, FrameSnapshot, RuleAggregate, RuleIndex
+from .paths import get_vault_root
+from .vault_backend import get_backend, write_atomic, load_summary_file, load_rule_states_file
+
+# Every accessor goes through the active VaultBackend (see vault_backend.get_backend).
+# With the JSON backend, reads are served from the shared vault caches, so returned
+# objects are shared with other callers and must not be mutated in place.
 
 def load_decisions() -> List[Decision]:
-    """Loads all decisions from decisions.json."""
-    path = decisions_path()
-    if not path.exists():
-        return []
-    
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return [Decision(**item) for item in data]
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"Error loading decisions from {path}: {e}")
-        return []
+    """Loads all decisions."""
+    return get_backend().load_decisions()
+
+def save_decisions(decisions: List[Decision]) -> None:
+    """Replaces the stored decisions."""
+    get_backend().save_decisions(decisions)
 
 def load_file_summary(file_path: str) -> Optional[FileSummary]:
     """Loads the summary for a specific file."""
-    path = summary_path_for(file_path)
-    return load_file_summary_from_path(path)
+    return get_backend().load_file_summary(file_path)
 
 def load_file_summary_from_path(path: Path) -> Optional[FileSummary]:
     """Loads the summary from a specific JSON path."""
-    if not path.exists():
-        return None
-    
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return FileSummary(**data)
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"Error loading summary from {path}: {e}")
-        return None
+    return load_summary_file(path)
+
+def save_file_summary(summary: FileSummary) -> Path:
+    """Saves the summary for a specific file."""
+    return get_backend().save_file_summary(summary)
+
+def delete_file_summary(file_path: str) -> bool:
+    """Deletes the summary for a specific file. Returns False if there was none."""
+    return get_backend().delete_file_summary(file_path)
+
+def iter_file_summaries() -> Iterator[FileSummary]:
+    """Iterates over every stored file summary."""
+    return get_backend().iter_file_summaries()
+
+def lookup_symbols(symbols: Iterable[str]) -> Dict[str, Tuple[str, InterfaceView]]:
+    """Resolves class/public-method names to the (file, interface view) defining them; unknown names are left out."""
+    return get_backend().lookup_symbols(symbols)
+
+def summary_digest(file_path: str, summary: FileSummary) -> Optional[str]:
+    """Content digest of a summary returned by load_file_summary, if the backend has it at hand."""
+    return get_backend().summary_digest(file_path, summary)
+
+def symbols_version() -> str:
+    """Changes whenever lookup_symbols may resolve names differently."""
+    return get_backend().symbols_version()
 
 def load_rule_states(file_path: str) -> Optional[RuleStatesForFile]:
     """Loads the rule states for a specific file."""
-    path = rule_state_path_for(file_path)
-    return load_rule_states_from_path(path)
+    return get_backend().load_rule_states(file_path)
 
 def load_rule_states_from_path(path: Path) -> Optional[RuleStatesForFile]:
     """Loads the rule states from a specific JSON path."""
-    if not path.exists():
-        return None
-    
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return RuleStatesForFile(**data)
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"Error loading rule states from {path}: {e}")
-        return None
+    return load_rule_states_file(path)
 
 def save_rule_states(rule_states: RuleStatesForFile) -> None:
     """Saves the rule states for a specific file."""
-    path = rule_state_path_for(rule_states.file)
-    try:
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(rule_states.model_dump_json(indent=2))
-    except IOError as e:
-        print(f"Error saving rule states to {path}: {e}")
+    get_backend().save_rule_states(rule_states)
+
+def save_rule_states_many(rule_states: Iterable[RuleStatesForFile]) -> None:
+    """Saves the rule states of several files, updating the rule index once."""
+    get_backend().save_rule_states_many(rule_states)
+
+def iter_rule_states() -> Iterator[RuleStatesForFile]:
+    """Iterates over the rule states of every tracked file."""
+    return get_backend().iter_rule_states()
+
+def count_rule_state_files() -> int:
+    """Returns the number of files with stored rule states."""
+    return get_backend().count_rule_state_files()
+
+def load_rule_aggregates() -> Dict[str, RuleAggregate]:
+    """Returns per-rule file counts and belief sums across all files."""
+    return get_backend().rule_aggregates()
+
+def load_rule_index(rebuild: bool = False) -> RuleIndex:
+    """Returns per-rule aggregates and top violating files, recomputing them from scratch if rebuild is set."""
+    return get_backend().rule_index(rebuild)
+
+def known_decision_count() -> Optional[int]:
+    """Number of decisions, if known without a load (None otherwise)."""
+    return get_backend().known_decision_count()
+
+def last_rule_index() -> Optional[RuleIndex]:
+    """The rule index as last loaded or updated by this process, without touching the disk."""
+    return get_backend().last_rule_index
+
+def load_frame(frame_id: str) -> Optional[FrameSnapshot]:
+    """Loads a frame snapshot by its ID."""
+    return get_backend().load_frame(frame_id)
 
 def save_frame(frame: FrameSnapshot) -> None:
     """Saves a frame snapshot."""
-    path = get_vault_root() / "frames" / f"{frame.frame_id}.json"
-    try:
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(frame.model_dump_json(indent=2))
-    except IOError as e:
-        print(f"Error saving frame to {path}: {e}")
+    get_backend().save_frame(frame)
+
+def delete_frame(frame_id: str) -> bool:
+    """Deletes a frame snapshot. Returns False if there was none."""
+    return get_backend().delete_frame(frame_id)
 
+def count_frames() -> int:
+    """Returns the number of stored frame snapshots."""
+    return get_backend().count_frames()
@@ -0,0 +1,311 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Watches a project tree for source changes (excluding .dev_brain and other tool
+# directories) and hands debounced batches of changed and deleted paths to a callback.
+#
+# On Linux the watcher uses inotify (through ctypes, no extra dependency), which
+# costs nothing while the tree is idle. Elsewhere, or when inotify is unavailable or
+# out of watches, it falls back to polling: every sweep stats the whole tree, and the
+# interval between sweeps stretches with the sweep's own cost so that polling stays
+# a small fraction of one CPU even on very large trees.
+
+EXCLUDED_DIRS = {".dev_brain", ".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", "venv", ".tox", ".mypy_cache", ".pytest_cache"}
+
+DEFAULT_DEBOUNCE_SECONDS = 0.5
+DEFAULT_MAX_DELAY_SECONDS = 5.0
+DEFAULT_POLL_INTERVAL = 2.0
+# Polling sleeps at least this many times as long as its last sweep took
+POLL_IDLE_FACTOR = 20
+
+
+class ChangeBatch(NamedTuple):
+    changed: List[Path]
+    deleted: List[Path]
+    # Directories removed or moved away; everything below them is gone
+    deleted_dirs: List[Path]
+    # Events were lost (inotify queue overflow); the whole tree must be re-scanned
+    rescan: bool = False
+
+
+class Debouncer:
+    """
+    Coalesces change events. A batch is ready once no event arrived for `debounce`
+    seconds, or `max_delay` seconds after its first event during a continuous burst.
+    """
+
+    def __init__(self, debounce: float = DEFAULT_DEBOUNCE_SECONDS, max_delay: float = DEFAULT_MAX_DELAY_SECONDS):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._state: Dict[Path, str] = {}
+        self._rescan = False
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+
+    def add(self, path: Path, kind: str, now: float) -> None:
+        """kind is 'changed', 'deleted', 'deleted_dir' or 'rescan'."""
+        if kind == "rescan":
+            self._rescan = True
+        else:
+            self._state[path] = kind
+        if self._first is None:
+            self._first = now
+        self._last = now
+
+    def pending(self) -> bool:
+        return self._first is not None
+
+    def ready(self, now: float) -> bool:
+        if self._first is None:
+            return False
+        return now - self._last >= self.debounce or now - self._first >= self.max_delay
+
+    def next_deadline(self, now: float) -> Optional[float]:
+        """Seconds until the pending batch becomes ready (None when nothing is pending)."""
+        if self._first is None:
+            return None
+        return max(0.0, min(self._last + self.debounce, self._first + self.max_delay) - now)
+
+    def drain(self) -> ChangeBatch:
+        batch = ChangeBatch(
+            changed=sorted(p for p, k in self._state.items() if k == "changed"),
+            deleted=sorted(p for p, k in self._state.items() if k == "deleted"),
+            deleted_dirs=sorted(p for p, k in self._state.items() if k == "deleted_dir"),
+            rescan=self._rescan,
+        )
+        self._state.clear()
+        self._rescan = False
+        self._first = self._last = None
+        return batch
+
+
+def _walk_dirs(root: Path):
+    """Yields root and every non-excluded directory below it."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        yield directory
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False) and entry.name not in EXCLUDED_DIRS:
+                        stack.append(Path(entry.path))
+        except OSError:
+            continue
+
+
+class PollingWatcher:
+    """Stdlib fallback: periodic (mtime, size) sweeps of the tree."""
+
+    name = "polling"
+
+    def __init__(self, root: Path, interval: float = DEFAULT_POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._sweep()
+        self._next_sweep = time.monotonic() + self._delay
+
+    def _sweep(self) -> Dict[Path, Tuple[int, int]]:
+        start = time.monotonic()
+        snapshot = {}
+        for directory in _walk_dirs(self.root):
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file(follow_symlinks=False):
+                            try:
+                                st = entry.stat(follow_symlinks=False)
+                            except OSError:
+                                continue
+                            snapshot[Path(entry.path)] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        self._delay = max(self.interval, (time.monotonic() - start) * POLL_IDLE_FACTOR)
+        return snapshot
+
+    def read_events(self, timeout: Optional[float]) -> List[Tuple[Path, str]]:
+        now = time.monotonic()
+        if now < self._next_sweep:
+            wait = self._next_sweep - now
+            time.sleep(wait if timeout is None else min(timeout, wait))
+            if time.monotonic() < self._next_sweep:
+                return []
+        snapshot = self._sweep()
+        self._next_sweep = time.monotonic() + self._delay
+        events = [(p, "changed") for p, sig in snapshot.items() if self._snapshot.get(p) != sig]
+        events += [(p, "deleted") for p in self._snapshot if p not in snapshot]
+        self._snapshot = snapshot
+        return events
+
+    def close(self) -> None:
+        pass
+
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyUnavailable(OSError):
+    pass
+
+
+class InotifyWatcher:
+    """Event-driven watcher using Linux inotify, one watch per directory."""
+
+    name = "inotify"
+
+    def __init__(self, root: Path):
+        if not sys.platform.startswith("linux"):
+            raise InotifyUnavailable("inotify is only available on Linux")
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        try:
+            self._libc = ctypes.CDLL(libc_name, use_errno=True)
+            self._libc.inotify_init1
+        except (OSError, AttributeError) as e:
+            raise InotifyUnavailable(str(e))
+        self.root = root
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise InotifyUnavailable(os.strerror(ctypes.get_errno()))
+        self._dirs: Dict[int, Path] = {}
+        try:
+            for directory in _walk_dirs(root):
+                self._add_watch(directory)
+        except InotifyUnavailable:
+            self.close()
+            raise
+
+    def _add_watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise InotifyUnavailable("inotify watch limit reached (fs.inotify.max_user_watches)")
+            return  # directory vanished or is unreadable
+        self._dirs[wd] = directory
+
+    def _watch_new_dir(self, directory: Path) -> List[Tuple[Path, str]]:
+        # Files may have landed in the new tree before its watches existed
+        events = []
+        for sub in _walk_dirs(directory):
+            try:
+                self._add_watch(sub)
+            except InotifyUnavailable as e:
+                print(f"Not watching {sub}: {e}")
+            try:
+                with os.scandir(sub) as entries:
+                    events.extend((Path(e.path), "changed") for e in entries if e.is_file(follow_symlinks=False))
+            except OSError:
+                continue
+        return events
+
+    def read_events(self, timeout: Optional[float]) -> List[Tuple[Path, str]]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        events: List[Tuple[Path, str]] = []
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                raw_name = data[offset + _EVENT_HEADER.size: offset + _EVENT_HEADER.size + length]
+                offset += _EVENT_HEADER.size + length
+                events.extend(self._translate(wd, mask, os.fsdecode(raw_name.rstrip(b"\0"))))
+        return events
+
+    def _translate(self, wd: int, mask: int, name: str) -> List[Tuple[Path, str]]:
+        if mask & IN_Q_OVERFLOW:
+            return [(self.root, "rescan")]
+        if mask & IN_IGNORED:
+            self._dirs.pop(wd, None)
+            return []
+        directory = self._dirs.get(wd)
+        if directory is None or not name:
+            return []
+        path = directory / name
+        if mask & IN_ISDIR:
+            if name in EXCLUDED_DIRS:
+                return []
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                return self._watch_new_dir(path)
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                return [(path, "deleted_dir")]
+            return []
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            return [(path, "deleted")]
+        return [(path, "changed")]
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(root: Path, force_polling: bool = False, poll_interval: float = DEFAULT_POLL_INTERVAL):
+    """inotify when available (unless force_polling), otherwise polling."""
+    if not force_polling:
+        try:
+            return InotifyWatcher(root)
+        except InotifyUnavailable as e:
+            print(f"inotify unavailable ({e}); falling back to polling")
+    return PollingWatcher(root, poll_interval)
+
+
+def watch(
+    root: Path,
+    on_batch: Callable[[ChangeBatch], None],
+    debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+    max_delay: float = DEFAULT_MAX_DELAY_SECONDS,
+    force_polling: bool = False,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """
+    Runs until `stop` is set (or forever), calling on_batch with each debounced batch.
+    Exceptions from on_batch are reported and do not stop the watcher.
+    """
+    watcher = create_watcher(root, force_polling, poll_interval)
+    debouncer = Debouncer(debounce, max_delay)
+    # Wake up periodically so a stop request is noticed
+    idle_timeout = 1.0
+    try:
+        while stop is None or not stop.is_set():
+            deadline = debouncer.next_deadline(time.monotonic())
+            events = watcher.read_events(idle_timeout if deadline is None else min(deadline, idle_timeout))
+            now = time.monotonic()
+            for path, kind in events:
+                debouncer.add(path, kind, now)
+            if debouncer.ready(now):
+                batch = debouncer.drain()
+                try:
+                    on_batch(batch)
+                except Exception as e:
+                    print(f"Error processing changes: {e}")
+    finally:
+        watcher.close()
@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import patch
+from io import StringIO
+from pathlib import Path
+import random
+import tempfile
+import shutil
+import os
+
+from dev_brain import belief_history, brain_cli, guardian, vault_io
+from dev_brain.models import Decision, RuleStateEntry, StateBelief
+from dev_brain.paths import history_path_for
+
+def entry(rule_id, n, violating):
+    return RuleStateEntry(
+        rule_id=rule_id,
+        state_belief=StateBelief(compliant=round(1 - violating, 2), at_risk=0.0, violating=violating),
+        entangled_with=[],
+        last_updated_frame=f"frame_{n:03d}",
+    )
+
+class TestBeliefHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.vault_root = Path(self.test_dir) / ".dev_brain"
+        for sub in ("summaries", "rule_states", "frames"):
+            (self.vault_root / sub).mkdir(parents=True)
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_reconstructs_any_frame(self):
+        rng = random.Random(7)
+        expected = {}  # frame -> {rule: violating}
+        current = {}
+        with patch.dict(os.environ, {"QDB_HISTORY_CHECKPOINT_EVERY": "16"}):
+            for n in range(1, 301):
+                changed = [entry(rule, n, round(rng.random(), 2)) for rule in ("R1", "R2", "R3") if rng.random() < 0.4]
+                belief_history.record_events("svc.py", changed)
+                current.update({e.rule_id: e.state_belief.violating for e in changed})
+                expected[n] = dict(current)
+
+        index_path = history_path_for("svc.py").with_name("svc.py.jsonl.idx")
+        self.assertGreater(len(belief_history._load_index(history_path_for("svc.py"))["checkpoints"]), 10)
+        for _ in range(2):
+            for n in (1, 15, 16, 17, 150, 299, 300, 1000):
+                state = belief_history.state_at("svc.py", f"frame_{n:03d}")
+                self.assertEqual({r: b.state_belief.violating for r, b in state.items()}, expected[min(n, 300)])
+            # A missing index is rebuilt from the log
+            index_path.unlink(missing_ok=True)
+
+        first = belief_history.rule_history("svc.py", "R1")[0]
+        self.assertIsNone(belief_history.belief_at("svc.py", "R1", first.frame_number - 1))
+        self.assertEqual(belief_history.belief_at("svc.py", "R1", first.frame_id), first)
+        self.assertEqual(belief_history.state_at("other.py"), {})
+
+    def test_torn_record_is_dropped(self):
+        belief_history.record_events("svc.py", [entry("R1", 1, 0.1)])
+        with open(history_path_for("svc.py"), "a", encoding="utf-8") as f:
+            f.write('{"n": 2, "fra')
+        self.assertEqual(belief_history.belief_at("svc.py", "R1").frame_id, "frame_001")
+        belief_history.record_events("svc.py", [entry("R1", 3, 0.3)])
+        self.assertEqual([c.frame_id for c in belief_history.rule_history("svc.py", "R1")], ["frame_001", "frame_003"])
+
+    def test_guardian_records_changes(self):
+        vault_io.save_decisions([Decision(
+            id="DEC-SQL",
+            topic="Data Access",
+            rule="No direct SQL in services",
+            allowed_pattern="Use repositories",
+            forbidden_pattern="raw query",
+            status="strict",
+            scope_layer="architecture",
+            amplitude=0.9,
+        )])
+        guardian.process_change_event("tidy up", ["svc.py"])
+        guardian.process_change_event("tidy up again", ["svc.py"])
+        guardian.process_change_event("use a raw query", ["svc.py"])
+
+        # Unchanged re-evaluations are not events
+        changes = belief_history.rule_history("svc.py", "DEC-SQL")
+        self.assertEqual([c.frame_id for c in changes], ["frame_001", "frame_003"])
+        self.assertEqual(belief_history.belief_at("svc.py", "DEC-SQL", "frame_002").state_belief.violating, 0.05)
+        self.assertEqual(
+            belief_history.belief_at("svc.py", "DEC-SQL").state_belief,
+            vault_io.load_rule_states("svc.py").rule_states[0].state_belief,
+        )
+
+        argv = ["brain_cli", "history", "svc.py", "--rule", "DEC-SQL", "--at", "frame_002"]
+        with patch("sys.stdout", new=StringIO()) as out, patch("sys.argv", argv):
+            brain_cli.main()
+        self.assertIn("DEC-SQL (set at frame_001)", out.getvalue())
+        self.assertIn("stored:  0.80 / 0.15 / 0.05", out.getvalue())
+
+        from fastapi.testclient import TestClient
+        from dev_brain.server import app
+        response = TestClient(app).get("/history", params={"file": "svc.py", "at": "frame_003"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["beliefs"][0]["frame_id"], "frame_003")
+        self.assertEqual(TestClient(app).get("/history", params={"file": "svc.py", "at": "latest"}).status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
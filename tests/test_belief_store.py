@@ -0,0 +1,72 @@
+import unittest
+import random
+
+import numpy as np
+
+from dev_brain.belief_store import BeliefStore, round2
+from dev_brain.metrics import initial_state_belief, apply_suspicion, merge_state_beliefs
+from dev_brain.models import RuleStatesForFile, RuleStateEntry, StateBelief
+
+class TestBeliefStore(unittest.TestCase):
+
+    def test_round2_matches_python_round(self):
+        rng = random.Random(3)
+        values = [rng.random() for _ in range(5000)] + [k / 1000 + 0.005 for k in range(1000)] + [0.125, 0.375, 2.675]
+        self.assertEqual(round2(np.array(values)).tolist(), [round(v, 2) for v in values])
+
+    def test_update_matches_scalar_heuristic(self):
+        rng = random.Random(11)
+        files = [f"f{i}.py" for i in range(5)]
+        rules = [f"DEC-{j}" for j in range(20)]
+        store = BeliefStore(files, rules)
+        expected = {(f, r): None for f in files for r in rules}
+
+        for step in range(30):
+            targets = rng.sample(files, rng.randint(1, 5))
+            suspicion = [rng.choice([0.0, 0.1, 0.3, 0.5, 0.7, 0.8, 0.9, 1.0]) for _ in rules]
+            store.update(targets, rules, suspicion, f"frame_{step}")
+            for f in targets:
+                for r, s in zip(rules, suspicion):
+                    current = expected[(f, r)] or initial_state_belief()
+                    expected[(f, r)] = apply_suspicion(current, s)
+
+        for f in files:
+            exported = store.to_rule_states(f, rules)
+            for entry in exported.rule_states:
+                self.assertEqual(entry.state_belief, expected[(f, entry.rule_id)])
+
+    def test_round_trip_and_merge(self):
+        rs_obj = RuleStatesForFile(file="a.py", rule_states=[
+            RuleStateEntry(rule_id="R1", state_belief=StateBelief(compliant=0.5, at_risk=0.3, violating=0.2),
+                           entangled_with=["R2"], last_updated_frame="frame_001"),
+            RuleStateEntry(rule_id="R2", state_belief=StateBelief(compliant=0.9, at_risk=0.05, violating=0.05),
+                           entangled_with=[], last_updated_frame="frame_002"),
+        ])
+        store = BeliefStore.from_rule_states([rs_obj])
+        self.assertEqual(store.to_rule_states("a.py"), rs_obj)
+
+        other = BeliefStore.from_rule_states([RuleStatesForFile(file="a.py", rule_states=[
+            RuleStateEntry(rule_id="R1", state_belief=StateBelief(compliant=0.15, at_risk=0.25, violating=0.6),
+                           entangled_with=[], last_updated_frame="frame_003"),
+            RuleStateEntry(rule_id="R3", state_belief=StateBelief(compliant=0.7, at_risk=0.2, violating=0.1),
+                           entangled_with=[], last_updated_frame="frame_003"),
+        ])])
+        store.merge(other, alpha=0.3)
+        merged = {e.rule_id: e.state_belief for e in store.to_rule_states("a.py").rule_states}
+        self.assertEqual(merged["R1"], merge_state_beliefs(
+            rs_obj.rule_states[0].state_belief, other.to_rule_states("a.py").rule_states[0].state_belief, alpha=0.3))
+        self.assertEqual(merged["R2"], rs_obj.rule_states[1].state_belief)
+        self.assertEqual(merged["R3"], StateBelief(compliant=0.7, at_risk=0.2, violating=0.1))
+
+    def test_decay_and_normalize(self):
+        store = BeliefStore()
+        store.update(["a.py"], ["R1"], [1.0], "frame_001")
+        store.decay(0.0)
+        self.assertEqual(store.to_rule_states("a.py").rule_states[0].state_belief, initial_state_belief())
+
+        store.beliefs[0, 0] = (2.0, 1.0, 1.0)
+        store.normalize()
+        self.assertEqual(store.beliefs[0, 0].tolist(), [0.5, 0.25, 0.25])
+
+if __name__ == '__main__':
+    unittest.main()
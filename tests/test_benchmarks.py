@@ -0,0 +1,48 @@
+import unittest
+from pathlib import Path
+import tempfile
+import shutil
+import os
+
+from benchmarks.run import run_benchmarks, compare, codec_speedups, percentile
+from benchmarks.vault_generator import generate_vault
+from dev_brain import vault_io, graph_manager
+
+class TestBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_generated_vault_and_report(self):
+        root = Path(self.test_dir)
+        generate_vault(root, files=12, decisions=6, frames=15, rules_per_file=3)
+
+        os.chdir(root)
+        self.assertEqual(len(vault_io.load_decisions()), 6)
+        self.assertEqual(vault_io.count_rule_state_files(), 12)
+        self.assertEqual(graph_manager.load_graph_head().frame_count, 15)
+
+        results = run_benchmarks(root, files=12, iterations=2)
+        self.assertIn("pipeline.run_cycle", results)
+        self.assertIn("brain_cli.migrate", results)
+        for stats in results.values():
+            self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+            self.assertGreater(stats["peak_memory_kb"], 0)
+        self.assertFalse((root / ".dev_brain" / "vault.sqlite3").exists())
+        self.assertIn("codec.load[json-min]", results)
+        self.assertEqual(set(codec_speedups(results)), {n for n in results if n.startswith("codec.") and not n.endswith("[legacy]")})
+
+        slower = {name: dict(stats, p50_ms=stats["p50_ms"] * 2) for name, stats in results.items()}
+        self.assertTrue(all(c["regressed"] for c in compare(slower, results, 1.2).values()))
+
+    def test_percentile(self):
+        self.assertEqual(percentile([3.0, 1.0, 2.0, 4.0], 50), 2.5)
+        self.assertEqual(percentile([5.0], 99), 5.0)
+
+if __name__ == '__main__':
+    unittest.main()
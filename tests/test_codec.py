@@ -0,0 +1,119 @@
+import unittest
+from unittest.mock import patch
+from io import StringIO
+from pathlib import Path
+import tempfile
+import shutil
+import os
+
+from dev_brain import brain_cli, codec, graph_manager, guardian, rule_index, symbol_index, vault_backend, vault_cache, vault_io
+from dev_brain.models import Decision, FileSummary, InterfaceView, Lenses
+from dev_brain.paths import summary_path_for
+
+def make_summary(file_path, classes):
+    return FileSummary(
+        file=file_path,
+        hash="sha256:x",
+        lenses=Lenses(interface_view=InterfaceView(classes=classes, public_methods=["run"], dependencies=[])),
+        governance_tags=["architecture"]
+    )
+
+class TestCodec(unittest.TestCase):
+
+    def test_round_trip(self):
+        summary = make_summary("svc.py", ["Service"])
+        formats = ["json", "json-min"] + (["msgpack"] if codec.msgpack is not None else [])
+        for fmt in formats:
+            data = codec.encode(summary, fmt)
+            self.assertEqual(codec.detect(data), "msgpack" if fmt == "msgpack" else "json")
+            self.assertEqual(codec.decode(data, FileSummary), summary)
+        self.assertLess(len(codec.encode(summary, "json-min")), len(codec.encode(summary, "json")))
+
+    def test_format_setting(self):
+        with patch.dict(os.environ, {"QDB_VAULT_FORMAT": "JSON-MIN"}):
+            self.assertEqual(codec.vault_format(), "json-min")
+            self.assertEqual(codec.index_format(), "json-min")
+        with patch.dict(os.environ, {"QDB_VAULT_FORMAT": "yaml"}):
+            with self.assertRaises(codec.CodecError):
+                codec.vault_format()
+        with patch.object(codec, "msgpack", None):
+            with self.assertRaises(codec.CodecError):
+                codec.check_format("msgpack")
+            with self.assertRaises(codec.CodecError):
+                codec.decode(codec.MSGPACK_MAGIC + b"\x80", FileSummary)
+
+@unittest.skipIf(codec.msgpack is None, "msgpack is not installed")
+class TestConvertVault(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.vault_root = Path(self.test_dir) / ".dev_brain"
+        for sub in ("summaries", "rule_states", "frames"):
+            (self.vault_root / sub).mkdir(parents=True)
+        vault_io.save_decisions([Decision(
+            id="DEC-SQL",
+            topic="Data Access",
+            rule="No direct SQL in services",
+            allowed_pattern="Use repositories",
+            forbidden_pattern="raw query",
+            status="strict",
+            scope_layer="architecture",
+            amplitude=0.9,
+        )])
+        vault_io.save_file_summary(make_summary("svc.py", ["Service"]))
+        guardian.process_change_event("use a raw query", ["svc.py"])
+        graph_manager.compact_graph()
+        # Build both derived indexes
+        vault_backend.get_backend().rule_index()
+        vault_backend.get_backend().symbol_index()
+
+    def tearDown(self):
+        vault_backend.get_backend().close()
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_mixed_formats_and_conversion(self):
+        # Writes follow the setting; earlier JSON files stay readable
+        with patch.dict(os.environ, {"QDB_VAULT_FORMAT": "msgpack"}):
+            vault_io.save_file_summary(make_summary("repo.py", ["Repository"]))
+        with open(summary_path_for("repo.py"), "rb") as f:
+            self.assertTrue(f.read().startswith(codec.MSGPACK_MAGIC))
+        vault_cache.clear_all()
+        self.assertEqual(vault_io.load_file_summary("repo.py").lenses.interface_view.classes, ["Repository"])
+        self.assertEqual(vault_io.load_file_summary("svc.py").lenses.interface_view.classes, ["Service"])
+
+        # Saving repo.py already wrote the symbol index as msgpack
+        counts = vault_backend.convert_vault_format("msgpack", dry_run=True)
+        self.assertEqual(counts, {"summaries": 1, "rule_states": 1, "frames": 1, "graph": 1, "indexes": 1})
+        counts = vault_backend.convert_vault_format("msgpack")
+        self.assertEqual(sum(counts.values()), 5)
+        self.assertEqual(sum(vault_backend.convert_vault_format("msgpack").values()), 0)
+        for path in [self.vault_root / "graph.json", *self.vault_root.glob("rule_states/*.json")]:
+            with open(path, "rb") as f:
+                self.assertEqual(codec.detect(f.read()), "msgpack")
+
+        # The indexes were restamped, not invalidated
+        self.assertIsNotNone(rule_index.load_index(self.vault_root))
+        self.assertIsNotNone(symbol_index.load_index(self.vault_root, cached=False))
+        self.assertEqual(vault_io.load_rule_states("svc.py").rule_states[0].rule_id, "DEC-SQL")
+        self.assertEqual(graph_manager.load_graph().frames[0].frame_id, "frame_001")
+        self.assertEqual(vault_io.load_frame("frame_001").changed_files, ["svc.py"])
+
+        with patch("sys.stdout", new=StringIO()) as out, patch("sys.argv", ["brain_cli", "convert", "json"]):
+            brain_cli.main()
+        self.assertIn("Converted 7 file(s) to json:", out.getvalue())
+        with open(summary_path_for("svc.py"), "rb") as f:
+            self.assertTrue(f.read().startswith(b"{\n"))
+
+    def test_corrupt_artifact(self):
+        with open(summary_path_for("svc.py"), "wb") as f:
+            f.write(codec.MSGPACK_MAGIC + b"\xc1")
+        vault_cache.clear_all()
+        with patch("sys.stdout", new=StringIO()) as out:
+            self.assertIsNone(vault_io.load_file_summary("svc.py"))
+        self.assertIn("Invalid msgpack artifact", out.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
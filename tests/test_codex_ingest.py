@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+import tempfile
+import shutil
+import sys
+import os
+
+from dev_brain import codex_ingest, vault_io
+from dev_brain.codex_brain import hash_source
+from dev_brain.models import FileSummary, Lenses
+
+class TestIncrementalIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.root = Path(self.test_dir).resolve()
+        (self.root / ".dev_brain" / "summaries").mkdir(parents=True)
+        (self.root / "pkg").mkdir()
+
+        self.files = {}
+        for name, content in [("same.py", "x = 1"), ("edited.py", "y = 2"), ("fresh.py", "z = 3")]:
+            path = self.root / "pkg" / name
+            path.write_text(content)
+            self.files[name] = path
+
+        self._store_summary(self.files["same.py"], hash_source("x = 1"))
+        self._store_summary(self.files["edited.py"], hash_source("y = 1"))
+        self._store_summary(self.root / "pkg" / "gone.py", hash_source("w = 0"))
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def _store_summary(self, path, file_hash):
+        vault_io.save_file_summary(FileSummary(
+            file=path.as_posix(), hash=file_hash, lenses=Lenses(), governance_tags=[]
+        ))
+
+    def _run_main(self, *argv):
+        with patch.object(sys, "argv", ["codex_ingest", "--root", str(self.root), *argv]), \
+             patch("dev_brain.codex_ingest.ingest_files") as mock_ingest, \
+             patch("sys.stdout"):
+            codex_ingest.main()
+        return mock_ingest
+
+    def test_plan_classifies_files(self):
+        plan = codex_ingest.plan_ingest(self.root, list(self.files.values()))
+        self.assertEqual(plan.new, [self.files["fresh.py"]])
+        self.assertEqual(plan.changed, [self.files["edited.py"]])
+        self.assertEqual(plan.unchanged, [self.files["same.py"]])
+        self.assertEqual(plan.deleted, [(self.root / "pkg" / "gone.py").as_posix()])
+
+    def test_force_refreshes_unchanged(self):
+        plan = codex_ingest.plan_ingest(self.root, list(self.files.values()), force=True)
+        self.assertEqual(plan.unchanged, [])
+        self.assertEqual(len(plan.to_ingest), 3)
+
+    def test_main_skips_unchanged_and_prunes(self):
+        mock_ingest = self._run_main()
+        ingested = sorted(p.name for p in mock_ingest.call_args.args[0])
+        self.assertEqual(ingested, ["edited.py", "fresh.py"])
+        self.assertIsNone(vault_io.load_file_summary((self.root / "pkg" / "gone.py").as_posix()))
+
+    def test_dry_run_changes_nothing(self):
+        mock_ingest = self._run_main("--dry-run")
+        mock_ingest.assert_not_called()
+        self.assertIsNotNone(vault_io.load_file_summary((self.root / "pkg" / "gone.py").as_posix()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+from pathlib import Path
+import ast
+import tempfile
+import shutil
+import os
+
+from fastapi.testclient import TestClient
+
+from dev_brain import vault_io
+from dev_brain.composer import generate_prompt_result
+from dev_brain.context_lens import slice_source, words_of
+from dev_brain.models import FileSummary, Lenses, LogicView
+from dev_brain.server import app
+
+def make_source(functions=20):
+    parts = ["import math\n\nRATE = 0.2\n\nclass Ledger:\n    \"\"\"Account ledger.\"\"\"\n"]
+    for i in range(functions):
+        parts.append(
+            f"    def entry_{i}(self, amount):\n"
+            f"        value = amount * RATE + {i}\n"
+            f"        value = math.floor(value * 100) / 100\n"
+            f"        if value < 0:\n"
+            f"            raise ValueError(f'negative entry {{value}}')\n"
+            f"        value = max(value, math.ceil(value / 10) * 10 - {i})\n"
+            f"        return value\n"
+        )
+    parts.append(
+        "\n    @staticmethod\n"
+        "    def apply_refund(amount):\n"
+        "        refund = round(amount, 2)\n"
+        "        return refund\n"
+    )
+    return "\n".join(parts)
+
+class TestContextLens(unittest.TestCase):
+
+    def test_slices_to_relevant_functions(self):
+        source = make_source()
+        result = slice_source(source, "Fix refund rounding", None, token_budget=400)
+        self.assertTrue(result.sliced)
+        self.assertLess(result.tokens, result.full_tokens)
+        self.assertLessEqual(result.tokens, 400)
+        self.assertEqual(result.included[0], "Ledger.apply_refund")
+        self.assertIn("refund = round(amount, 2)", result.text)
+        # Every function keeps its signature and the result is still valid Python
+        self.assertIn("    def entry_7(self, amount):\n        ...  # 6 lines elided", result.text)
+        self.assertIn("    @staticmethod\n    def apply_refund(amount):", result.text)
+        ast.parse(result.text)
+
+    def test_logic_view_guides_selection(self):
+        logic = LogicView(flow=["entry_3 computes the value"], critical_branches=[])
+        result = slice_source(make_source(), "Tidy up", logic, token_budget=420)
+        self.assertEqual(result.included[0], "Ledger.entry_3")
+
+    def test_small_or_unparseable_source_is_unchanged(self):
+        source = make_source(2)
+        self.assertEqual(slice_source(source, "x", None, token_budget=10000).text, source)
+        self.assertFalse(slice_source(source, "x", None, token_budget=0).sliced)
+        self.assertFalse(slice_source("def broken(:\n" * 200, "x", None, token_budget=10).sliced)
+
+    def test_body_on_header_line_is_kept(self):
+        source = "def f(\n    a): return a + 1\n" + make_source(2)
+        result = slice_source(source, "x", None, token_budget=10)
+        self.assertTrue(result.sliced)
+        self.assertIn("def f(\n    a): return a + 1\n", result.text)
+        ast.parse(result.text)
+
+    def test_words_split_identifiers(self):
+        self.assertEqual(words_of("applyRefund total_amount"), {"applyrefund", "apply", "refund", "total_amount", "total", "amount"})
+
+class TestComposerBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        vault_root = Path(self.test_dir) / ".dev_brain"
+        for sub in ("summaries", "rule_states", "frames"):
+            (vault_root / sub).mkdir(parents=True)
+        (vault_root / "decisions.json").write_text("[]")
+        Path("ledger.py").write_text(make_source())
+        vault_io.save_file_summary(FileSummary(file="ledger.py", hash="sha256:x", lenses=Lenses(), governance_tags=[]))
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_prompt_and_endpoint_report_tokens_saved(self):
+        full = generate_prompt_result("Fix refund rounding", "ledger.py")
+        self.assertEqual(full.tokens_saved, 0)
+        self.assertIn("[TARGET] ledger.py with full source code:", full.prompt)
+
+        sliced = generate_prompt_result("Fix refund rounding", "ledger.py", token_budget=400)
+        self.assertGreater(sliced.tokens_saved, 0)
+        self.assertIn("[TARGET] ledger.py sliced to", sliced.prompt)
+        self.assertIn("refund = round(amount, 2)", sliced.prompt)
+
+        client = TestClient(app)
+        body = client.post("/run-cycle", json={
+            "user_request": "Fix refund rounding", "target_file": "ledger.py", "token_budget": 400
+        }).json()
+        self.assertEqual(body["tokens_saved"], sliced.tokens_saved)
+
+if __name__ == '__main__':
+    unittest.main()
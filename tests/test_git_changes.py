@@ -0,0 +1,117 @@
+import unittest
+from argparse import Namespace
+from pathlib import Path
+from unittest import mock
+from io import StringIO
+import shutil
+import subprocess
+import tempfile
+import os
+
+from dev_brain import codex_ingest, vault_io
+from dev_brain.git_changes import GitChange, GitError, changed_files, parse_name_status
+
+def git(cwd, *args):
+    subprocess.run(["git", *args], cwd=str(cwd), check=True, capture_output=True)
+
+class TestParseNameStatus(unittest.TestCase):
+
+    def test_parses_z_output(self):
+        top = Path("/repo")
+        output = "M\0a.py\0R100\0old.py\0new.py\0D\0gone.py\0C75\0src.py\0copy.py\0A\0added.py\0"
+        self.assertEqual(parse_name_status(output, top), [
+            GitChange("M", top / "a.py"),
+            GitChange("R", top / "new.py", top / "old.py"),
+            GitChange("D", top / "gone.py"),
+            GitChange("A", top / "copy.py"),
+            GitChange("A", top / "added.py"),
+        ])
+
+class TestGitIngest(unittest.TestCase):
+
+    def setUp(self):
+        if shutil.which("git") is None:
+            self.skipTest("git not installed")
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.root = Path(self.test_dir).resolve()
+        (self.root / ".dev_brain" / "summaries").mkdir(parents=True)
+        (self.root / "pkg").mkdir()
+        (self.root / ".gitignore").write_text(".dev_brain/\n")
+        for name in ("keep", "edit", "move", "drop"):
+            (self.root / "pkg" / f"{name}.py").write_text(f"def {name}():\n    return '{name}'\n")
+        git(self.root, "init", "-q")
+        git(self.root, "config", "user.email", "dev@example.com")
+        git(self.root, "config", "user.name", "Dev")
+        git(self.root, "add", ".")
+        git(self.root, "commit", "-q", "-m", "initial")
+        codex_ingest.ingest_static(codex_ingest.scan_files(self.root, "**/*.py"), processes=1)
+        self.args = Namespace(engine="static", processes=1, workers=1, rpm=None, tpm=None, max_retries=0)
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def key(self, name):
+        return (self.root / "pkg" / name).as_posix()
+
+    def _make_changes(self):
+        (self.root / "pkg" / "edit.py").write_text("def edited():\n    return 1\n")
+        (self.root / "pkg" / "fresh.py").write_text("def fresh():\n    return 2\n")
+        git(self.root, "mv", "pkg/move.py", "pkg/moved.py")
+        git(self.root, "rm", "-q", "pkg/drop.py")
+
+    def test_since_ref(self):
+        self._make_changes()
+        plan = codex_ingest.plan_git_changes(self.root, "**/*.py", changed_files(self.root, since="HEAD"))
+        self.assertEqual(plan.renamed, [(self.key("move.py"), self.key("moved.py"))])
+        self.assertEqual(plan.unchanged, [self.root / "pkg" / "moved.py"])
+        self.assertEqual(plan.deleted, [self.key("drop.py")])
+        self.assertEqual(sorted(p.name for p in plan.to_ingest), ["edit.py", "fresh.py"])
+
+        with mock.patch.object(codex_ingest, "ingest_static", wraps=codex_ingest.ingest_static) as ingest:
+            codex_ingest.apply_plan(plan, self.args)
+        self.assertEqual(sorted(p.name for p in ingest.call_args.args[0]), ["edit.py", "fresh.py"])
+
+        moved = vault_io.load_file_summary(self.key("moved.py"))
+        self.assertEqual(moved.file, self.key("moved.py"))
+        self.assertEqual(moved.lenses.interface_view.public_methods, ["move"])
+        self.assertIsNone(vault_io.load_file_summary(self.key("move.py")))
+        self.assertIsNone(vault_io.load_file_summary(self.key("drop.py")))
+        self.assertEqual(vault_io.load_file_summary(self.key("edit.py")).lenses.interface_view.public_methods, ["edited"])
+        self.assertIsNotNone(vault_io.load_file_summary(self.key("fresh.py")))
+
+    def test_summary_reports_actual_results(self):
+        self._make_changes()
+        (self.root / "pkg" / "edit.py").write_text("def edited(:\n")
+        plan = codex_ingest.plan_git_changes(self.root, "**/*.py", changed_files(self.root, since="HEAD"))
+        with mock.patch("sys.stdout", new=StringIO()) as out:
+            codex_ingest.apply_plan(plan, self.args)
+        self.assertIn("Done: skipped=1, refreshed=0, new=1, failed=1, pruned=1", out.getvalue())
+
+    def test_staged_via_cli(self):
+        self._make_changes()
+        argv = ["codex_ingest", "--root", str(self.root), "--engine", "static", "--processes", "1", "--staged"]
+        with mock.patch("sys.argv", argv):
+            codex_ingest.main()
+        # Only the rename and the delete are staged; the edit and the new file are not
+        self.assertIsNotNone(vault_io.load_file_summary(self.key("moved.py")))
+        self.assertIsNone(vault_io.load_file_summary(self.key("drop.py")))
+        self.assertEqual(vault_io.load_file_summary(self.key("edit.py")).lenses.interface_view.public_methods, ["edit"])
+        self.assertIsNone(vault_io.load_file_summary(self.key("fresh.py")))
+
+    def test_since_is_never_an_option(self):
+        with self.assertRaises(GitError):
+            changed_files(self.root, since="--output=leak.txt")
+        self.assertFalse((self.root / "leak.txt").exists())
+        with self.assertRaises(GitError):
+            changed_files(self.root, since="no-such-ref")
+
+    def test_outside_repository(self):
+        shutil.rmtree(self.root / ".git")
+        with self.assertRaises(GitError):
+            changed_files(self.root, since="HEAD")
+
+if __name__ == '__main__':
+    unittest.main()
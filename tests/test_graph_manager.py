@@ -0,0 +1,141 @@
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+import json
+import tempfile
+import shutil
+import os
+
+from dev_brain import graph_manager
+from dev_brain.models import FrameSnapshot, GraphEdge
+from dev_brain.graph_index import IndexedGraph
+
+def make_frame(frame_id, timestamp="2025-01-01T00:00:00Z"):
+    return FrameSnapshot(
+        frame_id=frame_id,
+        timestamp=timestamp,
+        user_goal="test",
+        changed_files=[],
+        relevant_decisions=[],
+        suspected_violations=[],
+        predicted_risks=[],
+        next_steps=[]
+    )
+
+class TestGraphJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.vault_root = Path(self.test_dir) / ".dev_brain"
+        self.vault_root.mkdir()
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def _append(self, frame_id):
+        head = graph_manager.load_graph_head()
+        edges = []
+        if head.last_frame_id:
+            edges.append(GraphEdge(from_frame_id=head.last_frame_id, to_frame_id=frame_id, type="sequence", weight=1.0))
+        return graph_manager.append_to_graph(make_frame(frame_id), edges)
+
+    def test_append_does_not_rewrite_checkpoint(self):
+        self._append("frame_001")
+        self._append("frame_002")
+
+        self.assertFalse(graph_manager.get_graph_path().exists())
+        graph = graph_manager.load_graph()
+        self.assertEqual([f.frame_id for f in graph.frames], ["frame_001", "frame_002"])
+        self.assertEqual(len(graph.edges), 1)
+
+        head = graph_manager.load_graph_head()
+        self.assertEqual(head.frame_count, 2)
+        self.assertEqual(head.last_frame_id, "frame_002")
+
+    def test_compaction_folds_journal(self):
+        with patch.dict(os.environ, {"QDB_GRAPH_COMPACT_EVERY": "3"}):
+            self._append("frame_001")
+            self._append("frame_002")  # frame + edge reaches the threshold
+
+        self.assertFalse(graph_manager.get_journal_path().exists())
+        with open(graph_manager.get_graph_path()) as f:
+            checkpoint = json.load(f)
+        self.assertEqual(len(checkpoint["frames"]), 2)
+
+        self._append("frame_003")
+        graph = graph_manager.load_graph()
+        self.assertEqual(len(graph.frames), 3)
+        self.assertEqual(len(graph.edges), 2)
+
+    def test_head_rebuilt_after_manual_checkpoint_edit(self):
+        self._append("frame_001")
+        graph_manager.compact_graph()
+        with open(graph_manager.get_graph_path(), "w") as f:
+            f.write(json.dumps({"frames": [make_frame("frame_x").model_dump(), make_frame("frame_y").model_dump()], "edges": []}))
+
+        head = graph_manager.load_graph_head()
+        self.assertEqual(head.frame_count, 2)
+        self.assertEqual(head.last_frame_id, "frame_y")
+
+    def test_rebuilt_head_keeps_last_appended_frame(self):
+        # A backfilled event appended last, with an earlier timestamp
+        graph_manager.append_frames_to_graph([(make_frame("frame_001", "2025-01-02T00:00:00Z"), [])], link_sequence=True)
+        graph_manager.append_frames_to_graph([(make_frame("frame_002", "2025-01-01T00:00:00Z"), [])], link_sequence=True)
+        appended = graph_manager.load_graph_head()
+        graph_manager.get_head_path().unlink()
+        self.assertEqual(graph_manager.load_graph_head().last_frame_id, appended.last_frame_id)
+
+        graph_manager.compact_graph()
+        self.assertEqual(graph_manager.load_graph_head().last_frame_id, "frame_002")
+        graph_manager.append_frames_to_graph([(make_frame("frame_003"), [])], link_sequence=True)
+        sequence = [(e.from_frame_id, e.to_frame_id) for e in graph_manager.load_graph().edges]
+        self.assertEqual(sequence, [("frame_001", "frame_002"), ("frame_002", "frame_003")])
+
+    def test_torn_journal_record_is_repaired(self):
+        self._append("frame_001")
+        with open(graph_manager.get_journal_path(), "a") as f:
+            f.write('{"op": "frame", "fra')
+
+        self._append("frame_002")
+        graph = graph_manager.load_graph()
+        self.assertEqual([f.frame_id for f in graph.frames], ["frame_001", "frame_002"])
+
+class TestIndexedGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = IndexedGraph()
+        for i, ts in enumerate(["2025-01-01T00:00:01Z", "2025-01-01T00:00:03Z", "2025-01-01T00:00:02Z", "2025-01-01T00:00:04Z"]):
+            self.graph.add_frame(make_frame(f"frame_{i + 1:03d}", ts))
+        self.graph.add_edge("frame_001", "frame_002", "sequence")
+        self.graph.add_edge("frame_002", "frame_003", "sequence")
+        self.graph.add_edge("frame_003", "frame_004", "sequence")
+
+    def test_insertion_is_idempotent(self):
+        self.assertFalse(self.graph.add_frame(make_frame("frame_001")))
+        self.assertFalse(self.graph.add_edge("frame_001", "frame_002", "sequence"))
+        self.assertTrue(self.graph.add_edge("frame_001", "frame_002", "same_file"))
+        self.assertEqual(len(self.graph), 4)
+        self.assertEqual(len(self.graph.edges), 4)
+
+    def test_time_index(self):
+        self.assertEqual(self.graph.latest_frame().frame_id, "frame_004")
+        between = self.graph.frames_between("2025-01-01T00:00:02Z", "2025-01-01T00:00:03Z")
+        self.assertEqual([f.frame_id for f in between], ["frame_003", "frame_002"])
+
+    def test_ancestry(self):
+        self.assertEqual(self.graph.ancestors("frame_004"), ["frame_003", "frame_002", "frame_001"])
+        self.assertEqual(self.graph.ancestors("frame_004", max_depth=2), ["frame_003", "frame_002"])
+        self.assertEqual(self.graph.descendants("frame_002"), ["frame_003", "frame_004"])
+        self.assertEqual(self.graph.neighbours("frame_002"), ["frame_001", "frame_003"])
+
+    def test_graph_round_trip(self):
+        graph = self.graph.to_graph()
+        self.assertEqual([f.frame_id for f in graph.frames], ["frame_001", "frame_002", "frame_003", "frame_004"])
+        rebuilt = IndexedGraph.from_graph(graph)
+        self.assertEqual(rebuilt.predecessors("frame_003"), ["frame_002"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+from unittest.mock import patch
+from io import StringIO
+from pathlib import Path
+import tempfile
+import shutil
+import os
+
+from dev_brain import brain_cli, graph_manager, graph_query
+from dev_brain.graph_index import IndexedGraph
+from dev_brain.models import FrameSnapshot, GraphEdge
+
+def make_frame(n, files, rules):
+    return FrameSnapshot(
+        frame_id=f"frame_{n:03d}",
+        timestamp=f"2025-01-01T{n:02d}:00:00Z",
+        user_goal=f"change {n}",
+        changed_files=files,
+        relevant_decisions=rules,
+        suspected_violations=[],
+        predicted_risks=[],
+        next_steps=[],
+    )
+
+# frame n at hour n; sequence edges 1 -> 2 -> ... -> 8
+LAYOUT = [
+    (["a.py"], ["DEC-1"]),
+    (["b.py"], ["DEC-2"]),
+    (["c.py"], ["DEC-2"]),
+    (["b.py"], []),
+    (["a.py", "c.py"], ["DEC-1"]),
+    (["d.py"], []),
+    (["d.py"], ["DEC-2"]),
+    (["a.py"], ["DEC-1", "DEC-2"]),
+]
+
+def build_graph():
+    graph = IndexedGraph()
+    for n, (files, rules) in enumerate(LAYOUT, start=1):
+        graph.add_frame(make_frame(n, files, rules))
+        if n > 1:
+            graph.add_edge(f"frame_{n - 1:03d}", f"frame_{n:03d}", "sequence")
+    return graph
+
+class TestGraphQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = build_graph()
+
+    def test_derived_edges(self):
+        out = graph_query.edges(self.graph, "frame_001", ["same_file"])
+        self.assertEqual([(e.to_frame_id, e.type) for e in out], [("frame_005", "same_file")])
+        into = graph_query.edges(self.graph, "frame_005", ["same_file"], forward=False)
+        self.assertEqual(sorted(e.from_frame_id for e in into), ["frame_001", "frame_003"])
+        self.assertEqual(
+            sorted((e.to_frame_id, e.type) for e in graph_query.edges(self.graph, "frame_002")),
+            [("frame_003", "same_rule"), ("frame_003", "sequence"), ("frame_004", "same_file")],
+        )
+
+    def test_shortest_path(self):
+        path = graph_query.shortest_path(self.graph, "frame_001", "frame_008")
+        self.assertEqual(path, [("frame_001", None), ("frame_005", "same_file"), ("frame_008", "same_file")])
+        sequence_only = graph_query.shortest_path(self.graph, "frame_001", "frame_008", ["sequence"])
+        self.assertEqual(len(sequence_only), 8)
+        self.assertIsNone(graph_query.shortest_path(self.graph, "frame_001", "frame_008", ["sequence"], max_depth=3))
+        self.assertIsNone(graph_query.shortest_path(self.graph, "frame_008", "frame_001"))
+        self.assertEqual(graph_query.shortest_path(self.graph, "frame_003", "frame_003"), [("frame_003", None)])
+
+    def test_ancestry(self):
+        self.assertEqual(graph_query.ancestors(self.graph, "frame_008", 1, ["same_rule"]), ["frame_005", "frame_007"])
+        self.assertEqual(graph_query.ancestors(self.graph, "frame_004", edge_types=["sequence"]), ["frame_003", "frame_002", "frame_001"])
+        self.assertEqual(graph_query.descendants(self.graph, "frame_001", 2, ["sequence"]), ["frame_002", "frame_003"])
+        self.assertEqual(len(graph_query.descendants(self.graph, "frame_001", limit=4)), 4)
+
+    def test_touching_window(self):
+        self.assertEqual(graph_query.frames_touching(self.graph, file_path="a.py"), ["frame_001", "frame_005", "frame_008"])
+        self.assertEqual(graph_query.frames_touching(self.graph, rule_id="DEC-2", start="2025-01-01T03:00:00Z"), ["frame_003", "frame_007", "frame_008"])
+        self.assertEqual(graph_query.frames_touching(self.graph, "a.py", "DEC-2"), ["frame_008"])
+        start = graph_query.window_start(self.graph, "3h")
+        self.assertEqual(start, "2025-01-01T05:00:00Z")
+        self.assertEqual(graph_query.frames_touching(self.graph, file_path="a.py", start=start), ["frame_005", "frame_008"])
+        with self.assertRaises(ValueError):
+            graph_query.parse_duration("soon")
+
+class TestSharedGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        (Path(self.test_dir) / ".dev_brain").mkdir()
+        graph_manager.save_graph(build_graph())
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_refreshes_incrementally(self):
+        with graph_manager.shared_graph() as graph:
+            first = graph
+            self.assertEqual(len(graph), 8)
+        graph_manager.append_to_graph(make_frame(9, ["a.py"], []), [GraphEdge(
+            from_frame_id="frame_008", to_frame_id="frame_009", type="sequence", weight=1.0)])
+        with graph_manager.shared_graph() as graph:
+            self.assertIs(graph, first)
+            self.assertEqual(graph.frames_for_file("a.py")[-1], "frame_009")
+        graph_manager.compact_graph()
+        with graph_manager.shared_graph() as graph:
+            self.assertIsNot(graph, first)
+            self.assertEqual(len(graph), 9)
+
+    def test_cli_and_server(self):
+        with patch("sys.stdout", new=StringIO()) as out, patch("sys.argv", ["brain_cli", "graph", "path", "frame_002", "frame_004"]):
+            brain_cli.main()
+        self.assertIn("Path (1 edges):", out.getvalue())
+        self.assertIn("--same_file--> frame_004", out.getvalue())
+
+        argv = ["brain_cli", "graph", "touching", "--rule", "DEC-1", "--window", "4h"]
+        with patch("sys.stdout", new=StringIO()) as out, patch("sys.argv", argv):
+            brain_cli.main()
+        self.assertIn("Frames touching rule DEC-1: 2", out.getvalue())
+
+        from fastapi.testclient import TestClient
+        from dev_brain.server import app
+        client = TestClient(app)
+        response = client.get("/graph/path", params={"source": "frame_001", "target": "frame_004", "edge_type": ["sequence"]})
+        self.assertEqual([s["frame_id"] for s in response.json()["path"]], ["frame_001", "frame_002", "frame_003", "frame_004"])
+        response = client.get("/graph/frames/frame_008/ancestors", params={"depth": 1, "edge_type": "same_file"})
+        self.assertEqual(response.json()["frame_ids"], ["frame_005"])
+        response = client.get("/graph/touching", params={"file": "d.py"})
+        self.assertEqual(response.json()["frame_ids"], ["frame_006", "frame_007"])
+        self.assertEqual(client.get("/graph/touching", params={"window": "soon"}).status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+from io import StringIO
+from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import json
+import re
+import tempfile
+import threading
+import shutil
+import time
+import os
+
+import openai
+
+from dev_brain import vault_io
+from dev_brain.ingest_pool import TokenBucket, ingest_files_concurrently
+
+class StubChatCompletions(BaseHTTPRequestHandler):
+    """Mimics POST /v1/chat/completions, answering with a FileSummary JSON body."""
+
+    lock = threading.Lock()
+    attempts = {}
+    in_flight = 0
+    max_in_flight = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][1]["content"]
+        file_path = re.search(r'"file": "([^"]+)"', prompt).group(1)
+
+        cls = StubChatCompletions
+        with cls.lock:
+            cls.attempts[file_path] = cls.attempts.get(file_path, 0) + 1
+            attempt = cls.attempts[file_path]
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(0.05)
+            if "flaky" in file_path and attempt == 1:
+                self._send(429, {"error": {"message": "rate limited", "type": "rate_limit"}}, {"Retry-After": "0"})
+                return
+            if "broken" in file_path:
+                self._send(400, {"error": {"message": "bad request", "type": "invalid_request"}})
+                return
+            summary = {
+                "lenses": {
+                    "interface_view": {"classes": [Path(file_path).stem.title()], "public_methods": [], "dependencies": []},
+                    "logic_view": {"flow": [], "critical_branches": []},
+                    "data_view": {"reads_from": [], "writes_to": [], "side_effects": []}
+                },
+                "governance_tags": ["stub"]
+            }
+            self._send(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": json.dumps(summary)},
+                    "finish_reason": "stop"
+                }]
+            })
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+class TestConcurrentIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        (Path(self.test_dir) / ".dev_brain" / "summaries").mkdir(parents=True)
+
+        StubChatCompletions.attempts = {}
+        StubChatCompletions.max_in_flight = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubChatCompletions)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = openai.OpenAI(
+            api_key="test",
+            base_url=f"http://127.0.0.1:{self.server.server_address[1]}/v1",
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def _make_files(self, names):
+        paths = []
+        for name in names:
+            p = Path(name)
+            p.write_text(f"class {p.stem.title()}: pass")
+            paths.append(p)
+        return paths
+
+    def test_ingest_against_stub_server(self):
+        paths = self._make_files([f"mod_{i}.py" for i in range(6)] + ["flaky.py", "broken.py"])
+
+        with patch("sys.stdout", new=StringIO()) as out:
+            report = ingest_files_concurrently(paths, workers=4, client=self.client, base_delay=0.01)
+
+        self.assertEqual(report.total, 8)
+        self.assertEqual(report.succeeded, 7)
+        self.assertEqual(report.failed, ["broken.py"])
+        self.assertEqual(StubChatCompletions.attempts["flaky.py"], 2)
+        self.assertEqual(StubChatCompletions.attempts["broken.py"], 1)
+        # The retried 429 is not reported; the failure is, once
+        self.assertNotIn("flaky.py -> Failed", out.getvalue())
+        self.assertEqual(out.getvalue().count("broken.py"), 1)
+        self.assertGreater(StubChatCompletions.max_in_flight, 1)
+        self.assertEqual(vault_io.load_file_summary("mod_3.py").lenses.interface_view.classes, ["Mod_3"])
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_waits_for_refill(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(60, clock=lambda: now[0], sleep=sleep)  # 1 token per second
+        for _ in range(60):
+            bucket.acquire()
+        self.assertEqual(sleeps, [])
+
+        bucket.acquire(2)
+        self.assertAlmostEqual(sum(sleeps), 2.0)
+
+        # Oversized requests are clamped to the bucket capacity rather than blocking forever
+        bucket.acquire(1000)
+        self.assertAlmostEqual(now[0], 62.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+from unittest.mock import patch
+from io import StringIO
+from pathlib import Path
+import tempfile
+import shutil
+import os
+import time
+
+from dev_brain import belief_history, brain_cli, guardian, layout, paths, rule_index, symbol_index, vault_backend, vault_cache, vault_io
+from dev_brain.models import Decision, FileSummary, InterfaceView, Lenses
+
+def make_summary(file_path, classes):
+    return FileSummary(
+        file=file_path,
+        hash="sha256:x",
+        lenses=Lenses(interface_view=InterfaceView(classes=classes, public_methods=[], dependencies=[])),
+        governance_tags=[]
+    )
+
+class TestLayout(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.vault_root = Path(self.test_dir) / ".dev_brain"
+        for sub in ("summaries", "rule_states", "frames"):
+            (self.vault_root / sub).mkdir(parents=True)
+        vault_io.save_decisions([Decision(
+            id="DEC-SQL",
+            topic="Data Access",
+            rule="No direct SQL in services",
+            allowed_pattern="Use repositories",
+            forbidden_pattern="raw query",
+            status="strict",
+            scope_layer="architecture",
+            amplitude=0.9,
+        )])
+
+    def tearDown(self):
+        vault_backend.get_backend().close()
+        vault_cache.clear_all()
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_paths(self):
+        self.assertEqual(paths.summary_path_for("a/b_c.py"), paths.summary_path_for("a_b/c.py"))
+        (self.vault_root / paths.LAYOUT_FILENAME).write_text("{}")
+        self.assertNotEqual(paths.summary_path_for("a/b_c.py"), paths.summary_path_for("a_b/c.py"))
+        self.assertEqual(paths.summary_path_for("./src\\a.py"), paths.summary_path_for("src/a.py"))
+        path = paths.rule_state_path_for("src/a.py")
+        digest = paths.path_hash("src/a.py")
+        self.assertEqual(path.relative_to(self.vault_root).parts, ("rule_states", digest[:2], digest[2:4], f"{digest}.json"))
+
+    def test_migration(self):
+        vault_io.save_file_summary(make_summary("svc/a.py", ["A"]))
+        vault_io.save_file_summary(make_summary("lib/b.py", ["B"]))
+        guardian.process_change_event("use a raw query", ["svc/a.py"])
+        guardian.process_change_event("tidy up", ["other.py"])
+        (self.vault_root / "history" / "gone.py.jsonl").write_text("")
+        backend = vault_backend.get_backend()
+        backend.rule_index()
+        backend.symbol_index()
+
+        counts = vault_backend.migrate_to_sharded_layout(dry_run=True)
+        self.assertEqual(counts, {"summaries": 2, "rule_states": 2, "history": 2, "unmatched": 1})
+        self.assertFalse(paths.is_sharded())
+        vault_backend.migrate_to_sharded_layout()
+        self.assertTrue(paths.is_sharded())
+        self.assertEqual(list((self.vault_root / "summaries").glob("*.json")), [])
+
+        self.assertEqual(vault_io.load_file_summary("svc/a.py").lenses.interface_view.classes, ["A"])
+        self.assertEqual(vault_io.load_rule_states("svc/a.py").rule_states[0].rule_id, "DEC-SQL")
+        self.assertEqual(belief_history.belief_at("svc/a.py", "DEC-SQL").frame_id, "frame_001")
+        self.assertEqual(sorted(s.file for s in vault_io.iter_file_summaries()), ["lib/b.py", "svc/a.py"])
+        self.assertEqual(vault_io.count_rule_state_files(), 2)
+        self.assertIsNotNone(rule_index.load_index(self.vault_root))
+        self.assertIsNotNone(symbol_index.load_index(self.vault_root, cached=False))
+        self.assertEqual(layout.file_for_hash(self.vault_root, paths.path_hash("other.py")), "other.py")
+
+        # Paths that collided in the flat layout now get separate artifacts
+        vault_io.save_file_summary(make_summary("a/b_c.py", ["One"]))
+        vault_io.save_file_summary(make_summary("a_b/c.py", ["Two"]))
+        self.assertEqual(vault_io.load_file_summary("a/b_c.py").lenses.interface_view.classes, ["One"])
+        self.assertEqual(len(layout.load_manifest(self.vault_root)), 5)
+
+        with patch("sys.stdout", new=StringIO()) as out, patch("sys.argv", ["brain_cli", "layout"]):
+            brain_cli.main()
+        self.assertIn("Vault layout: sharded (5 path(s) in the manifest)", out.getvalue())
+
+    def test_index_notices_external_edits(self):
+        guardian.process_change_event("use a raw query", ["svc/a.py"])
+        guardian.process_change_event("tidy up", ["lib/b.py"])
+        vault_io.load_rule_index()
+        vault_backend.migrate_to_sharded_layout()
+        self.assertIsNotNone(rule_index.load_index(self.vault_root))
+
+        # Another tool rewrites a.py's rule states without going through the backend
+        path = paths.rule_state_path_for("svc/a.py")
+        rs_obj = vault_io.load_rule_states("svc/a.py").model_copy(deep=True)
+        rs_obj.rule_states[0].state_belief.violating = 0.9
+        time.sleep(0.01)
+        vault_backend.write_atomic(path, rs_obj.model_dump_json().encode("utf-8"))
+        self.assertIsNone(rule_index.load_index(self.vault_root, fresh=True))
+        self.assertEqual(vault_io.load_rule_index().rules["DEC-SQL"].top_violating[0], ["svc/a.py", 0.9])
+
+        # A backend write right after an external one does not hide it
+        guardian.process_change_event("tidy up", ["lib/b.py"])
+        time.sleep(0.01)
+        vault_backend.write_atomic(path, rs_obj.model_dump_json().encode("utf-8"))
+        guardian.process_change_event("tidy up", ["lib/b.py"])
+        self.assertIsNone(rule_index.load_index(self.vault_root, fresh=True))
+
+    def test_interrupted_migration_resumes(self):
+        vault_io.save_file_summary(make_summary("svc/a.py", ["A"]))
+        vault_io.save_file_summary(make_summary("lib/b.py", ["B"]))
+        # As if a run stopped after moving svc/a.py
+        moved = paths.sharded_path(self.vault_root, "summaries", "svc/a.py", ".json")
+        moved.parent.mkdir(parents=True)
+        os.replace(paths.summary_path_for("svc/a.py"), moved)
+
+        with patch("sys.stdout", new=StringIO()) as out, patch("sys.argv", ["brain_cli", "layout", "--migrate"]):
+            brain_cli.main()
+        self.assertIn("Moved 1 artifact(s) to the sharded layout:", out.getvalue())
+        self.assertEqual(sorted(layout.load_manifest(self.vault_root).values()), ["lib/b.py", "svc/a.py"])
+        self.assertEqual(vault_io.load_file_summary("svc/a.py").lenses.interface_view.classes, ["A"])
+
+if __name__ == '__main__':
+    unittest.main()
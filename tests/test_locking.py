@@ -0,0 +1,99 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import json
+import tempfile
+import threading
+import shutil
+import os
+
+from dev_brain import vault_io, graph_manager
+from dev_brain.guardian import process_change_event, process_change_events, ChangeEvent
+from dev_brain.locking import RULE_STATE_LOCK_STRIPES, graph_lock, rule_state_lock, rule_state_locks
+from dev_brain.models import Decision
+
+class TestConcurrentGuardian(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+
+        vault_root = Path(self.test_dir) / ".dev_brain"
+        for sub in ("summaries", "rule_states", "frames"):
+            (vault_root / sub).mkdir(parents=True)
+        decision = Decision(
+            id="DEC-SQL",
+            topic="Data Access",
+            rule="No direct SQL in Service Layers",
+            allowed_pattern="Use Repository Pattern only",
+            forbidden_pattern="raw query in service",
+            status="strict",
+            scope_layer="architecture",
+            amplitude=0.9
+        )
+        with open(vault_root / "decisions.json", "w") as f:
+            f.write(json.dumps([decision.model_dump()]))
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_concurrent_events_get_unique_frames_and_keep_all_updates(self):
+        def run(i):
+            return process_change_event(f"Event {i}", ["services/shared.py", f"services/own_{i % 4}.py"])
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            frame_ids = list(pool.map(run, range(40)))
+
+        self.assertEqual(sorted(frame_ids), [f"frame_{n:03d}" for n in range(1, 41)])
+
+        graph = graph_manager.load_indexed_graph()
+        self.assertEqual(len(graph), 40)
+        self.assertEqual(graph_manager.load_graph_head().frame_count, 40)
+
+        # The sequence edges form a single chain through every frame
+        sequence = [e for e in graph.edges if e.type == "sequence"]
+        self.assertEqual(len(sequence), 39)
+        self.assertEqual(len({e.to_frame_id for e in sequence}), 39)
+        self.assertEqual(len({e.from_frame_id for e in sequence}), 39)
+
+        # Every event's update to the shared file was applied: the last writer saw all others
+        shared = vault_io.load_rule_states("services/shared.py")
+        self.assertIn(shared.rule_states[0].last_updated_frame, frame_ids)
+        self.assertEqual(vault_io.count_frames(), 40)
+
+    def test_allocated_ids_are_not_reused(self):
+        reserved = graph_manager.allocate_frame_ids(2)
+        self.assertEqual(reserved, ["frame_001", "frame_002"])
+
+        # Frames reserved but never appended are skipped, not handed out again
+        results = process_change_events([ChangeEvent(user_goal="Add logging", changed_files=["a.py"])])
+        self.assertEqual(results[0].frame_id, "frame_003")
+
+    def test_graph_lock_is_reentrant(self):
+        acquired = []
+        with graph_lock():
+            with graph_lock():
+                graph_manager.compact_graph()
+
+            def other():
+                with graph_lock():
+                    acquired.append(True)
+
+            t = threading.Thread(target=other)
+            t.start()
+            t.join(timeout=0.2)
+            self.assertEqual(acquired, [])
+        t.join(timeout=5)
+        self.assertEqual(acquired, [True])
+
+    def test_rule_state_locks_are_striped(self):
+        files = [f"pkg/mod_{i}.py" for i in range(2000)]
+        with rule_state_locks(files):
+            self.assertIs(rule_state_lock("pkg/mod_7.py"), rule_state_lock("pkg/mod_7.py"))
+        lock_files = list((Path(self.test_dir) / ".dev_brain" / "locks").glob("rule_state_*.lock"))
+        self.assertEqual(len(lock_files), RULE_STATE_LOCK_STRIPES)
+
+if __name__ == '__main__':
+    unittest.main()
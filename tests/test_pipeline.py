@@ -0,0 +1,93 @@
+import unittest
+from pathlib import Path
+import json
+import tempfile
+import shutil
+import os
+
+from dev_brain import vault_io, graph_manager
+from dev_brain.models import Decision
+from dev_brain.pipeline import run_cycle, run_cycles, CycleEvent
+
+EVENTS = [
+    CycleEvent(user_request="Refactor the payment flow", target_file="services/pay.py"),
+    CycleEvent(user_request="Run a raw query against the ledger", target_file="services/pay.py",
+               changed_files=["services/pay.py", "services/ledger.py"]),
+    CycleEvent(user_request="I know it violates the rule, bypass the repository", target_file="services/ledger.py"),
+    CycleEvent(user_request="Add logging", target_file="services/pay.py", changed_files=["services/other.py"]),
+]
+
+class TestBatchPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.dirs = [self._make_vault(), self._make_vault()]
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        for d in self.dirs:
+            shutil.rmtree(d)
+
+    def _make_vault(self):
+        test_dir = tempfile.mkdtemp()
+        vault_root = Path(test_dir) / ".dev_brain"
+        for sub in ("summaries", "rule_states", "frames"):
+            (vault_root / sub).mkdir(parents=True)
+        (Path(test_dir) / "services").mkdir()
+        for name in ("pay.py", "ledger.py"):
+            (Path(test_dir) / "services" / name).write_text(f"# {name}")
+        decision = Decision(
+            id="DEC-SQL",
+            topic="Data Access",
+            rule="No direct SQL in Service Layers",
+            allowed_pattern="Use Repository Pattern only",
+            forbidden_pattern="raw query in service",
+            status="strict",
+            scope_layer="architecture",
+            amplitude=0.9
+        )
+        with open(vault_root / "decisions.json", "w") as f:
+            f.write(json.dumps([decision.model_dump()]))
+        return test_dir
+
+    def _vault_snapshot(self):
+        rule_states = {
+            f: vault_io.load_rule_states(f).model_dump()
+            for f in ("services/pay.py", "services/ledger.py", "services/other.py")
+        }
+        graph = graph_manager.load_graph()
+        edges = [(e.from_frame_id, e.to_frame_id, e.type) for e in graph.edges]
+        return rule_states, [f.frame_id for f in graph.frames], edges
+
+    def test_batch_matches_sequential_cycles(self):
+        os.chdir(self.dirs[0])
+        sequential = [run_cycle(e.user_request, e.target_file, e.changed_files) for e in EVENTS]
+        sequential_state = self._vault_snapshot()
+
+        os.chdir(self.dirs[1])
+        batch = run_cycles(EVENTS)
+        batch_state = self._vault_snapshot()
+
+        self.assertEqual([f for f, _ in batch], ["frame_001", "frame_002", "frame_003", "frame_004"])
+        self.assertEqual([p for _, p in batch], [p for _, p in sequential])
+        self.assertEqual(batch_state, sequential_state)
+
+    def test_batch_endpoint(self):
+        from fastapi.testclient import TestClient
+        from dev_brain.server import app
+
+        os.chdir(self.dirs[0])
+        run_cycle("Earlier event", "services/pay.py")
+
+        client = TestClient(app)
+        resp = client.post("/run-cycle/batch", json={"events": [e.model_dump() for e in EVENTS[:2]]})
+        self.assertEqual(resp.status_code, 200)
+        results = resp.json()["results"]
+        self.assertEqual([r["frame_id"] for r in results], ["frame_002", "frame_003"])
+        self.assertIn("Run a raw query", results[1]["prompt"])
+
+        graph = graph_manager.load_graph()
+        self.assertIn(("frame_001", "frame_002", "sequence"), [(e.from_frame_id, e.to_frame_id, e.type) for e in graph.edges])
+
+if __name__ == '__main__':
+    unittest.main()
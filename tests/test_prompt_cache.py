@@ -0,0 +1,78 @@
+import unittest
+from pathlib import Path
+import json
+import tempfile
+import shutil
+import os
+
+from dev_brain import pipeline, vault_io
+from dev_brain.composer import generate_prompt
+from dev_brain.guardian import process_change_event
+from dev_brain.models import Decision
+from dev_brain.prompt_cache import PromptCache, prompt_cache
+
+class TestPromptCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        vault_root = Path(self.test_dir) / ".dev_brain"
+        for sub in ("summaries", "rule_states", "frames"):
+            (vault_root / sub).mkdir(parents=True)
+        decision = Decision(
+            id="DEC-SQL",
+            topic="Data Access",
+            rule="No direct SQL in Service Layers",
+            allowed_pattern="Use Repository Pattern only",
+            forbidden_pattern="raw query in service",
+            status="strict",
+            scope_layer="architecture",
+            amplitude=0.9
+        )
+        with open(vault_root / "decisions.json", "w") as f:
+            f.write(json.dumps([decision.model_dump()]))
+        Path("pay.py").write_text("def pay(): pass\n")
+        prompt_cache.clear()
+
+    def tearDown(self):
+        prompt_cache.clear()
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_only_request_section_rerendered(self):
+        first = generate_prompt("Add logging", "pay.py")
+        second = generate_prompt("Add metrics", "pay.py")
+        self.assertEqual(prompt_cache.stats()["hits"], 1)
+        self.assertEqual(first.replace("Add logging", "Add metrics"), second)
+
+        # A rule-state change and a source change each produce a fresh context
+        process_change_event("Run a raw query", ["pay.py"])
+        self.assertIn("violating", generate_prompt("Add logging", "pay.py"))
+        Path("pay.py").write_text("def pay(amount): pass\n")
+        self.assertIn("def pay(amount)", generate_prompt("Add logging", "pay.py"))
+        self.assertEqual(prompt_cache.stats()["misses"], 3)
+
+    def test_repeated_cycles_hit(self):
+        # Each cycle writes a new frame and re-saves the rule states; the context only
+        # changes if a belief it shows does
+        for _ in range(5):
+            pipeline.run_cycle("Add logging", "pay.py")
+        self.assertGreaterEqual(prompt_cache.stats()["hits"], 4)
+
+    def test_lru_eviction(self):
+        cache = PromptCache(maxsize=2)
+        for key in ("a", "b", "a", "c", "b"):
+            cache.get_or_render(key, lambda: key.upper())
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 4, "entries": 2, "maxsize": 2})
+
+    def test_stats_endpoint(self):
+        from fastapi.testclient import TestClient
+        from dev_brain.server import app
+
+        generate_prompt("Add logging", "pay.py")
+        resp = TestClient(app).get("/cache/stats")
+        self.assertEqual(resp.json()["prompt"]["misses"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
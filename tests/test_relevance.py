@@ -0,0 +1,94 @@
+import unittest
+from pathlib import Path
+import json
+import tempfile
+import shutil
+import os
+
+from dev_brain import vault_io
+from dev_brain.composer import generate_prompt
+from dev_brain.guardian import process_change_event
+from dev_brain.models import Decision, FileSummary, Lenses, RuleStatesForFile, RuleStateEntry, StateBelief
+from dev_brain.relevance import RelevanceIndex, normalize_key
+
+def make_decision(id, topic, scope_layer, amplitude=0.5):
+    return Decision(
+        id=id,
+        topic=topic,
+        rule=f"Rule {id}",
+        allowed_pattern="Allowed",
+        forbidden_pattern="raw query",
+        status="strict",
+        scope_layer=scope_layer,
+        amplitude=amplitude
+    )
+
+DECISIONS = [
+    make_decision("DEC-ARCH", "Layering", "architecture"),
+    make_decision("DEC-SQL", "Data Access", "service"),
+    make_decision("DEC-UI", "Rendering", "frontend"),
+    make_decision("DEC-SEC", "Secrets", "infrastructure", amplitude=0.95),
+]
+
+class TestRelevance(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        vault_root = Path(self.test_dir) / ".dev_brain"
+        for sub in ("summaries", "rule_states", "frames"):
+            (vault_root / sub).mkdir(parents=True)
+        with open(vault_root / "decisions.json", "w") as f:
+            f.write(json.dumps([d.model_dump() for d in DECISIONS]))
+        vault_io.save_file_summary(FileSummary(
+            file="repo.py", hash="sha256:x", lenses=Lenses(), governance_tags=["data-access"]
+        ))
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_index(self):
+        self.assertEqual(normalize_key("Service Layer"), "service")
+        index = RelevanceIndex(DECISIONS)
+        self.assertEqual(index.positions_for_tags(["service_layer"]), [0, 1, 3])
+        self.assertEqual(index.positions_for_tags(["frontend"]), [0, 2, 3])
+        self.assertEqual(index.positions_for_tags([]), [0, 3])
+        self.assertEqual(index.positions_for_tags(None), [0, 3])
+
+    def test_guardian_only_updates_applicable_decisions(self):
+        ui_entry = RuleStateEntry(
+            rule_id="DEC-UI",
+            state_belief=StateBelief(compliant=0.1, at_risk=0.2, violating=0.7),
+            entangled_with=[],
+            last_updated_frame="frame_000"
+        )
+        vault_io.save_rule_states(RuleStatesForFile(file="repo.py", rule_states=[ui_entry]))
+
+        frame_id = process_change_event("Run a raw query", ["repo.py"])
+        entries = {e.rule_id: e for e in vault_io.load_rule_states("repo.py").rule_states}
+
+        self.assertEqual(set(entries), {"DEC-ARCH", "DEC-SQL", "DEC-UI", "DEC-SEC"})
+        self.assertEqual(entries["DEC-UI"], ui_entry)
+        self.assertEqual(entries["DEC-SQL"].last_updated_frame, frame_id)
+        frame = vault_io.load_frame(frame_id)
+        self.assertEqual(frame.relevant_decisions, ["DEC-ARCH", "DEC-SQL", "DEC-SEC"])
+
+        # Files without a summary are checked against the global decisions only, the
+        # same ones their prompt shows
+        process_change_event("Run a raw query", ["unknown.py"])
+        checked = [e.rule_id for e in vault_io.load_rule_states("unknown.py").rule_states]
+        self.assertEqual(checked, ["DEC-ARCH", "DEC-SEC"])
+        prompt = generate_prompt("Add logging", "unknown.py")
+        for decision in DECISIONS:
+            self.assertEqual(decision.id in prompt, decision.id in checked)
+
+    def test_prompt_lists_applicable_decisions(self):
+        prompt = generate_prompt("Add logging", "repo.py")
+        self.assertIn("DEC-SQL", prompt)
+        self.assertIn("DEC-ARCH", prompt)
+        self.assertNotIn("DEC-UI", prompt)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import unittest
+from unittest.mock import patch
+from io import StringIO
+from pathlib import Path
+import tempfile
+import shutil
+import os
+
+from dev_brain import brain_cli, graph_manager, guardian, pipeline, retention, vault_cache, vault_io
+from dev_brain.prompt_cache import prompt_cache
+from dev_brain.models import Decay, Decision, RuleStateEntry, RuleStatesForFile, StateBelief
+
+def make_decision(half_life=None):
+    return Decision(
+        id="DEC-SQL",
+        topic="Data Access",
+        rule="No direct SQL in services",
+        allowed_pattern="Use repositories",
+        forbidden_pattern="raw query",
+        status="strict",
+        scope_layer="architecture",
+        amplitude=0.9,
+        decay=Decay(half_life_frames=half_life, introduced_in_frame="frame_001", last_updated_frame="frame_001")
+        if half_life else None,
+    )
+
+class TestDecay(unittest.TestCase):
+
+    def test_half_life(self):
+        self.assertEqual(retention.decay_factor(10, 0), 1.0)
+        self.assertAlmostEqual(retention.decay_factor(10, 10), 0.5)
+        self.assertAlmostEqual(retention.decay_factor(10, 20), 0.25)
+
+        rs = RuleStatesForFile(file="svc.py", rule_states=[RuleStateEntry(
+            rule_id="DEC-SQL",
+            state_belief=StateBelief(compliant=0.2, at_risk=0.3, violating=0.5),
+            entangled_with=[],
+            last_updated_frame="frame_010",
+        )])
+        decayed = retention.decay_rule_states(rs, {"DEC-SQL": 10}, 20)
+        belief = decayed.rule_states[0].state_belief
+        self.assertAlmostEqual(belief.compliant, 0.5)
+        self.assertAlmostEqual(belief.at_risk, 0.225)
+        self.assertAlmostEqual(belief.violating, 0.275)
+        # Stored objects are never modified, and rules without a half-life never fade
+        self.assertEqual(rs.rule_states[0].state_belief.violating, 0.5)
+        self.assertIs(retention.decay_rule_states(rs, {}, 20), rs)
+        self.assertIs(retention.decay_rule_states(rs, {"DEC-SQL": 10}, 20, rule_ids=set()), rs)
+
+    def test_single_frame_decays_compound(self):
+        rs = RuleStatesForFile(file="svc.py", rule_states=[RuleStateEntry(
+            rule_id="DEC-SQL",
+            state_belief=StateBelief(compliant=0.2, at_risk=0.3, violating=0.5),
+            entangled_with=[],
+            last_updated_frame="frame_000",
+        )])
+        once = retention.decay_rule_states(rs, {"DEC-SQL": 200}, 1000)
+        stepped = rs
+        for n in range(1, 1001):
+            # As the guardian stores a file re-evaluated every frame
+            stepped = retention.decay_rule_states(stepped, {"DEC-SQL": 200}, n)
+            stepped.rule_states[0] = stepped.rule_states[0].model_copy(update={"last_updated_frame": f"frame_{n:03d}"})
+        self.assertAlmostEqual(stepped.rule_states[0].state_belief.violating, once.rule_states[0].state_belief.violating)
+        self.assertAlmostEqual(once.rule_states[0].state_belief.violating, 0.0641, places=4)
+
+class TestRetentionVault(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.vault_root = Path(self.test_dir) / ".dev_brain"
+        for sub in ("summaries", "rule_states", "frames"):
+            (self.vault_root / sub).mkdir(parents=True)
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_guardian_decays_before_update(self):
+        vault_io.save_decisions([make_decision(half_life=2)])
+        guardian.process_change_event("use a raw query here", ["svc.py"])
+        violating = vault_io.load_rule_states("svc.py").rule_states[0].state_belief.violating
+        for _ in range(4):
+            guardian.process_change_event("unrelated edit", ["other.py"])
+
+        guardian.process_change_event("rename a variable", ["svc.py"])
+        entry = vault_io.load_rule_states("svc.py").rule_states[0]
+        self.assertEqual(entry.last_updated_frame, "frame_006")
+        # Five frames at a half-life of two keep under a fifth of the distance to the prior
+        self.assertLess(entry.state_belief.violating - 0.05, (violating - 0.05) * 0.2)
+
+    def test_file_touched_every_frame_still_decays(self):
+        vault_io.save_decisions([make_decision(half_life=200)])
+        guardian.process_change_event("use a raw query here", ["svc.py"])
+        stored = vault_io.load_rule_states("svc.py")
+        for _ in range(100):
+            guardian.process_change_event("rename a variable", ["svc.py"])
+        expected = retention.decay_rule_states(stored, {"DEC-SQL": 200}, 101)
+        self.assertAlmostEqual(
+            vault_io.load_rule_states("svc.py").rule_states[0].state_belief.violating,
+            expected.rule_states[0].state_belief.violating,
+        )
+        self.assertLess(expected.rule_states[0].state_belief.violating, stored.rule_states[0].state_belief.violating - 0.01)
+
+    def test_single_and_batch_prompts_decay_alike(self):
+        vault_io.save_decisions([make_decision(half_life=2)])
+        guardian.process_change_event("use a raw query here", ["svc.py"])
+        for _ in range(8):
+            guardian.process_change_event("unrelated edit", ["other.py"])
+        shutil.copytree(self.vault_root, Path(self.test_dir) / "saved")
+
+        _, single = pipeline.run_cycle("rename a helper", "svc.py", changed_files=["other.py"])
+        shutil.rmtree(self.vault_root)
+        shutil.copytree(Path(self.test_dir) / "saved", self.vault_root)
+        vault_cache.clear_all()
+        prompt_cache.clear()
+        [(_, batch)] = pipeline.run_cycles([pipeline.CycleEvent(
+            user_request="rename a helper", target_file="svc.py", changed_files=["other.py"])])
+
+        self.assertEqual(single, batch)
+        self.assertIn("violating: 0.07", batch)
+
+    def test_compaction_retires_frames_into_epochs(self):
+        vault_io.save_decisions([make_decision()])
+        for i in range(10):
+            if i % 2 == 0:
+                guardian.process_change_event("use a raw query", ["svc.py"])
+            else:
+                guardian.process_change_event("tidy up", ["other.py"])
+        self.assertEqual(vault_io.count_frames(), 10)
+
+        graph = graph_manager.compact_graph(retention.RetentionPolicy(keep_frames=3, epoch_size=3))
+        # Seven frames are old enough; two full epochs of three are retired
+        self.assertEqual([e.epoch_id for e in graph.epochs], ["epoch_001", "epoch_002"])
+        first = graph.epochs[0]
+        self.assertEqual((first.first_frame_id, first.last_frame_id, first.frame_count), ("frame_001", "frame_003", 3))
+        self.assertEqual(first.violation_counts, {"DEC-SQL": 2})
+        self.assertEqual(first.file_counts, {"svc.py": 2, "other.py": 1})
+        self.assertEqual(first.internal_edges, 2)
+        self.assertEqual(len(graph), 4)
+        self.assertEqual(vault_io.count_frames(), 4)
+        self.assertIsNone(vault_io.load_frame("frame_001"))
+
+        # The sequence chain now runs through the epochs
+        self.assertEqual(graph.successors("epoch_001"), ["epoch_002"])
+        self.assertEqual(graph.successors("epoch_002"), ["frame_007"])
+        self.assertEqual(graph_manager.load_indexed_graph().ancestors("frame_010")[-2:], ["epoch_002", "epoch_001"])
+
+        # Retired frames still count, so new frame IDs keep increasing
+        self.assertEqual(graph_manager.load_graph_head().frame_count, 10)
+        self.assertEqual(guardian.process_change_event("tidy up", ["svc.py"]), "frame_011")
+
+    def test_cli_compact(self):
+        vault_io.save_decisions([make_decision()])
+        for _ in range(5):
+            guardian.process_change_event("tidy up", ["svc.py"])
+        with patch("sys.stdout", new=StringIO()) as out, patch("sys.argv", ["brain_cli", "compact", "--keep", "1", "--epoch-size", "2", "--dry-run"]):
+            brain_cli.main()
+        self.assertIn("Would retire 4 frame(s) into 2 epoch(s)", out.getvalue())
+        self.assertEqual(vault_io.count_frames(), 5)
+
+        with patch("sys.stdout", new=StringIO()) as out, patch("sys.argv", ["brain_cli", "compact", "--keep", "1", "--epoch-size", "2"]):
+            brain_cli.main()
+        self.assertIn("Retired 4 frame(s) into 2 epoch(s)", out.getvalue())
+        self.assertEqual(vault_io.count_frames(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from pathlib import Path
+import random
+import tempfile
+import shutil
+import os
+
+from dev_brain import vault_io, rule_index, brain_cli
+from dev_brain.models import RuleStatesForFile, RuleStateEntry, StateBelief
+
+def make_rule_states(file_path, beliefs):
+    return RuleStatesForFile(file=file_path, rule_states=[
+        RuleStateEntry(
+            rule_id=rule_id,
+            state_belief=StateBelief(compliant=round(1 - v - 0.1, 2), at_risk=0.1, violating=v),
+            entangled_with=[],
+            last_updated_frame="frame_001"
+        )
+        for rule_id, v in beliefs.items()
+    ])
+
+class TestRuleIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.vault_root = Path(self.test_dir) / ".dev_brain"
+        (self.vault_root / "rule_states").mkdir(parents=True)
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def _assert_same(self, index, rebuilt):
+        self.assertEqual(index.rule_state_files, rebuilt.rule_state_files)
+        self.assertEqual(set(index.rules), set(rebuilt.rules))
+        for rule_id, agg in rebuilt.rules.items():
+            ours = index.rules[rule_id]
+            self.assertEqual(ours.file_count, agg.file_count)
+            self.assertAlmostEqual(ours.violating_sum, agg.violating_sum)
+            self.assertAlmostEqual(ours.compliant_sum, agg.compliant_sum)
+            self.assertEqual(
+                [v for _, v in rule_index.top_violating(ours)],
+                [v for _, v in rule_index.top_violating(agg)],
+            )
+
+    def test_incremental_updates_match_rebuild(self):
+        rng = random.Random(5)
+        # Create the index over an empty vault, then keep it up to date through saves only
+        vault_io.load_rule_index()
+
+        for _ in range(400):
+            file_path = f"src/mod_{rng.randint(0, 60)}.py"
+            rules = rng.sample(["R1", "R2", "R3"], rng.randint(0, 3))
+            vault_io.save_rule_states(make_rule_states(file_path, {r: round(rng.random() * 0.8, 2) for r in rules}))
+
+        index = rule_index.load_index(self.vault_root)
+        self.assertIsNotNone(index)
+        self._assert_same(index, vault_io.load_rule_index(rebuild=True))
+
+    def test_batch_save_writes_index_once(self):
+        vault_io.load_rule_index()
+        vault_io.save_rule_states(make_rule_states("a.py", {"R1": 0.4}))
+        batch = [make_rule_states("a.py", {"R1": 0.7, "R2": 0.1})]
+        batch += [make_rule_states(f"f{i}.py", {"R1": i / 20}) for i in range(8)]
+
+        with patch("dev_brain.rule_index.save_index", wraps=rule_index.save_index) as save_index:
+            vault_io.save_rule_states_many(batch)
+        self.assertEqual(save_index.call_count, 1)
+
+        index = rule_index.load_index(self.vault_root)
+        self.assertIsNotNone(index)
+        self._assert_same(index, vault_io.load_rule_index(rebuild=True))
+
+    def test_top_files_recovered_after_pool_drains(self):
+        vault_io.load_rule_index()
+        for i in range(rule_index.POOL_SIZE + 10):
+            vault_io.save_rule_states(make_rule_states(f"f{i:02d}.py", {"R1": 0.5 + i / 100}))
+        # Every pooled file improves, so the top files are now among the ones outside the pool
+        for i in range(10, rule_index.POOL_SIZE + 10):
+            vault_io.save_rule_states(make_rule_states(f"f{i:02d}.py", {"R1": 0.01}))
+
+        self.assertIsNone(rule_index.top_violating(rule_index.load_index(self.vault_root).rules["R1"]))
+        top = rule_index.top_violating(vault_io.load_rule_index().rules["R1"])
+        self.assertEqual([f for f, _ in top], ["f09.py", "f08.py", "f07.py", "f06.py", "f05.py"])
+
+    def test_external_edit_and_rebuild_command(self):
+        vault_io.save_rule_states(make_rule_states("a.py", {"R1": 0.4}))
+        self.assertEqual(vault_io.load_rule_index().rules["R1"].file_count, 1)
+
+        # A file written behind the index's back invalidates it
+        (self.vault_root / "rule_states" / "b.json").write_text(
+            make_rule_states("b.py", {"R1": 0.6}).model_dump_json())
+        self.assertIsNone(rule_index.load_index(self.vault_root))
+
+        args = MagicMock()
+        args.rebuild = True
+        with patch("dev_brain.vault_io.load_decisions", return_value=[MagicMock(id="R1", rule="Rule one")]), \
+             patch("sys.stdout") as stdout:
+            brain_cli.cmd_rules(args)
+        output = "".join(call.args[0] for call in stdout.write.call_args_list)
+        self.assertIn("Files: 2", output)
+        self.assertIn("0.60  b.py", output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import random
+
+from dev_brain.metrics import initial_state_belief, update_state_belief_for_request, apply_suspicion
+from dev_brain.models import Decision
+from dev_brain.rule_matcher import RuleMatcher, get_matcher
+
+def make_decision(i, topic, forbidden_pattern):
+    return Decision(
+        id=f"DEC-{i}",
+        topic=topic,
+        rule="Rule",
+        allowed_pattern="Allowed",
+        forbidden_pattern=forbidden_pattern,
+        status="strict",
+        scope_layer="architecture",
+        amplitude=0.9
+    )
+
+WORDS = [
+    "sql", "raw", "query", "raw query", "direct", "db", "database", "the", "service", "services",
+    "bypass", "bypassing", "ignore", "rule", "i know it violates", "repository", "repo", "query the db",
+    "Ünïcode", "a+b", "(paren", "cache", "caches", "cached", "\n", "logging",
+]
+
+class TestRuleMatcher(unittest.TestCase):
+
+    def test_matches_heuristic_exactly(self):
+        rng = random.Random(7)
+        decisions = [make_decision(0, "Data Access", "raw query in service")]
+        for i in range(1, 60):
+            topic = rng.choice(["Data Access", "data access", "Caching", "Logging"])
+            forbidden = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 5)))
+            decisions.append(make_decision(i, topic, forbidden))
+        matcher = RuleMatcher(decisions)
+
+        initial = initial_state_belief()
+        for _ in range(300):
+            request = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12)))
+            request = "".join(c.upper() if rng.random() < 0.2 else c for c in request)
+            for decision, match in zip(decisions, matcher.scan(request)):
+                self.assertEqual(
+                    apply_suspicion(initial, match.suspicion),
+                    update_state_belief_for_request(initial, request, decision),
+                    (request, decision.topic, decision.forbidden_pattern),
+                )
+
+    def test_scan_positions(self):
+        decisions = [make_decision(i, "Data Access", f"query{i} raw") for i in range(4)]
+        matcher = RuleMatcher(decisions)
+        full = matcher.scan("a raw query2 here")
+        self.assertEqual(matcher.scan_positions("a raw query2 here", [1, 2]), {1: full[1], 2: full[2]})
+
+    def test_overlapping_patterns_are_all_found(self):
+        decisions = [make_decision(0, "Caching", "cache caches cached cache")]
+        match = RuleMatcher(decisions).scan("we cached it")[0]
+        # "cache" appears twice in the pattern and is a prefix of "cached"
+        self.assertEqual(match.match_count, 3)
+        self.assertAlmostEqual(match.suspicion, 0.3)
+
+    def test_matcher_reused_per_decisions_version(self):
+        decisions = [make_decision(0, "Data Access", "raw query")]
+        self.assertIs(get_matcher(decisions), get_matcher([d.model_copy() for d in decisions]))
+        self.assertIsNot(get_matcher(decisions), get_matcher([make_decision(0, "Data Access", "other")]))
+
+if __name__ == '__main__':
+    unittest.main()
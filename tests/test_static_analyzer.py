@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+import tempfile
+import shutil
+import sys
+import os
+
+from dev_brain import codex_ingest, vault_io
+from dev_brain.codex_brain import hash_source
+from dev_brain.static_analyzer import analyze_source, analyze_files
+
+SOURCE = '''
+import os
+import requests
+from sqlalchemy.orm import Session
+from .models import Order, Customer
+
+class OrderService:
+    def place(self, session: Session, order: Order):
+        if order.total < 0:
+            raise ValueError("negative total")
+        session.add(order)
+        session.commit()
+        requests.post(os.getenv("WEBHOOK_URL"), json={"id": order.id})
+
+    def export(self, path):
+        with open(path, "w") as f:
+            f.write("orders")
+
+    def _internal(self):
+        return self.db.execute("SELECT * FROM orders")
+
+def load_defaults():
+    with open("defaults.json") as f:
+        return f.read()
+'''
+
+class TestStaticAnalyzer(unittest.TestCase):
+
+    def test_analyze_source(self):
+        summary = analyze_source(SOURCE, "app/services/order_service.py")
+        lenses = summary.lenses
+        self.assertEqual(summary.hash, hash_source(SOURCE))
+        self.assertEqual(lenses.interface_view.classes, ["OrderService"])
+        self.assertEqual(lenses.interface_view.public_methods, ["place", "export", "load_defaults"])
+        self.assertEqual(lenses.interface_view.dependencies, ["os", "requests", "Session", "Order", "Customer"])
+        self.assertIn("database", lenses.data_view.writes_to)
+        self.assertIn("database", lenses.data_view.reads_from)
+        self.assertIn("network: requests.post", lenses.data_view.writes_to)
+        self.assertIn("file:defaults.json", lenses.data_view.reads_from)
+        self.assertIn("file:?", lenses.data_view.writes_to)
+        self.assertIn("environment", lenses.data_view.reads_from)
+        self.assertIn("OrderService.place raises ValueError", lenses.logic_view.critical_branches)
+        for tag in ("service_layer", "data_access", "infrastructure", "filesystem", "configuration"):
+            self.assertIn(tag, summary.governance_tags)
+
+class TestStaticIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.root = Path(self.test_dir).resolve()
+        (self.root / ".dev_brain" / "summaries").mkdir(parents=True)
+        (self.root / "pkg").mkdir()
+        for i in range(6):
+            (self.root / "pkg" / f"mod_{i}.py").write_text(f"class Mod{i}:\n    def run(self):\n        return {i}\n")
+        (self.root / "pkg" / "broken.py").write_text("def broken(:\n")
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_process_pool_matches_in_process(self):
+        paths = sorted((self.root / "pkg").glob("*.py"))
+        pooled = list(analyze_files(paths, processes=2))
+        serial = list(analyze_files(paths, processes=1))
+        self.assertEqual([r.path for r in pooled], paths)
+        self.assertEqual([r.summary for r in pooled], [r.summary for r in serial])
+        self.assertIn("SyntaxError", pooled[0].error)
+
+    def test_static_engine_needs_no_llm(self):
+        with patch.object(sys, "argv", ["codex_ingest", "--root", str(self.root), "--engine", "static", "--processes", "2"]), \
+             patch("dev_brain.codex_ingest.ingest_files") as mock_ingest, \
+             patch("dev_brain.codex_ingest.ingest_files_concurrently") as mock_concurrent, \
+             patch("sys.stdout"):
+            codex_ingest.main()
+        mock_ingest.assert_not_called()
+        mock_concurrent.assert_not_called()
+        summary = vault_io.load_file_summary((self.root / "pkg" / "mod_3.py").as_posix())
+        self.assertEqual(summary.lenses.interface_view.classes, ["Mod3"])
+        self.assertIsNone(vault_io.load_file_summary((self.root / "pkg" / "broken.py").as_posix()))
+
+    def test_hybrid_engine_only_enriches_logic_view(self):
+        with patch.object(sys, "argv", ["codex_ingest", "--root", str(self.root), "--engine", "hybrid", "--processes", "1"]), \
+             patch("dev_brain.codex_ingest.ingest_files_concurrently") as mock_concurrent, \
+             patch("sys.stdout"):
+            codex_ingest.main()
+        paths = mock_concurrent.call_args.args[0]
+        self.assertEqual(len(paths), 6)
+        self.assertIn("build", mock_concurrent.call_args.kwargs)
+        # The static summaries are already stored before the LLM pass
+        self.assertIsNotNone(vault_io.load_file_summary(paths[0].as_posix()))
+
+if __name__ == '__main__':
+    unittest.main()
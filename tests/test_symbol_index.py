@@ -0,0 +1,92 @@
+import unittest
+from pathlib import Path
+import json
+import tempfile
+import shutil
+import os
+
+from dev_brain import vault_io, vault_backend, symbol_index
+from dev_brain.composer import generate_prompt
+from dev_brain.models import FileSummary, Lenses, InterfaceView
+
+def make_summary(file_path, classes, methods, deps):
+    return FileSummary(
+        file=file_path,
+        hash="sha256:x",
+        lenses=Lenses(interface_view=InterfaceView(classes=classes, public_methods=methods, dependencies=deps)),
+        governance_tags=[]
+    )
+
+class TestSymbolIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.vault_root = Path(self.test_dir) / ".dev_brain"
+        (self.vault_root / "summaries").mkdir(parents=True)
+        with open(self.vault_root / "decisions.json", "w") as f:
+            f.write("[]")
+        vault_io.save_file_summary(make_summary("app/checkout.py", ["Checkout"], ["run"], ["PaymentGateway", "Missing"]))
+        vault_io.save_file_summary(make_summary("services/payment.py", ["PaymentGateway"], ["charge", "refund"], ["HttpClient"]))
+        vault_io.save_file_summary(make_summary("lib/http.py", ["HttpClient"], ["post"], []))
+
+    def tearDown(self):
+        vault_backend.get_backend().close()
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_prompt_inlines_dependency_interfaces(self):
+        prompt = generate_prompt("Add retries", "app/checkout.py")
+        self.assertIn("- PaymentGateway -> services/payment.py", prompt)
+        self.assertIn("Public methods: charge, refund", prompt)
+        self.assertIn("- Missing: not found in the vault", prompt)
+        self.assertNotIn("HttpClient ->", prompt)
+
+        prompt = generate_prompt("Add retries", "app/checkout.py", dependency_depth=2)
+        self.assertIn("- HttpClient -> lib/http.py (via PaymentGateway)", prompt)
+
+    def test_target_excluded_under_either_path_form(self):
+        # codex_ingest keys summaries by absolute path; the prompt's target is relative
+        target = Path(os.getcwd(), "app", "checkout.py").as_posix()
+        view = InterfaceView(classes=["Checkout"], public_methods=[], dependencies=[])
+        found = symbol_index.resolve_dependencies(lambda symbols: {"Checkout": (target, view)}, ["Checkout"], exclude="./app/checkout.py")
+        self.assertEqual(found, [])
+
+    def test_index_updates_incrementally(self):
+        self.assertEqual(vault_io.lookup_symbols(["charge"])["charge"][0], "services/payment.py")
+        self.assertTrue(symbol_index.index_path(self.vault_root).exists())
+
+        vault_io.save_file_summary(make_summary("services/payment.py", ["PaymentService"], ["pay"], []))
+        vault_io.save_file_summary(make_summary("lib/retry.py", ["Retry"], ["charge"], []))
+        index = symbol_index.load_index(self.vault_root)
+        self.assertIsNotNone(index)
+        self.assertNotIn("PaymentGateway", index.symbols)
+        self.assertEqual(index.symbols["charge"], ["lib/retry.py"])
+
+        vault_io.delete_file_summary("lib/retry.py")
+        index = symbol_index.load_index(self.vault_root)
+        self.assertNotIn("charge", index.symbols)
+        rebuilt = symbol_index.build_index(vault_io.iter_file_summaries())
+        self.assertEqual((index.symbols, index.interfaces), (rebuilt.symbols, rebuilt.interfaces))
+
+        # A summary written behind the index's back makes it stale
+        with open(self.vault_root / "summaries" / "manual.json", "w") as f:
+            f.write(make_summary("manual.py", ["Manual"], [], []).model_dump_json())
+        self.assertIsNone(symbol_index.load_index(self.vault_root))
+        self.assertIn("Manual", vault_io.lookup_symbols(["Manual"]))
+
+    def test_sqlite_backend(self):
+        vault_backend.migrate_json_to_sqlite()
+        found = vault_io.lookup_symbols(["PaymentGateway", "post", "Missing"])
+        self.assertEqual(found["PaymentGateway"][0], "services/payment.py")
+        self.assertEqual(found["post"][1].classes, ["HttpClient"])
+        self.assertNotIn("Missing", found)
+
+        vault_io.delete_file_summary("lib/http.py")
+        self.assertEqual(vault_io.lookup_symbols(["post"]), {})
+        prompt = generate_prompt("Add retries", "app/checkout.py")
+        self.assertIn("- PaymentGateway -> services/payment.py", prompt)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from pathlib import Path
+import json
+import tempfile
+import shutil
+import os
+
+from dev_brain import telemetry, vault_cache
+from dev_brain.models import Decision
+
+class TestTelemetry(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        vault_root = Path(self.test_dir) / ".dev_brain"
+        for sub in ("summaries", "rule_states", "frames"):
+            (vault_root / sub).mkdir(parents=True)
+        decision = Decision(
+            id="DEC-SQL",
+            topic="Data Access",
+            rule="No direct SQL in Service Layers",
+            allowed_pattern="Use Repository Pattern only",
+            forbidden_pattern="raw query in service",
+            status="strict",
+            scope_layer="architecture",
+            amplitude=0.9
+        )
+        with open(vault_root / "decisions.json", "w") as f:
+            f.write(json.dumps([decision.model_dump()]))
+        Path("pay.py").write_text("def pay(): pass\n")
+        telemetry.reset()
+        self.was_enabled = telemetry.enabled()
+
+    def tearDown(self):
+        telemetry.set_enabled(self.was_enabled)
+        telemetry.reset()
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_metrics_endpoint(self):
+        from fastapi.testclient import TestClient
+        from dev_brain.server import app
+
+        telemetry.set_enabled(True)
+        client = TestClient(app)
+        self.assertEqual(client.post("/run-cycle", json={"user_request": "Add logging", "target_file": "pay.py"}).status_code, 200)
+        client.post("/run-cycle", json={"user_request": "Add logging"})
+
+        body = client.get("/metrics").text
+        self.assertIn('devbrain_stage_seconds_count{stage="guardian.save_rule_states"} 1', body)
+        self.assertIn('devbrain_stage_seconds_count{stage="composer.render_context"} 1', body)
+        self.assertIn('devbrain_stage_seconds_bucket{stage="pipeline.run_cycle",le="+Inf"} 1', body)
+        self.assertIn('devbrain_requests_total{endpoint="POST /run-cycle"} 2', body)
+        self.assertIn('devbrain_vault_items{kind="frames"} 1', body)
+        self.assertIn('devbrain_cache_hit_ratio{cache="prompt"}', body)
+        self.assertIn("# TYPE devbrain_cache_hits_total counter", body)
+        self.assertIn("# TYPE devbrain_cache_misses_total counter", body)
+        self.assertIn("# TYPE devbrain_cache_hit_ratio gauge", body)
+
+        # A scrape reports what the process already knows: no cache lookups, no rebuilds
+        (Path(".dev_brain") / "graph_head.json").unlink()
+        decisions_stats = vault_cache.decisions_cache.stats()
+        body = client.get("/metrics").text
+        self.assertIn('devbrain_vault_items{kind="decisions"} 1', body)
+        self.assertEqual(vault_cache.decisions_cache.stats(), decisions_stats)
+        self.assertFalse((Path(".dev_brain") / "graph_head.json").exists())
+
+    def test_disabled_is_noop(self):
+        telemetry.set_enabled(False)
+        with telemetry.timed("anything"):
+            pass
+        self.assertEqual(telemetry.stage_seconds.snapshot(), {})
+
+    def test_histogram_buckets(self):
+        hist = telemetry.Histogram("h", "help", "stage", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            hist.observe("s", value)
+        lines = list(hist.render())
+        self.assertIn('h_bucket{stage="s",le="0.1"} 2', lines)
+        self.assertIn('h_bucket{stage="s",le="1.0"} 3', lines)
+        self.assertIn('h_bucket{stage="s",le="+Inf"} 4', lines)
+        self.assertIn('h_count{stage="s"} 4', lines)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+import json
+import tempfile
+import shutil
+import os
+import sqlite3
+
+from dev_brain import vault_io, vault_backend
+from dev_brain.models import (
+    Decision, FileSummary, Lenses, InterfaceView, RuleStatesForFile,
+    RuleStateEntry, StateBelief, FrameSnapshot,
+)
+
+def make_rule_states(file_path, beliefs):
+    return RuleStatesForFile(file=file_path, rule_states=[
+        RuleStateEntry(
+            rule_id=rule_id,
+            state_belief=StateBelief(compliant=c, at_risk=r, violating=v),
+            entangled_with=["DEC-X"],
+            last_updated_frame="frame_001"
+        )
+        for rule_id, (c, r, v) in beliefs.items()
+    ])
+
+class TestVaultBackends(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+
+        self.vault_root = Path(self.test_dir) / ".dev_brain"
+        self.vault_root.mkdir()
+        (self.vault_root / "summaries").mkdir()
+        (self.vault_root / "rule_states").mkdir()
+        (self.vault_root / "frames").mkdir()
+
+        self.decision = Decision(
+            id="DEC-TEST",
+            topic="Test Topic",
+            rule="Test Rule",
+            allowed_pattern="Allowed",
+            forbidden_pattern="Forbidden",
+            status="strict",
+            scope_layer="architecture",
+            amplitude=0.9
+        )
+        with open(self.vault_root / "decisions.json", "w") as f:
+            f.write(json.dumps([self.decision.model_dump()]))
+
+    def tearDown(self):
+        vault_backend.get_backend().close()
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def _populate(self):
+        vault_io.save_rule_states(make_rule_states("services/a.py", {"DEC-TEST": (0.8, 0.15, 0.05)}))
+        vault_io.save_rule_states(make_rule_states("services/b.py", {"DEC-TEST": (0.2, 0.3, 0.5), "DEC-2": (1.0, 0.0, 0.0)}))
+        vault_io.save_file_summary(FileSummary(
+            file="services/a.py",
+            hash="sha256:abc",
+            lenses=Lenses(interface_view=InterfaceView(classes=["A"], public_methods=[], dependencies=[])),
+            governance_tags=["service_layer"]
+        ))
+        vault_io.save_frame(FrameSnapshot(
+            frame_id="frame_001",
+            timestamp="2025-01-01T00:00:00Z",
+            user_goal="test",
+            changed_files=["services/a.py"],
+            relevant_decisions=["DEC-TEST"],
+            suspected_violations=[],
+            predicted_risks=[],
+            next_steps=[]
+        ))
+
+    def _check_vault(self):
+        self.assertEqual([d.id for d in vault_io.load_decisions()], ["DEC-TEST"])
+        self.assertEqual(vault_io.count_rule_state_files(), 2)
+        self.assertEqual(vault_io.count_frames(), 1)
+        self.assertEqual(vault_io.load_frame("frame_001").changed_files, ["services/a.py"])
+        self.assertEqual(vault_io.load_file_summary("services/a.py").lenses.interface_view.classes, ["A"])
+
+        rs_b = vault_io.load_rule_states("services/b.py")
+        self.assertEqual([e.rule_id for e in rs_b.rule_states], ["DEC-TEST", "DEC-2"])
+        self.assertEqual(rs_b.rule_states[0].entangled_with, ["DEC-X"])
+
+        aggregates = vault_io.load_rule_aggregates()
+        self.assertEqual(aggregates["DEC-TEST"].file_count, 2)
+        self.assertAlmostEqual(aggregates["DEC-TEST"].means().violating, 0.275)
+        self.assertEqual(aggregates["DEC-2"].file_count, 1)
+
+    def test_json_backend(self):
+        self._populate()
+        self.assertEqual(vault_backend.get_backend().name, "json")
+        self.assertTrue((self.vault_root / "rule_states" / "services_b.json").exists())
+        self._check_vault()
+
+    def test_sqlite_backend(self):
+        with patch.dict(os.environ, {"QDB_VAULT_BACKEND": "sqlite"}):
+            self._populate()
+            self.assertEqual(vault_backend.get_backend().name, "sqlite")
+            self.assertFalse((self.vault_root / "rule_states" / "services_b.json").exists())
+            self._check_vault()
+
+            self.assertTrue(vault_io.delete_file_summary("services/a.py"))
+            self.assertIsNone(vault_io.load_file_summary("services/a.py"))
+            vault_backend.get_backend().close()
+
+        conn = sqlite3.connect(str(self.vault_root / vault_backend.SQLITE_FILENAME))
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        conn.close()
+
+    def test_sqlite_reimports_edited_decisions_json(self):
+        with patch.dict(os.environ, {"QDB_VAULT_BACKEND": "sqlite"}):
+            self.assertEqual(len(vault_io.load_decisions()), 1)
+            other = self.decision.model_copy(update={"id": "DEC-NEW"})
+            with open(self.vault_root / "decisions.json", "w") as f:
+                f.write(json.dumps([self.decision.model_dump(), other.model_dump()]))
+            self.assertEqual([d.id for d in vault_io.load_decisions()], ["DEC-TEST", "DEC-NEW"])
+            vault_backend.get_backend().close()
+
+    def test_migration_from_json(self):
+        self._populate()
+        counts = vault_backend.migrate_json_to_sqlite()
+        self.assertEqual(counts, {"decisions": 1, "summaries": 1, "rule_states": 2, "frames": 1})
+
+        # The migrated vault is picked up without configuration
+        self.assertEqual(vault_backend.get_backend().name, "sqlite")
+        self._check_vault()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from pathlib import Path
+import json
+import tempfile
+import shutil
+import os
+
+from dev_brain import vault_io
+from dev_brain.vault_cache import VaultCache
+from dev_brain.models import Decision, RuleStatesForFile, RuleStateEntry, StateBelief
+
+class TestVaultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+
+        self.vault_root = Path(self.test_dir) / ".dev_brain"
+        self.vault_root.mkdir()
+        (self.vault_root / "summaries").mkdir()
+        (self.vault_root / "rule_states").mkdir()
+        (self.vault_root / "frames").mkdir()
+
+        self.decision = Decision(
+            id="DEC-TEST",
+            topic="Test Topic",
+            rule="Test Rule",
+            allowed_pattern="Allowed",
+            forbidden_pattern="Forbidden",
+            status="strict",
+            scope_layer="architecture",
+            amplitude=0.9
+        )
+        self._write_decisions([self.decision])
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def _write_decisions(self, decisions):
+        with open(self.vault_root / "decisions.json", "w") as f:
+            f.write(json.dumps([d.model_dump() for d in decisions]))
+
+    def test_hit_returns_same_objects(self):
+        first = vault_io.load_decisions()
+        second = vault_io.load_decisions()
+        self.assertIs(first[0], second[0])
+
+    def test_rewrite_invalidates(self):
+        vault_io.load_decisions()
+        other = self.decision.model_copy(update={"id": "DEC-OTHER"})
+        self._write_decisions([self.decision, other])
+        ids = [d.id for d in vault_io.load_decisions()]
+        self.assertEqual(ids, ["DEC-TEST", "DEC-OTHER"])
+
+    def test_same_size_rewrite_detected_by_hash(self):
+        vault_io.load_decisions()
+        stat = os.stat(self.vault_root / "decisions.json")
+        self._write_decisions([self.decision.model_copy(update={"id": "DEC-TSET"})])
+        # Force an identical (mtime, size) signature; only the content hash differs.
+        os.utime(self.vault_root / "decisions.json", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(vault_io.load_decisions()[0].id, "DEC-TSET")
+
+    def test_save_rule_states_writes_through(self):
+        rs = RuleStatesForFile(file="services/a.py", rule_states=[
+            RuleStateEntry(
+                rule_id="DEC-TEST",
+                state_belief=StateBelief(compliant=0.5, at_risk=0.3, violating=0.2),
+                entangled_with=[],
+                last_updated_frame="frame_001"
+            )
+        ])
+        vault_io.save_rule_states(rs)
+        rs.rule_states[0].state_belief.compliant = 0.0  # caller mutations must not leak
+
+        loaded = vault_io.load_rule_states("services/a.py")
+        self.assertEqual(loaded.rule_states[0].state_belief.compliant, 0.5)
+        self.assertIs(loaded, vault_io.load_rule_states("services/a.py"))
+
+    def test_lru_eviction(self):
+        cache = VaultCache(maxsize=2)
+        paths = []
+        for i in range(3):
+            p = Path(self.test_dir) / f"f{i}.json"
+            p.write_text(str(i))
+            paths.append(p)
+            cache.get(p, lambda data: int(data))
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertIsNone(cache.digest(paths[0]))
+        self.assertIsNotNone(cache.digest(paths[2]))
+
+if __name__ == '__main__':
+    unittest.main()
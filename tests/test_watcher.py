@@ -0,0 +1,131 @@
+import unittest
+from argparse import Namespace
+from pathlib import Path
+import shutil
+import tempfile
+import threading
+import time
+import os
+
+from dev_brain import codex_ingest, vault_io
+from dev_brain.watcher import ChangeBatch, Debouncer, InotifyUnavailable, InotifyWatcher, PollingWatcher, watch
+
+def collect(watcher, rounds=20, timeout=0.05):
+    events = {}
+    for _ in range(rounds):
+        for path, kind in watcher.read_events(timeout):
+            events[path] = kind
+    return events
+
+class TestDebouncer(unittest.TestCase):
+
+    def test_coalesces_bursts(self):
+        d = Debouncer(debounce=0.5, max_delay=2.0)
+        d.add(Path("a.py"), "changed", now=0.0)
+        d.add(Path("a.py"), "changed", now=0.3)
+        d.add(Path("b.py"), "changed", now=0.4)
+        self.assertFalse(d.ready(0.8))
+        self.assertAlmostEqual(d.next_deadline(0.8), 0.1)
+        self.assertTrue(d.ready(0.9))
+        batch = d.drain()
+        self.assertEqual(batch.changed, [Path("a.py"), Path("b.py")])
+        self.assertFalse(d.pending())
+
+        # A continuous burst is flushed after max_delay
+        for i in range(10):
+            d.add(Path("c.py"), "changed", now=10.0 + i * 0.3)
+        self.assertTrue(d.ready(12.7))
+        d.add(Path("c.py"), "deleted", now=12.8)
+        self.assertEqual(d.drain(), ChangeBatch(changed=[], deleted=[Path("c.py")], deleted_dirs=[]))
+
+class TestWatchers(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp()).resolve()
+        (self.root / "pkg").mkdir()
+        (self.root / ".dev_brain").mkdir()
+        (self.root / "pkg" / "a.py").write_text("a = 1\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _exercise(self, watcher):
+        try:
+            (self.root / "pkg" / "a.py").write_text("a = 22\n")
+            (self.root / "pkg" / "b.py").write_text("b = 1\n")
+            (self.root / ".dev_brain" / "ignored.json").write_text("{}")
+            (self.root / "pkg" / "a.py").unlink()
+            (self.root / "new").mkdir()
+            (self.root / "new" / "c.py").write_text("c = 1\n")
+            events = collect(watcher)
+        finally:
+            watcher.close()
+        self.assertEqual(events.get(self.root / "pkg" / "a.py"), "deleted")
+        self.assertEqual(events.get(self.root / "pkg" / "b.py"), "changed")
+        self.assertEqual(events.get(self.root / "new" / "c.py"), "changed")
+        self.assertNotIn(self.root / ".dev_brain" / "ignored.json", events)
+
+    def test_polling(self):
+        self._exercise(PollingWatcher(self.root, interval=0.0))
+
+    def test_inotify(self):
+        try:
+            watcher = InotifyWatcher(self.root)
+        except InotifyUnavailable as e:
+            self.skipTest(str(e))
+        self._exercise(watcher)
+
+class TestWatchIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.root = Path(self.test_dir).resolve()
+        (self.root / ".dev_brain" / "summaries").mkdir(parents=True)
+        (self.root / "pkg").mkdir()
+        self.args = Namespace(engine="static", processes=1, workers=1, rpm=None, tpm=None, max_retries=0)
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_batches_reingest_only_changed_files(self):
+        source = self.root / "pkg" / "svc.py"
+        source.write_text("class Svc:\n    def run(self):\n        pass\n")
+        stop = threading.Event()
+        batches = []
+
+        def on_batch(batch):
+            batches.append(batch)
+            codex_ingest.apply_plan(codex_ingest.plan_changes(self.root, "**/*.py", batch), self.args)
+
+        thread = threading.Thread(target=watch, args=(self.root, on_batch), kwargs={
+            "debounce": 0.2, "force_polling": True, "poll_interval": 0.05, "stop": stop,
+        })
+        thread.start()
+        try:
+            time.sleep(0.2)
+            for i in range(3):
+                source.write_text(f"class Svc:\n    def run_{i}(self):\n        pass\n")
+            (self.root / "pkg" / "notes.txt").write_text("not python")
+            deadline = time.monotonic() + 5
+            key = source.as_posix()
+            while time.monotonic() < deadline:
+                summary = vault_io.load_file_summary(key)
+                if summary and summary.lenses.interface_view.public_methods == ["run_2"]:
+                    break
+                time.sleep(0.05)
+            self.assertEqual(vault_io.load_file_summary(key).lenses.interface_view.public_methods, ["run_2"])
+
+            source.unlink()
+            while time.monotonic() < deadline and vault_io.load_file_summary(key) is not None:
+                time.sleep(0.05)
+            self.assertIsNone(vault_io.load_file_summary(key))
+        finally:
+            stop.set()
+            thread.join()
+        self.assertLessEqual(len(batches), 3)
+
+if __name__ == '__main__':
+    unittest.main()